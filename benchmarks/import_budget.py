@@ -0,0 +1,162 @@
+"""
+Import-time budget for Company Research Agent
+
+Measures how long a fresh interpreter takes to import the API (main) and
+the interactive CLI (src.company_research_agent) using `python -X importtime`,
+lists the slowest modules, and fails if an import exceeds its budget in
+benchmarks/import_budget.json or pulls in a heavy optional dependency that
+should only load on first use (crawl4ai, duckduckgo_search, bs4, aiohttp, ...).
+
+Usage:
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --update   # re-measure and rewrite the budgets
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from src.startup import HEAVY_MODULES
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(REPO_ROOT, "benchmarks", "import_budget.json")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+
+def parse_importtime(output: str, target: str) -> Tuple[float, Dict[str, Dict[str, float]]]:
+    """
+    Parse `python -X importtime` output
+
+    Args:
+        output: The interpreter's stderr
+        target: The imported module, whose cumulative time is the total
+
+    Returns:
+        (total milliseconds, {module: {"self_ms", "cumulative_ms"}})
+    """
+    total_us = 0
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        name = name.strip()
+        modules[name] = {"self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000}
+        if name == target:
+            total_us = int(cumulative_us)
+    return total_us / 1000, modules
+
+
+def measure_import(target: str, runs: int) -> Dict:
+    """
+    Import a module in fresh interpreters and keep the fastest run
+
+    Args:
+        target: Module to import, e.g. "main"
+        runs: Number of interpreters to start
+
+    Returns:
+        Dict with the median and fastest import time, the slowest modules of the
+        fastest run and the heavy modules it imported
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    totals: List[float] = []
+    best = None
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"import {target} failed:\n{completed.stderr[-2000:]}")
+        total, modules = parse_importtime(completed.stderr, target)
+        totals.append(total)
+        if best is None or total < best[0]:
+            best = (total, modules)
+
+    total, modules = best
+    slowest = sorted(modules.items(), key=lambda item: item[1]["self_ms"], reverse=True)[:15]
+    heavy = sorted({name.split(".")[0] for name in modules} & set(HEAVY_MODULES))
+    return {
+        "import_ms": round(total, 1),
+        "median_ms": round(statistics.median(totals), 1),
+        "runs": runs,
+        "slowest": [{"module": name, **{k: round(v, 2) for k, v in stats.items()}} for name, stats in slowest],
+        "heavy_modules": heavy
+    }
+
+
+def check_budget(target: str, result: Dict, budget: Dict) -> List[str]:
+    """
+    Compare a measurement with its budget
+
+    Returns:
+        Human-readable violations (empty if within budget)
+    """
+    violations = []
+    if result["import_ms"] > budget["budget_ms"]:
+        violations.append(f"{target}: import took {result['import_ms']:.0f} ms, budget {budget['budget_ms']:.0f} ms")
+    for name in result["heavy_modules"]:
+        if name in budget.get("forbidden", []):
+            violations.append(f"{target}: imports {name} at startup (it should load on first use)")
+    return violations
+
+
+def print_report(target: str, result: Dict, budget: Dict) -> None:
+    print(f"\n📦 import {target}: {result['import_ms']:.0f} ms fastest, {result['median_ms']:.0f} ms median "
+          f"(budget {budget['budget_ms']:.0f} ms, {result['runs']} runs)")
+    print(f"   heavy modules: {', '.join(result['heavy_modules']) or 'none'}")
+    print(f"   {'module':<44}{'self ms':>10}{'cum. ms':>10}")
+    for entry in result["slowest"]:
+        print(f"   {entry['module']:<44}{entry['self_ms']:>10.1f}{entry['cumulative_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check cold-start import times against their budgets")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--budget", default=BUDGET_FILE, help="Budget file")
+    parser.add_argument("--update", action="store_true", help="Rewrite the budgets from this measurement")
+    parser.add_argument("--headroom", type=float, default=0.25, help="Margin added to measured times by --update")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/import_budget_<timestamp>.json)")
+    args = parser.parse_args()
+
+    with open(args.budget, "r", encoding="utf-8") as f:
+        budgets = json.load(f)
+
+    results = {}
+    violations = []
+    for target, budget in budgets["targets"].items():
+        results[target] = measure_import(target, args.runs)
+        print_report(target, results[target], budget)
+        violations.extend(check_budget(target, results[target], budget))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"import_budget_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"started": datetime.now().isoformat(), "python": sys.version.split()[0],
+                   "results": results, "violations": violations}, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.update:
+        for target, budget in budgets["targets"].items():
+            budget["budget_ms"] = round(results[target]["import_ms"] * (1 + args.headroom))
+        with open(args.budget, "w", encoding="utf-8") as f:
+            json.dump(budgets, f, indent=2)
+            f.write("\n")
+        print(f"✏️ Budgets updated in {args.budget}")
+        return
+
+    if violations:
+        print("\n⚠️ Import budget exceeded:")
+        for violation in violations:
+            print(f"  - {violation}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
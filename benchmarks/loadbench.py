@@ -0,0 +1,352 @@
+"""
+Load Test Harness for Company Research Agent
+
+Starts the stub servers, launches the API against them in a scratch
+directory (so caches, plans and queues start empty), and drives /research,
+/chat, /edit-plan and /generate/stream with N concurrent simulated users.
+Reports throughput, p50/p95/p99 latency and error rate per operation, saves
+the run as JSON, and optionally compares it with a baseline run.
+
+Usage:
+    python -m benchmarks.loadbench --users 10 --iterations 2
+    python -m benchmarks.loadbench --users 10 --baseline benchmarks/results/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.stub_servers import add_stub_arguments, stubs_from_args
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+CHAT_MESSAGES = [
+    "What are their main products?",
+    "Who is on the leadership team?",
+    "What are the biggest risks?"
+]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Latencies and outcomes per operation"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    def record(self, operation: str, seconds: float, error: Optional[str] = None) -> None:
+        self.samples.setdefault(operation, []).append(seconds)
+        if error:
+            counts = self.errors.setdefault(operation, {})
+            counts[error] = counts.get(error, 0) + 1
+
+    def summary(self, wall_seconds: float) -> Dict:
+        """Per-operation throughput, latency percentiles (ms) and error rate"""
+        report = {}
+        for operation, values in self.samples.items():
+            ordered = sorted(values)
+            errors = sum(self.errors.get(operation, {}).values())
+            report[operation] = {
+                "count": len(values),
+                "errors": errors,
+                "error_rate": round(errors / len(values), 4),
+                "error_kinds": self.errors.get(operation, {}),
+                "throughput_per_s": round(len(values) / wall_seconds, 3) if wall_seconds else 0.0,
+                "mean_ms": round(sum(values) / len(values) * 1000, 1),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1)
+            }
+        return report
+
+
+class SimulatedUser:
+    """One client session: research a company, chat about it, edit and stream"""
+
+    def __init__(self, user_id: int, base_url: str, recorder: Recorder, company: str,
+                 poll_interval: float, timeout: float):
+        self.user_id = user_id
+        self.base_url = base_url
+        self.recorder = recorder
+        self.company = company
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        # The header keeps sessions apart without relying on cookies for 127.0.0.1;
+        # the server issues the id on the first request
+        self.headers: Dict[str, str] = {}
+
+    def _adopt_session(self, response: aiohttp.ClientResponse) -> None:
+        if "X-Session-ID" in response.headers:
+            self.headers["X-Session-ID"] = response.headers["X-Session-ID"]
+
+    async def _timed(self, operation: str, call) -> Optional[Dict]:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(call(), self.timeout)
+        except asyncio.TimeoutError:
+            self.recorder.record(operation, time.perf_counter() - start, "timeout")
+            return None
+        except aiohttp.ClientResponseError as e:
+            self.recorder.record(operation, time.perf_counter() - start, f"http_{e.status}")
+            return None
+        except Exception as e:
+            self.recorder.record(operation, time.perf_counter() - start, type(e).__name__)
+            return None
+        self.recorder.record(operation, time.perf_counter() - start)
+        return result
+
+    async def _post(self, session: aiohttp.ClientSession, path: str, payload: Dict) -> Dict:
+        async with session.post(f"{self.base_url}{path}", json=payload, headers=self.headers) as response:
+            response.raise_for_status()
+            self._adopt_session(response)
+            return await response.json()
+
+    async def _research(self, session: aiohttp.ClientSession) -> Dict:
+        """Submit a research job and wait for its result (end-to-end latency)"""
+        job = await self._post(session, "/research", {"company_name": self.company})
+        while True:
+            async with session.get(f"{self.base_url}{job['status_url']}", headers=self.headers) as response:
+                response.raise_for_status()
+                status = await response.json()
+            if status["status"] in ("completed", "failed", "cancelled"):
+                break
+            await asyncio.sleep(self.poll_interval)
+        async with session.get(f"{self.base_url}{job['result_url']}", headers=self.headers) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def _stream(self, session: aiohttp.ClientSession) -> Dict:
+        """Read an NDJSON generation stream, recording time to first chunk separately"""
+        start = time.perf_counter()
+        first_chunk = None
+        chunks = 0
+        payload = {"context": f"Research notes about {self.company}.", "query": "Summarize the opportunity",
+                   "use_cache": False}
+        async with session.post(f"{self.base_url}/generate/stream", json=payload, headers=self.headers) as response:
+            response.raise_for_status()
+            async for line in response.content:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if "error" in data:
+                    raise RuntimeError(data["error"])
+                if "content" in data:
+                    chunks += 1
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - start
+                        self.recorder.record("stream_first_chunk", first_chunk)
+        return {"chunks": chunks}
+
+    async def run(self, session: aiohttp.ClientSession, iterations: int) -> None:
+        for _ in range(iterations):
+            result = await self._timed("research", lambda: self._research(session))
+            if result is None:
+                continue
+            for message in CHAT_MESSAGES:
+                await self._timed("chat", lambda: self._post(session, "/chat", {"message": message}))
+            await self._timed("edit_plan", lambda: self._post(session, "/edit-plan", {
+                "section": "next_steps",
+                "instructions": "Add a follow-up meeting within two weeks"
+            }))
+            await self._timed("generate_stream", lambda: self._stream(session))
+
+
+def app_environment(stub_env: Dict[str, str], workdir: str) -> Dict[str, str]:
+    """Environment for the API process: stubs, an isolated cache and generous rate limits"""
+    env = dict(os.environ)
+    env.update(stub_env)
+    env.update({
+        "PYTHONPATH": REPO_ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+        "CACHE_BACKEND": "memory",
+        "LLM_CACHE_DIR": os.path.join(workdir, "llm_cache"),
+        "COMPANY_ALIASES_FILE": os.path.join(REPO_ROOT, "data", "company_aliases.json"),
+        # Rate limits are exercised by the scheduler tests, not here
+        "GROQ_REQUESTS_PER_MINUTE": "100000",
+        "GROQ_TOKENS_PER_MINUTE": "100000000",
+        "MISTRAL_REQUESTS_PER_MINUTE": "100000",
+        "MISTRAL_TOKENS_PER_MINUTE": "100000000"
+    })
+    return env
+
+
+async def wait_for_app(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"API did not become healthy at {base_url} within {timeout:.0f}s")
+
+
+def compare_to_baseline(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Find operations that regressed against a baseline run
+
+    Args:
+        current: This run's operation summary
+        baseline: The baseline run's operation summary
+        tolerance: Allowed relative increase in p95 latency (0.1 = 10%)
+
+    Returns:
+        Human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for operation, stats in current.items():
+        base = baseline.get(operation)
+        if not base:
+            continue
+        if base["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{operation}: p95 {stats['p95_ms']}ms vs baseline {base['p95_ms']}ms "
+                f"(+{(stats['p95_ms'] / base['p95_ms'] - 1) * 100:.0f}%)"
+            )
+        if stats["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{operation}: error rate {stats['error_rate']:.2%} vs baseline {base['error_rate']:.2%}")
+    return regressions
+
+
+def print_report(operations: Dict, baseline: Optional[Dict]) -> None:
+    print(f"\n{'operation':<20}{'count':>7}{'err%':>8}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for operation, stats in sorted(operations.items()):
+        line = (f"{operation:<20}{stats['count']:>7}{stats['error_rate'] * 100:>7.1f}%"
+                f"{stats['throughput_per_s']:>9.2f}{stats['p50_ms']:>8.0f}ms{stats['p95_ms']:>8.0f}ms"
+                f"{stats['p99_ms']:>8.0f}ms")
+        base = (baseline or {}).get(operation)
+        if base and base["p95_ms"]:
+            line += f"   p95 {(stats['p95_ms'] / base['p95_ms'] - 1) * 100:+.0f}% vs baseline"
+        print(line)
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict:
+    stubs = stubs_from_args(args)
+    app_process = None
+    workdir = tempfile.mkdtemp(prefix="loadtest_")
+    base_url = args.base_url
+    try:
+        await stubs.start(port=args.stub_port)
+        print(f"🧪 Stubs on {stubs.base_url}")
+
+        if not base_url:
+            base_url = f"http://127.0.0.1:{args.app_port}"
+            app_log = open(os.path.join(workdir, "app.log"), "w")
+            print(f"📝 API output: {app_log.name}")
+            # Run from a scratch directory so plans, caches and queues start empty
+            app_process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port),
+                 "--log-level", "warning", "--app-dir", REPO_ROOT],
+                cwd=workdir,
+                env=app_environment(stubs.app_env(), workdir),
+                stdout=app_log,
+                stderr=subprocess.STDOUT
+            )
+        await wait_for_app(base_url)
+        print(f"🚀 Driving {base_url} with {args.users} users x {args.iterations} iterations")
+
+        recorder = Recorder()
+        companies = max(1, args.companies or args.users)
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            start = time.perf_counter()
+            users = []
+            for user_id in range(args.users):
+                company = f"Loadtest Company {user_id % companies}"
+                user = SimulatedUser(user_id, base_url, recorder, company, args.poll_interval, args.timeout)
+                users.append(asyncio.ensure_future(user.run(session, args.iterations)))
+                if args.ramp_seconds:
+                    await asyncio.sleep(args.ramp_seconds / args.users)
+            await asyncio.gather(*users)
+            wall = time.perf_counter() - start
+
+        return {
+            "started": datetime.now().isoformat(),
+            "wall_seconds": round(wall, 2),
+            "config": {
+                "users": args.users,
+                "iterations": args.iterations,
+                "companies": companies,
+                "stubs": {"search": stubs.search.to_dict(), "pages": stubs.pages.to_dict(), "llm": stubs.llm.to_dict()},
+                "python": platform.python_version(),
+                "platform": platform.platform()
+            },
+            "stub_requests": dict(stubs.requests),
+            "operations": recorder.summary(wall)
+        }
+    finally:
+        if app_process:
+            app_process.terminate()
+            try:
+                app_process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                app_process.kill()
+        await stubs.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the Company Research Agent API")
+    parser.add_argument("--users", type=int, default=5, help="Concurrent simulated users")
+    parser.add_argument("--iterations", type=int, default=1, help="Research/chat/edit cycles per user")
+    parser.add_argument("--companies", type=int, default=0,
+                        help="Distinct companies (fewer than users exercises shared research and caching)")
+    parser.add_argument("--ramp-seconds", type=float, default=0, help="Spread user start times over this period")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="Research job polling interval")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-operation timeout in seconds")
+    parser.add_argument("--stub-port", type=int, default=8900)
+    parser.add_argument("--app-port", type=int, default=8901)
+    parser.add_argument("--base-url", help="Use an already running API (configured for the stubs) instead of starting one")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/loadtest_<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed p95 increase over the baseline")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load_test(args))
+
+    baseline_ops = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline_ops = json.load(f)["operations"]
+        results["baseline"] = args.baseline
+        results["regressions"] = compare_to_baseline(results["operations"], baseline_ops, args.tolerance)
+
+    print_report(results["operations"], baseline_ops)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"loadtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if results.get("regressions"):
+        print("\n⚠️ Regressions against baseline:")
+        for regression in results["regressions"]:
+            print(f"  - {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
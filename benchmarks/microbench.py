@@ -0,0 +1,260 @@
+"""
+Microbenchmarks for Company Research Agent
+
+Times the pure-Python code that runs on every request with fixed inputs:
+HTML cleanup of the pages in benchmarks/corpus, company name extraction,
+intent detection, plan summaries, plan markdown formatting and JSON
+serialization of research data. Reports operations per second and the
+memory each operation allocates (tracemalloc), saves the run as JSON, and
+optionally compares it with a baseline run.
+
+Usage:
+    python -m benchmarks.microbench
+    python -m benchmarks.microbench --filter clean_html --baseline benchmarks/results/micro_baseline.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from src.web_context_extract import clean_html
+from src.company_research_agent import (
+    CompanyResearchAgent,
+    format_plan_markdown,
+    format_saved_plan
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(REPO_ROOT, "benchmarks", "corpus")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+# Chat inputs covering the regex patterns and the phrase-stripping fallback
+COMPANY_INPUTS = [
+    "Research Microsoft",
+    "please research eightfold ai company",
+    "Can you create an account plan for Tesla Inc",
+    "I need an account plan for Stripe",
+    "look up Snowflake corp",
+    "tell me about Nvidia",
+    "information about Goldman Sachs",
+    "anyway, find Databricks"
+]
+
+INTENT_INPUTS = [
+    "Research Microsoft",
+    "save the plan",
+    "edit the next steps to add a pilot",
+    "What are their main products?",
+    "🙂🙂",
+    "",
+    "bye",
+    "Who leads their engineering team and what changed this year?"
+]
+
+PLAN_SECTIONS = {
+    "executive_summary": (
+        "Example Corp is a mid-market software vendor growing 24% a year. Its platform serves "
+        "HR teams at 1,200 enterprises. Leadership is investing in AI features and new regions."
+    ),
+    "key_challenges": (
+        "- Rising customer acquisition costs in North America\n- Legacy integrations slow onboarding\n"
+        "- Competition from suites bundling similar features"
+    ),
+    "opportunities": (
+        "- Expansion into EMEA financial services. - Partnership with cloud marketplaces. "
+        "- Upsell analytics to the existing base."
+    ),
+    "proposed_solutions": (
+        "Offer a skills-intelligence pilot for two business units. Integrate with their HRIS in "
+        "under six weeks. Provide a joint business case for the CFO."
+    ),
+    "next_steps": "1. Discovery call with the CPO\n2. Technical deep dive\n3. Pilot proposal by end of quarter"
+}
+
+
+def _load_corpus() -> Dict[str, str]:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    return pages
+
+
+def build_benchmarks() -> Dict[str, Callable[[], object]]:
+    """Named zero-argument callables, each one benchmark operation"""
+    pages = _load_corpus()
+    benchmarks: Dict[str, Callable[[], object]] = {}
+
+    for name, html in pages.items():
+        benchmarks[f"clean_html[{name}]"] = lambda html=html: clean_html(html)
+
+    agent = CompanyResearchAgent(research_cache={}, plan_cache={})
+    agent.current_company = "Example Corp"
+    agent.account_plan = dict(PLAN_SECTIONS)
+
+    benchmarks[f"extract_company_name[x{len(COMPANY_INPUTS)}]"] = lambda: [
+        agent._extract_company_name(text) for text in COMPANY_INPUTS
+    ]
+    benchmarks[f"detect_intent[x{len(INTENT_INPUTS)}]"] = lambda: [
+        agent._detect_intent(text) for text in INTENT_INPUTS
+    ]
+    benchmarks["get_plan_summary"] = agent.get_plan_summary
+    benchmarks["format_plan_markdown"] = lambda: format_plan_markdown("Example Corp", PLAN_SECTIONS)
+    generated = datetime(2024, 5, 2, 12, 0, 0)
+    benchmarks["format_saved_plan"] = lambda: format_saved_plan("Example Corp", PLAN_SECTIONS, generated)
+
+    # A research cache entry as stored by the cache backend
+    research = {
+        "data": [
+            {"url": f"https://example.com/{name}", "summary": clean_html(html)[:500],
+             "full_text": clean_html(html), "error": False}
+            for name, html in pages.items()
+        ] * 5,
+        "summary": "\n".join(PLAN_SECTIONS.values()) * 3,
+        "timestamp": generated.isoformat(),
+        "plan": PLAN_SECTIONS,
+        "plan_filename": "account_plan_Example_Corp_20240502_120000.md"
+    }
+    encoded = json.dumps(research, default=str)
+    benchmarks["research_json_dumps"] = lambda: json.dumps(research, default=str)
+    benchmarks["research_json_loads"] = lambda: json.loads(encoded)
+    return benchmarks
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> Dict:
+    """
+    Time a callable and measure its allocations
+
+    Args:
+        func: Operation to benchmark
+        repeat: Timing rounds; the fastest round is reported
+        min_time: Minimum seconds per round (the loop count is calibrated to it)
+
+    Returns:
+        Dict with ops/s, per-op time and allocation figures
+    """
+    func()  # Warm up caches (regex compilation, imports)
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    # One traced call: peak bytes allocated while it ran, bytes still held
+    # afterwards (including its result), and the memory blocks behind them
+    tracemalloc.start()
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+        after_snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after_snapshot.filter_traces(ignore).compare_to(snapshot.filter_traces(ignore), "lineno")
+    allocations = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+
+    return {
+        "ops_per_s": round(1 / best, 1),
+        "us_per_op": round(best * 1e6, 2),
+        "loops": number,
+        "peak_bytes": peak - before,
+        "retained_bytes": current - before,
+        "allocated_blocks": allocations
+    }
+
+
+def compare_to_baseline(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Find benchmarks that got slower or allocate more than a baseline run
+
+    Args:
+        current: This run's results by benchmark name
+        baseline: The baseline run's results by benchmark name
+        tolerance: Allowed relative slowdown / allocation growth (0.1 = 10%)
+
+    Returns:
+        Human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if stats["ops_per_s"] < base["ops_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {stats['ops_per_s']:.0f} ops/s vs baseline {base['ops_per_s']:.0f} "
+                f"({(stats['ops_per_s'] / base['ops_per_s'] - 1) * 100:.0f}%)"
+            )
+        if base["peak_bytes"] and stats["peak_bytes"] > base["peak_bytes"] * (1 + tolerance):
+            regressions.append(f"{name}: peak {stats['peak_bytes']} bytes vs baseline {base['peak_bytes']}")
+    return regressions
+
+
+def print_report(results: Dict, baseline: Optional[Dict]) -> None:
+    print(f"\n{'benchmark':<36}{'ops/s':>12}{'us/op':>11}{'peak KB':>10}{'blocks':>9}")
+    for name, stats in results.items():
+        line = (f"{name:<36}{stats['ops_per_s']:>12,.0f}{stats['us_per_op']:>11.1f}"
+                f"{stats['peak_bytes'] / 1024:>10.1f}{stats['allocated_blocks']:>9}")
+        base = (baseline or {}).get(name)
+        if base:
+            line += f"   {(stats['ops_per_s'] / base['ops_per_s'] - 1) * 100:+.0f}% vs baseline"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the per-request CPU paths")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing rounds per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timing round")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/microbench_<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown over the baseline")
+    args = parser.parse_args()
+
+    benchmarks = build_benchmarks()
+    results = {}
+    for name, func in benchmarks.items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(func, args.repeat, args.min_time)
+
+    baseline = None
+    run = {
+        "started": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        run["baseline"] = args.baseline
+        run["regressions"] = compare_to_baseline(results, baseline, args.tolerance)
+
+    print_report(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"microbench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if run.get("regressions"):
+        print("\n⚠️ Regressions against baseline:")
+        for regression in run["regressions"]:
+            print(f"  - {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
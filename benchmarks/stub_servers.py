@@ -0,0 +1,257 @@
+"""
+Stub Servers for Company Research Agent benchmarks
+
+Local stand-ins for the external services a research run calls, so load
+tests run offline and repeatably:
+
+- /serper/search: Serper-compatible web search (stands in for DuckDuckGo and
+  Serper; the app is pointed at it with SEARCH_PROVIDERS=serper)
+- /pages/{id}: HTML pages returned as search results
+- /groq/chat/completions and /mistral/chat/completions: OpenAI-style chat
+  completions, with or without SSE streaming
+
+Each service has its own latency, jitter and error rate.
+
+Run standalone:
+    python -m benchmarks.stub_servers --port 8900 --llm-latency-ms 800
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from typing import Dict, Optional
+
+from aiohttp import web
+
+
+class StubConfig:
+    """Behavior of one stubbed service"""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0):
+        """
+        Args:
+            latency_ms: Base response delay
+            jitter_ms: Random extra delay, uniform in [0, jitter_ms]
+            error_rate: Fraction of requests answered with an error status
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+    async def delay(self) -> None:
+        seconds = (self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def should_fail(self) -> bool:
+        return random.random() < self.error_rate
+
+    def to_dict(self) -> Dict:
+        return {"latency_ms": self.latency_ms, "jitter_ms": self.jitter_ms, "error_rate": self.error_rate}
+
+
+class StubServers:
+    """aiohttp application serving every stand-in on one port"""
+
+    def __init__(self, search: Optional[StubConfig] = None, pages: Optional[StubConfig] = None,
+                 llm: Optional[StubConfig] = None, results_per_search: int = 5, page_bytes: int = 20000,
+                 completion_words: int = 120, stream_chunk_ms: float = 20, stream_chunk_words: int = 4):
+        """
+        Args:
+            search: Search endpoint behavior
+            pages: Page fetch behavior
+            llm: Chat completion behavior (latency is the time to the first token when streaming)
+            results_per_search: URLs returned per search
+            page_bytes: Approximate HTML size of each page
+            completion_words: Words in each completion
+            stream_chunk_ms: Delay between streamed chunks
+            stream_chunk_words: Words per streamed chunk
+        """
+        self.search = search or StubConfig(300, 200)
+        self.pages = pages or StubConfig(150, 250)
+        self.llm = llm or StubConfig(800, 400)
+        self.results_per_search = results_per_search
+        self.page_bytes = page_bytes
+        self.completion_words = completion_words
+        self.stream_chunk_ms = stream_chunk_ms
+        self.stream_chunk_words = stream_chunk_words
+        self.requests: Dict[str, int] = {"search": 0, "pages": 0, "llm": 0, "llm_stream": 0, "errors": 0}
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/serper/search", self.handle_search)
+        app.router.add_get("/pages/{page_id}", self.handle_page)
+        app.router.add_post("/{provider}/chat/completions", self.handle_completion)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8900) -> str:
+        """
+        Start serving in the running event loop
+
+        Returns:
+            Base URL of the stubs
+        """
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _error(self, status: int = 500) -> web.Response:
+        self.requests["errors"] += 1
+        return web.json_response({"error": "stubbed failure"}, status=status)
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        self.requests["search"] += 1
+        payload = await request.json()
+        await self.search.delay()
+        if self.search.should_fail():
+            return self._error(503)
+        count = min(int(payload.get("num", self.results_per_search)), self.results_per_search)
+        seed = abs(hash(payload.get("q", ""))) % 100000
+        return web.json_response({
+            "organic": [
+                {"title": f"Result {i}", "link": f"{self.base_url}/pages/{seed + i}"}
+                for i in range(count)
+            ]
+        })
+
+    async def handle_page(self, request: web.Request) -> web.Response:
+        self.requests["pages"] += 1
+        await self.pages.delay()
+        if self.pages.should_fail():
+            return self._error(502)
+        page_id = request.match_info["page_id"]
+        paragraph = (
+            f"<p>Company {page_id} builds products for enterprise customers. Revenue grew "
+            f"in the last quarter while leadership announced new partnerships.</p>\n"
+        )
+        body = paragraph * max(1, self.page_bytes // len(paragraph))
+        html = (
+            f"<html><head><title>Page {page_id}</title><script>var x = 1;</script>"
+            f"<style>p {{ margin: 0; }}</style></head><body>{body}</body></html>"
+        )
+        return web.Response(text=html, content_type="text/html")
+
+    def _completion_text(self) -> str:
+        words = ["Key", "point", "about", "the", "company", "and", "its", "market", "position."]
+        return " ".join(words[i % len(words)] for i in range(self.completion_words))
+
+    async def handle_completion(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        model = payload.get("model", "stub")
+        prompt_tokens = sum(len(m.get("content", "")) for m in payload.get("messages", [])) // 4
+        text = self._completion_text()
+
+        if payload.get("stream"):
+            self.requests["llm_stream"] += 1
+            await self.llm.delay()
+            if self.llm.should_fail():
+                return self._error(429)
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            words = text.split(" ")
+            for start in range(0, len(words), self.stream_chunk_words):
+                chunk = " ".join(words[start:start + self.stream_chunk_words]) + " "
+                event = {"model": model, "choices": [{"index": 0, "delta": {"content": chunk}}]}
+                await response.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                if self.stream_chunk_ms:
+                    await asyncio.sleep(self.stream_chunk_ms / 1000)
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+            return response
+
+        self.requests["llm"] += 1
+        await self.llm.delay()
+        if self.llm.should_fail():
+            return self._error(429 if random.random() < 0.5 else 500)
+        completion_tokens = len(text) // 4
+        return web.json_response({
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "requests": self.requests,
+            "search": self.search.to_dict(),
+            "pages": self.pages.to_dict(),
+            "llm": self.llm.to_dict()
+        })
+
+    def app_env(self) -> Dict[str, str]:
+        """Environment variables that point the app at these stubs"""
+        return {
+            "SEARCH_PROVIDERS": "serper",
+            "SERPER_API_BASE": f"{self.base_url}/serper",
+            "SERPER_API_KEY": "stub",
+            "GROQ_API_BASE": f"{self.base_url}/groq",
+            "GROQ_API_KEY": "stub",
+            "MISTRAL_API_BASE": f"{self.base_url}/mistral",
+            "MISTRAL_API_KEY": "stub",
+            "CRAWL4AI_ENABLED": "0"
+        }
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """Command line options shared by this module and the load test"""
+    parser.add_argument("--search-latency-ms", type=float, default=300)
+    parser.add_argument("--page-latency-ms", type=float, default=150)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=200, help="Random extra latency for every stub")
+    parser.add_argument("--search-error-rate", type=float, default=0.0)
+    parser.add_argument("--page-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-chunk-ms", type=float, default=20)
+    parser.add_argument("--page-bytes", type=int, default=20000)
+
+
+def stubs_from_args(args: argparse.Namespace) -> StubServers:
+    return StubServers(
+        search=StubConfig(args.search_latency_ms, args.jitter_ms, args.search_error_rate),
+        pages=StubConfig(args.page_latency_ms, args.jitter_ms, args.page_error_rate),
+        llm=StubConfig(args.llm_latency_ms, args.jitter_ms, args.llm_error_rate),
+        page_bytes=args.page_bytes,
+        stream_chunk_ms=args.stream_chunk_ms
+    )
+
+
+async def _serve(stubs: StubServers, port: int) -> None:
+    base_url = await stubs.start(port=port)
+    print(f"🧪 Stub servers listening on {base_url}")
+    print("Point the app at them with:")
+    for name, value in stubs.app_env().items():
+        print(f"  export {name}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stubs.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local stand-ins for search, pages and LLM providers")
+    parser.add_argument("--port", type=int, default=8900)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(stubs_from_args(args), args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,9 @@ import './App.css';
 
 const API_URL = 'http://localhost:8000';
 
+// The backend keeps one agent per session, identified by a cookie
+axios.defaults.withCredentials = true;
+
 function App() {
   const [messages, setMessages] = useState([]);
   const [inputMessage, setInputMessage] = useState('');
@@ -15,7 +18,9 @@ function App() {
   const [selectedPlan, setSelectedPlan] = useState(null);
   const [showPlanModal, setShowPlanModal] = useState(false);
   const [editingPlan, setEditingPlan] = useState(null);
+  const [progressEvents, setProgressEvents] = useState([]);
   const messagesEndRef = useRef(null);
+  const plansCursor = useRef(0);
 
   // Scroll to bottom of messages
   const scrollToBottom = () => {
@@ -26,28 +31,74 @@ function App() {
     scrollToBottom();
   }, [messages]);
 
-  // Fetch agent status periodically
+  // Subscribe to pushed progress events instead of polling /status
   useEffect(() => {
-    const fetchStatus = async () => {
-      try {
-        const response = await axios.get(`${API_URL}/status`);
-        setAgentStatus(response.data.state);
-        setCurrentCompany(response.data.current_company);
-      } catch (error) {
-        console.error('Error fetching status:', error);
-      }
+    const events = new EventSource(`${API_URL}/events`, { withCredentials: true });
+
+    events.addEventListener('snapshot', (e) => {
+      const data = JSON.parse(e.data);
+      setAgentStatus(data.state);
+      setCurrentCompany(data.current_company);
+    });
+
+    events.addEventListener('state_changed', (e) => {
+      const data = JSON.parse(e.data);
+      setAgentStatus(data.state);
+      if (data.company) setCurrentCompany(data.company);
+    });
+
+    const describe = {
+      research_started: (d) => `Started research on ${d.company}`,
+      search_started: (d) => `Searching: ${d.aspect}`,
+      search_finished: (d) => `Found ${d.url_count} sources for ${d.aspect} (${d.duration_ms} ms)`,
+      fetch_finished: (d) => `${d.success ? '✓' : '✗'} ${d.url} (${d.duration_ms} ms)`,
+      summarization_started: (d) => `Summarizing ${d.sources} sources...`,
+      summarization_finished: (d) => `Summary ready (${d.duration_ms} ms)`,
+      section_completed: (d) => `Section ready: ${d.section.replace(/_/g, ' ')}`,
+      plan_completed: (d) => `Plan saved: ${d.filename}`,
+      research_failed: (d) => `Research failed: ${d.error}`,
+    };
+
+    Object.keys(describe).forEach((type) => {
+      events.addEventListener(type, (e) => {
+        const data = JSON.parse(e.data);
+        if (type === 'research_started') {
+          setProgressEvents([]);
+        }
+        setProgressEvents(prev => [...prev.slice(-19), {
+          id: data.id,
+          text: describe[type](data),
+          section: type === 'section_completed' ? data : null,
+        }]);
+        if (type === 'plan_completed') {
+          fetchPlans();
+        }
+      });
+    });
+
+    events.onerror = (error) => {
+      // EventSource reconnects on its own and resumes from Last-Event-ID
+      console.error('Progress stream error:', error);
     };
 
-    fetchStatus();
-    const interval = setInterval(fetchStatus, 5000);
-    return () => clearInterval(interval);
+    return () => events.close();
   }, []);
 
-  // Fetch account plans
+  // Fetch account plans; after the first load only plans added since the last cursor
   const fetchPlans = async () => {
     try {
-      const response = await axios.get(`${API_URL}/plans`);
-      setAccountPlans(response.data.plans);
+      const since = plansCursor.current;
+      const response = await axios.get(`${API_URL}/plans`, {
+        params: since ? { since } : {}
+      });
+      const { plans, cursor } = response.data;
+      plansCursor.current = cursor;
+      if (since) {
+        const added = new Set(plans.map(plan => plan.filename));
+        setAccountPlans(prev => [...plans, ...prev.filter(plan => !added.has(plan.filename))]);
+      } else {
+        setAccountPlans(plans);
+      }
     } catch (error) {
       console.error('Error fetching plans:', error);
     }
@@ -190,6 +241,14 @@ function App() {
               <div className="message agent">
                 <div className="message-label">🤖 Agent</div>
                 <div className="message-content">
+                  {/* Show plan sections as soon as they are generated */}
+                  {progressEvents.filter(event => event.section).map((event) => (
+                    <div key={event.id} className="partial-section">
+                      <ReactMarkdown>
+                        {`**${event.section.section.replace(/_/g, ' ')}**\n\n${event.section.content}`}
+                      </ReactMarkdown>
+                    </div>
+                  ))}
                   <div className="typing-indicator">
                     <span></span>
                     <span></span>
@@ -242,6 +301,15 @@ function App() {
               <div className="research-info">
                 <p><strong>Company:</strong> {currentCompany}</p>
                 <p><strong>Status:</strong> {agentStatus.replace('_', ' ')}</p>
+                {progressEvents.length > 0 && (
+                  <ul className="progress-log">
+                    {progressEvents.map((event) => (
+                      <li key={event.id}>
+                        {event.text}
+                      </li>
+                    ))}
+                  </ul>
+                )}
                 {agentStatus === 'complete' && (
                   <button onClick={() => setInputMessage('Show me a summary of the plan')}>
                     View Summary
@@ -2,21 +2,59 @@
 FastAPI backend for Company Research Agent
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import time
+_import_start = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, FileResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 import asyncio
 import json
-import os
+from functools import partial
 from datetime import datetime
 
 # Import the agent and modules
-from src.company_research_agent import CompanyResearchAgent, ConversationMode
-from src.web_context_extract import extract
-from src.context_summarizer import summarize_context
-from src.article_writer import generate_chat_response_stream, generate_chat_response
+from src.company_research_agent import (
+    CompanyResearchAgent,
+    ConversationMode,
+    IDLE_STATUS,
+    research_age,
+    research_flights,
+    RESEARCH_HARD_TTL,
+    RESEARCH_SOFT_TTL
+)
+from src.web_context_extract import page_cache
+from src.article_writer import (
+    agenerate_chat_response,
+    generate_chat_response_astream,
+    close_stream_session
+)
+from src.llm_cache import get_cache_stats
+from src.progress import SessionProgress, progress_broker, public_event
+from src.llm_scheduler import llm_scheduler
+from src.llm_router import llm_router
+from src.intent_classifier import intent_log
+from src.company_index import company_index
+from src.session_manager import SessionManager, SESSION_COOKIE, SESSION_HEADER, session_limits_from_env
+from src.research_jobs import ResearchJobQueue, ResearchJob, JobProgress, JobQueueFull, JobStatus, job_limits_from_env
+from src.work_queue import WorkQueue
+from src.batch_research import BatchResearchRunner, batch_limits_from_env
+from src.prewarm import PrewarmScheduler, prewarm_settings_from_env
+from src.admission import AdmissionRejected, admission, research_limiter
+from src.disconnect import ClientDisconnected, cancel_on_disconnect
+from src.http_client import close_session
+from src.cache_backend import CacheMapping, create_backend, offload
+from src.plan_index import plan_index
+from src.plan_files import plan_files, negotiate_encoding, PlanNotFound
+from src.metrics import metrics, cache_requests, requests_cancelled
+from src.tracing import diagnostics, PROFILING_ENABLED
+from src.settings import settings
+from src.startup import StartupReport
+
+startup_report = StartupReport(_import_start)
 
 # Create FastAPI app
 app = FastAPI(
@@ -34,22 +72,247 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global agent instance (in production, use proper session management)
-agent = CompanyResearchAgent(ConversationMode.NORMAL)
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    """Requests over an endpoint's limits get 429 with a Retry-After estimate"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "limiter": exc.limiter, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected(request: Request, exc: ClientDisconnected):
+    """Nobody is listening; 499 (client closed request) only shows up in access logs"""
+    return Response(status_code=499)
+
+# Research and plan caches live in a backend shared by every worker process
+cache_store = create_backend()
+
+# One agent per client session; research and plan caches are shared
+sessions = SessionManager(
+    lambda session_id, research_cache, plan_cache: CompanyResearchAgent(
+        ConversationMode.NORMAL,
+        # Events are tagged with the session so /events streams them to its client only
+        progress=SessionProgress(session_id, progress_broker),
+        research_cache=research_cache,
+        plan_cache=plan_cache
+    ),
+    # Entries are dropped from the store once past the hard TTL
+    research_cache=CacheMapping(cache_store, "research", ttl=RESEARCH_HARD_TTL),
+    plan_cache=CacheMapping(cache_store, "plan", ttl=RESEARCH_HARD_TTL),
+    **session_limits_from_env()
+)
+
+def _request_session_id(request: Request) -> Optional[str]:
+    """Session id from the X-Session-ID header or the session cookie, if the server issued it"""
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    if session_id and len(session_id) <= 128 and sessions.is_valid_id(session_id):
+        return session_id
+    return None
+
+def get_session_id(request: Request, response: Response) -> str:
+    """Resolve the caller's session id, issuing a new one (and cookie) unless it sent a valid one"""
+    session_id = _request_session_id(request)
+    if not session_id:
+        session_id = sessions.new_session_id()
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+    response.headers[SESSION_HEADER] = session_id
+    return session_id
 
-# Cache for company research data
-research_cache = {}
+async def run_research_job(job: ResearchJob) -> Dict:
+    """Run a queued research job on its session's agent"""
+    async with sessions.use(job.session_id) as agent:
+        # Tag the agent's progress events with the job id while it runs
+        previous_progress = agent.progress
+        agent.progress = JobProgress(job, previous_progress)
+        try:
+            message = await agent._handle_company_research(job.company)
+        finally:
+            agent.progress = previous_progress
+        return {
+            "message": message,
+            "company": agent.current_company or job.company,
+            "state": agent.state.value
+        }
+
+async def has_fresh_research(company_name: str) -> bool:
+    """True if the shared caches hold research (within the soft TTL) and a plan for a company"""
+    cached = await offload(sessions.research_cache, "get", company_name)
+    if not cached or research_age(cached) > RESEARCH_SOFT_TTL:
+        return False
+    return bool(await offload(sessions.plan_cache, "get", company_name))
+
+async def run_queued_research_job(job: ResearchJob) -> Dict:
+    """Hand a research job to out-of-process workers and wait for its result"""
+    async with sessions.use(job.session_id) as agent:
+        company = company_index.resolve(agent._extract_company_name(job.company) or job.company)
+    if await has_fresh_research(company):
+        # Nothing for a worker to do; load the cached plan like the in-process backend
+        return await run_research_job(job)
+    
+    loop = asyncio.get_running_loop()
+    progress = JobProgress(job, SessionProgress(job.session_id, progress_broker))
+    await loop.run_in_executor(None, partial(work_queue.enqueue, {"company": job.company}, job_id=job.job_id))
+    stage = None
+    try:
+        while True:
+            row = await loop.run_in_executor(None, work_queue.get, job.job_id)
+            if row["stage"] != stage:
+                # Mirror the worker's stages into this job's timings and events
+                stage = row["stage"]
+                progress.publish("state_changed", company=job.company, state=stage)
+            if row["status"] == "completed":
+                break
+            if row["status"] in ("failed", "cancelled"):
+                raise RuntimeError(row["error"] or f"Research job {row['status']}")
+            await asyncio.sleep(WORK_QUEUE_POLL_SECONDS)
+    except asyncio.CancelledError:
+        await loop.run_in_executor(None, work_queue.cancel, job.job_id)
+        raise
+    
+    result = row["result"]
+    if result.get("cached"):
+        # Another worker researched the company while this job was queued
+        return await run_research_job(job)
+    async with sessions.use(job.session_id) as agent:
+        message = await agent.adopt_research(result["company"], result)
+        return {"message": message, "company": result["company"], "state": agent.state.value}
+
+# Research runs in this process ("local") or in research_worker.py processes ("queue")
+RESEARCH_BACKEND = settings.get("RESEARCH_BACKEND", "local")
+WORK_QUEUE_POLL_SECONDS = settings.get_float("WORK_QUEUE_POLL_SECONDS", 1.0)
+work_queue = WorkQueue() if RESEARCH_BACKEND == "queue" else None
+
+async def run_diagnosed_research_job(job: ResearchJob) -> Dict:
+    """Run a research job, adding a trace timeline and/or profile if the request asked for one"""
+    runner = run_queued_research_job if work_queue else run_research_job
+    with diagnostics("research", trace=job.options.get("trace", False),
+                     profile=job.options.get("profile", False)) as extra:
+        result = await runner(job)
+    return {**result, **extra}
+
+# Background research jobs; /research returns a job id immediately
+research_jobs = ResearchJobQueue(
+    run_diagnosed_research_job,
+    progress_broker,
+    **job_limits_from_env()
+)
+
+# Account-list research; one concurrency limit covers every batch
+batch_runner = BatchResearchRunner(
+    lambda progress: CompanyResearchAgent(
+        ConversationMode.NORMAL,
+        progress=progress,
+        research_cache=sessions.research_cache,
+        plan_cache=sessions.plan_cache
+    ),
+    progress_broker,
+    **batch_limits_from_env()
+)
+
+def interactive_busy() -> bool:
+    """True while research jobs or interactive LLM calls are waiting"""
+    if research_jobs.stats()["pending"]:
+        return True
+    return any(report["queue_depth"].get("interactive") for report in llm_scheduler.metrics().values())
+
+# Off-peak refresh of watched companies, so their first request hits a warm cache.
+# Enable it in one process per deployment; the caches are shared.
+PREWARM_ENABLED = settings.get_bool("PREWARM_ENABLED")
+prewarmer = PrewarmScheduler(
+    lambda: CompanyResearchAgent(
+        ConversationMode.NORMAL,
+        research_cache=sessions.research_cache,
+        plan_cache=sessions.plan_cache
+    ),
+    sessions.research_cache,
+    sessions.plan_cache,
+    is_busy=interactive_busy,
+    **prewarm_settings_from_env()
+)
+_prewarm_runs: List[asyncio.Task] = []  # Runs started through the API
+
+def collect_runtime_metrics() -> List[tuple]:
+    """Cache hit ratios, in-flight work and queue depths, read when /metrics is scraped"""
+    samples = []
+    
+    def cache(name: str, hits: float, misses: float) -> None:
+        lookups = hits + misses
+        samples.append(("cache_hits", "gauge", "Cache hits since start", {"cache": name}, hits))
+        samples.append(("cache_misses", "gauge", "Cache misses since start", {"cache": name}, misses))
+        samples.append(("cache_hit_ratio", "gauge", "Cache hits over lookups since start",
+                        {"cache": name}, hits / lookups if lookups else 0.0))
+    
+    llm_stats = get_cache_stats()
+    cache("llm_response", llm_stats["hits"], llm_stats["misses"])
+    cache("plan_file", plan_files.hits, plan_files.misses)
+    cache("page", page_cache.hits, page_cache.misses)
+    by_cache: Dict[str, Dict[str, float]] = {}
+    for labels, count in cache_requests.snapshot().items():
+        labels = dict(labels)
+        by_cache.setdefault(labels["cache"], {})[labels["result"]] = count
+    for name, results in by_cache.items():
+        # Stale entries are served, so they count as hits
+        cache(name, results.get("hit", 0) + results.get("stale", 0),
+              results.get("miss", 0) + results.get("expired", 0))
+    
+    samples.append(("research_in_flight", "gauge", "Research pipelines currently running",
+                    {}, len(research_flights.in_flight())))
+    pipelines = research_limiter.stats()
+    samples.append(("research_pipelines", "gauge", "Research pipelines by state under RESEARCH_MAX_CONCURRENT",
+                    {"state": "running"}, pipelines["running"]))
+    samples.append(("research_pipelines", "gauge", "Research pipelines by state under RESEARCH_MAX_CONCURRENT",
+                    {"state": "waiting"}, pipelines["waiting"]))
+    job_stats = research_jobs.stats()
+    for status, count in job_stats["jobs"].items():
+        samples.append(("research_jobs", "gauge", "Research jobs by status", {"status": status}, count))
+    batch_stats = batch_runner.stats()
+    samples.append(("research_batch_companies", "gauge", "Batch companies by state",
+                    {"state": "running"}, batch_stats["running"]))
+    samples.append(("research_batch_companies", "gauge", "Batch companies by state",
+                    {"state": "waiting"}, batch_stats["waiting"]))
+    session_stats = sessions.stats()
+    samples.append(("sessions_active", "gauge", "Live sessions", {}, session_stats["active_sessions"]))
+    samples.append(("sessions_busy", "gauge", "Sessions with a request in progress", {}, session_stats["busy_sessions"]))
+    for name, usage in admission.stats().items():
+        samples.append(("admission_active", "gauge", "Requests holding an admission slot",
+                        {"endpoint": name}, usage["active"]))
+        samples.append(("admission_waiting", "gauge", "Requests waiting for an admission slot",
+                        {"endpoint": name}, usage["waiting"]))
+        for reason, count in usage["rejected"].items():
+            samples.append(("admission_rejected", "gauge", "Requests rejected with 429 since start",
+                            {"endpoint": name, "reason": reason}, count))
+    for provider, report in llm_scheduler.metrics().items():
+        for priority, depth in report["queue_depth"].items():
+            samples.append(("llm_scheduler_queue_depth", "gauge", "LLM calls waiting for a scheduler slot",
+                            {"provider": provider, "priority": priority}, depth))
+    return samples
+
+metrics.register_collector(collect_runtime_metrics)
 
 # Request/Response models
 class ResearchRequest(BaseModel):
     company_name: str
+    cancel_on_disconnect: bool = False  # Cancel the job when its last /events watcher disconnects
+    trace: bool = False  # Include a span timeline in the job result
+    profile: bool = False  # Include a sampling profile (needs PROFILING_ENABLED)
+
+class BatchResearchRequest(BaseModel):
+    companies: List[str]
+
+class WatchlistRequest(BaseModel):
+    companies: List[str]
     
 class ChatRequest(BaseModel):
     message: str
+    trace: bool = False
+    profile: bool = False
     
 class GenerateRequest(BaseModel):
     context: str
     query: str
+    use_cache: bool = True
 
 class StatusResponse(BaseModel):
     status: str
@@ -65,95 +328,336 @@ async def root():
         "name": "Company Research Agent API",
         "version": "1.0.0",
         "endpoints": {
-            "POST /research": "Research a company",
+            "POST /research": "Queue company research (returns a job id)",
+            "GET /research/jobs/{job_id}": "Research job status",
+            "POST /research/batch": "Research a list of companies (streams NDJSON)",
+            "GET /watchlist": "Watched companies and pre-warming status",
             "POST /chat": "Chat with the agent",
             "GET /status": "Get agent status",
+            "GET /events": "Stream research progress (Server-Sent Events)",
             "POST /generate/stream": "Generate content with streaming",
+            "GET /metrics": "Prometheus metrics",
             "GET /health": "Health check"
         }
     }
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    """Health check endpoint, with current usage of every admission limit"""
+    endpoints = admission.stats()
+    research = research_jobs.stats()
+    research_usage = {
+        "running": research["jobs"]["running"],
+        "max_concurrent": research["workers"],
+        "queued": research["pending"],
+        "max_queued": research["max_pending"],
+        "saturated": research["pending"] >= research["max_pending"]
+    }
+    overloaded = research_usage["saturated"] or any(usage["saturated"] for usage in endpoints.values())
+    return {
+        "status": "overloaded" if overloaded else "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "admission": {
+            "research": research_usage,
+            "research_pipelines": research_limiter.stats(),
+            "research_batch_companies": batch_runner.stats(),
+            **endpoints
+        },
+        "startup": startup_report.to_dict()
+    }
 
-@app.post("/research")
-async def research_company(request: ResearchRequest, background_tasks: BackgroundTasks):
+@app.post("/research", status_code=202)
+async def research_company(request: ResearchRequest, session_id: str = Depends(get_session_id)):
     """
-    Research a company and generate account plan
+    Queue research and account plan generation for a company
+    
+    Returns a job id at once; poll /research/jobs/{job_id}, stream its
+    /events, or fetch /result when it completes.
     """
+    _check_profiling(request.profile)
     try:
-        # Start research in background
-        response = await agent._handle_company_research(request.company_name)
+        job = research_jobs.submit(request.company_name, session_id,
+                                   {"trace": request.trace, "profile": request.profile,
+                                    "cancel_on_disconnect": request.cancel_on_disconnect})
+    except JobQueueFull as e:
+        retry_after = research_jobs.retry_after()
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(retry_after)})
+    
+    return {
+        "success": True,
+        "job_id": job.job_id,
+        "company": request.company_name,
+        "status": job.status.value,
+        "queue_position": research_jobs.position(job),
+        "status_url": f"/research/jobs/{job.job_id}",
+        "events_url": f"/research/jobs/{job.job_id}/events",
+        "result_url": f"/research/jobs/{job.job_id}/result"
+    }
+
+def _check_profiling(requested: bool) -> None:
+    if requested and not PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled; set PROFILING_ENABLED=1 to allow it")
+
+def _get_job(job_id: str, request: Request) -> ResearchJob:
+    """A job submitted by the caller's session; other sessions' jobs are reported as not found"""
+    job = research_jobs.get(job_id)
+    if job is None or job.session_id != _request_session_id(request):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/research/jobs")
+async def list_research_jobs(session_id: str = Depends(get_session_id)):
+    """
+    List this session's research jobs (newest first) and worker pool status
+    """
+    queue_stats = None
+    if work_queue:
+        queue_stats = await asyncio.get_running_loop().run_in_executor(None, work_queue.stats)
+    return {
+        "jobs": research_jobs.jobs(session_id),
+        "pool": research_jobs.stats(),
+        "work_queue": queue_stats
+    }
+
+@app.get("/research/jobs/{job_id}")
+async def get_research_job(job_id: str, http_request: Request):
+    """
+    Get a research job's status, queue position and stage timings
+    """
+    return research_jobs.status(_get_job(job_id, http_request))
+
+@app.get("/research/jobs/{job_id}/result")
+async def get_research_job_result(job_id: str, http_request: Request):
+    """
+    Get the result of a finished research job
+    """
+    job = _get_job(job_id, http_request)
+    if job.status is JobStatus.COMPLETED:
+        return {"success": True, "job_id": job_id, **job.result}
+    if job.status is JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error or "Research failed")
+    if job.status is JobStatus.CANCELLED:
+        raise HTTPException(status_code=410, detail="Job was cancelled")
+    raise HTTPException(status_code=409, detail=f"Job is {job.status.value}")
+
+@app.delete("/research/jobs/{job_id}")
+async def cancel_research_job(job_id: str, http_request: Request):
+    """
+    Cancel a queued or running research job
+    """
+    job = _get_job(job_id, http_request)
+    cancelled = research_jobs.cancel(job_id)
+    return {"success": cancelled, "job_id": job_id, "status": job.status.value}
+
+@app.get("/research/jobs/{job_id}/events")
+async def stream_research_job(job_id: str, http_request: Request):
+    """
+    Stream a research job's progress as Server-Sent Events
+    
+    Starts with a job_status event, then forwards the job's progress events
+    and ends after job_completed, job_failed or job_cancelled. If the job was
+    submitted with cancel_on_disconnect, it is cancelled when its last
+    watcher disconnects before it finishes.
+    """
+    job = _get_job(job_id, http_request)
+    since = progress_broker.last_id()
+    
+    async def event_stream():
+        yield f"event: job_status\ndata: {json.dumps(research_jobs.status(job))}\n\n"
+        if job.done:
+            return
         
-        return {
-            "success": True,
-            "message": response,
-            "company": request.company_name,
-            "state": agent.state.value
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        events = progress_broker.subscribe(since=since, heartbeat=15, session_id=job.session_id)
+        job.watchers += 1
+        try:
+            async for event in events:
+                if await http_request.is_disconnected():
+                    break
+                if event is None:
+                    if job.done:
+                        yield f"event: job_status\ndata: {json.dumps(research_jobs.status(job))}\n\n"
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if event.get("job_id") != job_id:
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(public_event(event), default=str)}\n\n"
+                if event["type"] in ("job_completed", "job_failed", "job_cancelled"):
+                    break
+        finally:
+            job.watchers -= 1
+            if not job.done and not job.watchers and job.options.get("cancel_on_disconnect"):
+                research_jobs.cancel(job_id)
+                requests_cancelled.inc(endpoint="research")
+                print(f"🔌 Last watcher of research job {job_id} disconnected; job cancelled")
+            await events.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/research/batch")
+async def research_batch(request: BatchResearchRequest):
+    """
+    Research a list of companies, streaming progress and results as NDJSON
+    
+    Duplicate names are researched once and cached research is reused.
+    Companies run under the global BATCH_RESEARCH_CONCURRENCY limit; each
+    line is a JSON event: batch_started, then per company started, progress
+    and result (status completed or failed), then batch_finished.
+    Disconnecting cancels the companies that have not finished.
+    """
+    try:
+        companies, duplicates = batch_runner.plan(request.companies)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Released when the stream ends, or by the background task if it never starts
+    lease = await admission.limiters["research_batch"].lease()
+    
+    async def ndjson_stream():
+        events = batch_runner.run(companies, duplicates)
+        try:
+            async for event in events:
+                yield json.dumps(event, default=str) + "\n"
+        finally:
+            await events.aclose()
+            await lease.release()
+    
+    return StreamingResponse(
+        ndjson_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(lease.release)
+    )
 
 @app.post("/chat")
-async def chat_with_agent(request: ChatRequest):
+async def chat_with_agent(request: ChatRequest, http_request: Request, session_id: str = Depends(get_session_id)):
     """
     Chat with the agent with caching and summary support
+    
+    Set trace (or profile) in the request to get a span timeline (or a
+    folded-stack profile) of this message's handling in the response.
+    If the client disconnects, the message's research and LLM calls are
+    cancelled (research shared with other requests keeps running for them).
     """
+    _check_profiling(request.profile)
+    async with admission.limit("chat"):
+        return await cancel_on_disconnect(http_request, _chat(request, session_id), "chat")
+
+async def _chat(request: ChatRequest, session_id: str) -> Dict:
     try:
-        # Check if asking for a summary
-        if "summary" in request.message.lower() and agent.account_plan:
-            summary = agent.get_plan_summary()
-            response = await agent.process_input(request.message)
-            
-            return {
-                "success": True,
-                "response": response,
-                "plan_summary": summary,
-                "state": agent.state.value,
-                "current_company": agent.current_company
-            }
-        
-        # Regular processing
-        response = await agent.process_input(request.message)
-        
-        # Check if a plan was just created
-        plan_created = False
-        if agent.state.value == "complete" and agent.account_plan:
-            plan_created = True
-            # Also return a brief summary
-            summary = agent.get_plan_summary()
-        else:
-            summary = None
-        
-        return {
-            "success": True,
-            "response": response,
-            "plan_summary": summary,
-            "plan_created": plan_created,
-            "state": agent.state.value,
-            "current_company": agent.current_company,
-            "editing_plan": agent.account_plan if agent.state.value == "editing" else None
-        }
+        with diagnostics("chat", trace=request.trace, profile=request.profile) as extra:
+            async with sessions.use(session_id) as agent:
+                # Check if asking for a summary
+                if "summary" in request.message.lower() and agent.account_plan:
+                    summary = agent.get_plan_summary()
+                    response = await agent.process_input(request.message)
+                    
+                    result = {
+                        "success": True,
+                        "response": response,
+                        "plan_summary": summary,
+                        "state": agent.state.value,
+                        "current_company": agent.current_company
+                    }
+                else:
+                    # Regular processing
+                    response = await agent.process_input(request.message)
+                    
+                    # Check if a plan was just created
+                    plan_created = False
+                    if agent.state.value == "complete" and agent.account_plan:
+                        plan_created = True
+                        # Also return a brief summary
+                        summary = agent.get_plan_summary()
+                    else:
+                        summary = None
+                    
+                    result = {
+                        "success": True,
+                        "response": response,
+                        "plan_summary": summary,
+                        "plan_created": plan_created,
+                        "state": agent.state.value,
+                        "current_company": agent.current_company,
+                        "editing_plan": agent.account_plan if agent.state.value == "editing" else None
+                    }
+        return {**result, **extra}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/status")
-async def get_agent_status() -> StatusResponse:
+async def get_agent_status(http_request: Request) -> StatusResponse:
     """
     Get current agent status
     """
+    # Read-only: does not wait behind a request in progress, and polling never creates a session
+    session = sessions.peek(_request_session_id(http_request))
+    if session is None:
+        return StatusResponse(status=IDLE_STATUS, current_company=None, state="idle")
+    agent = session.agent
     return StatusResponse(
         status=agent._get_status_update(),
         current_company=agent.current_company,
         state=agent.state.value
     )
 
+@app.get("/events")
+async def stream_progress_events(http_request: Request, company: Optional[str] = None):
+    """
+    Stream research progress as Server-Sent Events
+    
+    Emits structured events (state_changed, search_started, search_finished,
+    fetch_finished, summarization_started/finished, section_completed,
+    plan_completed, research_failed). Only events of the caller's session
+    (its chats and research jobs) are streamed. Reconnecting clients send
+    Last-Event-ID and receive any buffered events they missed.
+    """
+    last_event_id = http_request.headers.get("last-event-id", "0")
+    since = int(last_event_id) if last_event_id.isdigit() else 0
+    session_id = _request_session_id(http_request)
+    session = sessions.peek(session_id)
+    
+    async def event_stream():
+        # Tell the client where things stand before the first live event
+        if session:
+            snapshot = {
+                "type": "snapshot",
+                "state": session.agent.state.value,
+                "current_company": session.agent.current_company,
+                "status": session.agent._get_status_update()
+            }
+        else:
+            snapshot = {"type": "snapshot", "state": "idle", "current_company": None, "status": None}
+        yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+        
+        # A client without a session has no events to see, only heartbeats
+        events = progress_broker.subscribe(company=company, since=since, heartbeat=15,
+                                           session_id=session_id or "")
+        try:
+            async for event in events:
+                if await http_request.is_disconnected():
+                    break
+                if event is None:
+                    # Heartbeat comment keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(public_event(event), default=str)}\n\n"
+        finally:
+            await events.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/edit-plan")
-async def edit_plan_section(request: dict):
+async def edit_plan_section(request: dict, http_request: Request, session_id: str = Depends(get_session_id)):
     """
-    Edit a specific section of the account plan
+    Edit a specific section of the account plan (cancelled if the client disconnects)
     """
     try:
         section = request.get("section")
@@ -163,13 +667,18 @@ async def edit_plan_section(request: dict):
             raise HTTPException(status_code=400, detail="Section and instructions required")
         
         # Process the edit request
-        response = await agent._handle_edit_request(f"edit {section} {instructions}")
-        
-        return {
-            "success": True,
-            "response": response,
-            "state": agent.state.value
-        }
+        async with admission.limit("edit_plan"), sessions.use(session_id) as agent:
+            response = await cancel_on_disconnect(
+                http_request, agent._handle_edit_request(f"edit {section} {instructions}"), "edit_plan"
+            )
+            
+            return {
+                "success": True,
+                "response": response,
+                "state": agent.state.value
+            }
+    except (HTTPException, AdmissionRejected, ClientDisconnected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -178,10 +687,16 @@ async def get_cache_status():
     """
     Get cache status and available cached companies
     """
-    cached_companies = list(agent.research_cache.keys())
+    cached_companies = await offload(sessions.research_cache, "keys")
     return {
         "cached_companies": cached_companies,
-        "cache_size": len(cached_companies)
+        "cache_size": len(cached_companies),
+        "in_flight_research": research_flights.in_flight(),
+        "company_index": company_index.stats(),
+        "backend": await asyncio.to_thread(cache_store.stats),
+        "plan_files": plan_files.stats(),
+        "page_cache": page_cache.stats(),
+        "llm_cache": get_cache_stats()
     }
 
 @app.post("/cache/clear")
@@ -189,19 +704,104 @@ async def clear_cache():
     """
     Clear the research cache
     """
-    agent.research_cache.clear()
+    # Clears the shared backend, so every worker process sees it
+    await offload(sessions.research_cache, "clear")
+    await offload(sessions.plan_cache, "clear")
+    company_index.clear_researched()
     return {"success": True, "message": "Cache cleared"}
 
+@app.get("/watchlist")
+async def get_watchlist():
+    """
+    Watched companies, the off-peak window and the outcome of each refresh
+    """
+    return await prewarmer.status()
+
+@app.put("/watchlist")
+async def update_watchlist(request: WatchlistRequest):
+    """
+    Replace the watchlist (companies from the WATCHLIST setting are always included)
+    """
+    loop = asyncio.get_running_loop()
+    companies = await loop.run_in_executor(None, prewarmer.save_watchlist, request.companies)
+    return {"success": True, "watchlist": companies}
+
+@app.post("/watchlist/warm", status_code=202)
+async def warm_watchlist(force: bool = False):
+    """
+    Pre-warm the watchlist now, outside the off-peak window
+    
+    Only companies whose cache is missing or aged are refreshed unless force is set.
+    """
+    task = await prewarmer.start_run(ignore_window=True, force=force)
+    if task is None:
+        raise HTTPException(status_code=409, detail="Pre-warming is already running")
+    _prewarm_runs.append(task)
+    task.add_done_callback(_prewarm_runs.remove)
+    watchlist = await asyncio.to_thread(prewarmer.watchlist)
+    return {"success": True, "watchlist": watchlist, "status_url": "/watchlist"}
+
+@app.get("/sessions/status")
+async def get_sessions_status():
+    """
+    Get active session count, estimated session memory and eviction counters
+    """
+    return sessions.stats()
+
+@app.delete("/session")
+async def end_session(request: Request, response: Response):
+    """
+    End the caller's session and discard its conversation and plan state
+    """
+    session_id = _request_session_id(request)
+    ended = sessions.remove(session_id) if session_id else False
+    response.delete_cookie(SESSION_COOKIE)
+    return {"success": True, "ended": ended}
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Stage latency histograms, LLM call/token counters, cache hit ratios and
+    in-flight gauges in the Prometheus text format
+    """
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/scheduler/status")
+async def get_scheduler_status():
+    """
+    Get LLM scheduler queue depths, admissions and wait times per provider
+    """
+    return {"providers": llm_scheduler.metrics()}
+
+@app.get("/llm/providers")
+async def get_llm_providers():
+    """
+    Get live latency, error rate and circuit breaker state per LLM provider and model
+    """
+    return {"routes": llm_router.status()}
+
+@app.get("/intent/stats")
+async def get_intent_stats():
+    """
+    Get local vs LLM intent routing counts, latency and recent decisions
+    """
+    return intent_log.stats()
+
 @app.post("/generate")
-async def generate_content(request: GenerateRequest):
+async def generate_content(request: GenerateRequest, http_request: Request):
     """
-    Generate content (non-streaming)
+    Generate content (non-streaming; cancelled if the client disconnects)
     """
+    async with admission.limit("generate"):
+        return await cancel_on_disconnect(http_request, _generate(request), "generate")
+
+async def _generate(request: GenerateRequest) -> Dict:
     try:
-        response = generate_chat_response(
+        response = await agenerate_chat_response(
             request.context,
             request.query,
-            silent_mode=True
+            silent_mode=True,
+            use_cache=request.use_cache
         )
         
         return {
@@ -211,58 +811,153 @@ async def generate_content(request: GenerateRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/generate/stream")
+async def generate_content_stream(request: GenerateRequest, http_request: Request):
+    """
+    Generate content with streaming (newline-delimited JSON)
+    
+    Each line is a JSON object: {"content": ...} per token chunk, then
+    {"done": true}, or {"error": ...} on failure.
+    """
+    # The slot is held until the stream ends, after this handler has returned;
+    # the background task releases it if the stream never starts
+    lease = await admission.limiters["generate_stream"].lease()
+    
+    async def ndjson_stream():
+        stream = generate_chat_response_astream(
+            request.context,
+            request.query,
+            use_cache=request.use_cache
+        )
+        try:
+            async for chunk in stream:
+                # Stop pulling from upstream once nobody is listening
+                if await http_request.is_disconnected():
+                    break
+                yield chunk + "\n"
+        finally:
+            # Closing the generator closes the upstream Mistral connection
+            await stream.aclose()
+            await lease.release()
+    
+    return StreamingResponse(
+        ndjson_stream(),
+        media_type="application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens flush immediately
+        },
+        background=BackgroundTask(lease.release)
+    )
+
+@app.on_event("startup")
+async def startup():
+    """Start the research worker pool and reconcile the plan index with the plans directory"""
+    research_jobs.start()
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(None, plan_index.rebuild)
+    print(f"📚 Plan index: {result['total']} plans ({result['indexed']} indexed, {result['removed']} removed)")
+    # Names researched before this process started (or by other workers) resolve to their cache entries
+    seeded = await loop.run_in_executor(None, lambda: company_index.seed(sessions.research_cache.keys()))
+    print(f"🏢 Company index: {seeded} researched companies loaded from the cache")
+    if PREWARM_ENABLED:
+        prewarmer.start()
+    startup_report.ready()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop research workers and release shared HTTP client resources"""
+    await research_jobs.stop()
+    await prewarmer.stop()
+    await close_stream_session()
+    await close_session()
+
+def _parse_date(value: Optional[str], name: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} date: {value}")
+
 @app.get("/plans")
-async def list_account_plans():
+async def list_account_plans(
+    company: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    latest: bool = False,
+    since: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
     """
-    List all generated account plans
+    List generated account plans, newest first
+    
+    Filters: company, start/end (ISO dates), latest (newest plan per company).
+    Pass the returned cursor as since= to fetch only plans added afterwards.
     """
+    start_date = _parse_date(start, "start")
+    end_date = _parse_date(end, "end")
+    if end_date and len(end) == 10:
+        # A bare end date includes that whole day
+        end_date = end_date.replace(hour=23, minute=59, second=59)
     try:
-        plans_dir = "./account_plans"
-        if not os.path.exists(plans_dir):
-            return {"plans": []}
-        
-        plans = []
-        for filename in os.listdir(plans_dir):
-            if filename.endswith(".md"):
-                # Extract company name from filename
-                parts = filename.replace(".md", "").split("_")
-                company = " ".join(parts[2:-2]) if len(parts) > 2 else "Unknown"
-                timestamp = "_".join(parts[-2:]) if len(parts) > 2 else ""
-                
-                plans.append({
-                    "filename": filename,
-                    "company": company,
-                    "timestamp": timestamp,
-                    "path": f"{plans_dir}/{filename}"
-                })
-        
-        return {"plans": plans}
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(
+            plan_index.query,
+            company=company_index.resolve(company) if company else None,
+            start=start_date,
+            end=end_date,
+            latest_per_company=latest,
+            since=since,
+            limit=limit,
+            offset=offset
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/plan/{filename}")
-async def get_account_plan(filename: str):
+async def get_account_plan(filename: str, request: Request, raw: bool = False):
     """
     Get a specific account plan
+    
+    Returns JSON ({success, filename, content}) by default, or the markdown
+    itself with raw=true. Responses carry a strong ETag and Last-Modified,
+    answer conditional requests with 304, and are gzip/brotli compressed
+    when the client accepts it.
     """
     try:
-        file_path = f"./account_plans/{filename}"
-        
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="Plan not found")
-        
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        
-        return {
-            "success": True,
-            "filename": filename,
-            "content": content
-        }
-    except FileNotFoundError:
+        loop = asyncio.get_running_loop()
+        plan = await loop.run_in_executor(None, plan_files.load, filename)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid plan name")
+    except PlanNotFound:
         raise HTTPException(status_code=404, detail="Plan not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    variant = "md" if raw else "json"
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding and not plan.compressible(variant):
+        encoding = None
+    etag = plan.etag(variant, encoding)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": plan.last_modified,
+        "Cache-Control": "no-cache",  # Always revalidate; unchanged plans cost a 304
+        "Vary": "Accept-Encoding"
+    }
+    
+    if plan.not_modified(etag, request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=headers)
+    
+    media_type = "text/markdown; charset=utf-8" if raw else "application/json"
+    if raw and not encoding:
+        # Stream the file straight from disk
+        return FileResponse(plan.path, media_type=media_type, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=plan.body(variant, encoding), media_type=media_type, headers=headers)
 
 # Run the app
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+"""
+Research worker for Company Research Agent
+
+Runs the research pipeline outside the API process. Workers take jobs from
+the durable work queue (src/work_queue.py), keep their lease alive with
+heartbeats while researching, and write results back for the API to pick
+up. Start as many as needed, on this machine or others sharing the queue:
+
+    python research_worker.py --concurrency 2
+
+The API hands research to workers when RESEARCH_BACKEND=queue.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import uuid
+from typing import Dict, Optional
+
+from src.company_research_agent import (
+    CompanyResearchAgent,
+    RESEARCH_HARD_TTL,
+    RESEARCH_SOFT_TTL,
+    research_age
+)
+from src.cache_backend import CacheMapping, create_backend, offload
+from src.company_index import company_index
+from src.http_client import close_session
+from src.settings import settings
+from src.work_queue import WorkQueue, WORK_QUEUE_PATH
+
+
+class QueueProgress:
+    """Progress publisher that records the agent's current stage for heartbeats"""
+
+    def __init__(self):
+        self.stage: Optional[str] = None
+
+    def publish(self, event_type: str, **fields) -> Dict:
+        if event_type == "state_changed":
+            self.stage = fields.get("state")
+        return {"type": event_type, **fields}
+
+
+async def research_company(agent: CompanyResearchAgent, company: str) -> Dict:
+    """
+    Research a company through the agent's cached, coalesced entry point
+    
+    Jobs for the same company in this process share one pipeline run, and a
+    company researched (by any worker or API process) while the job waited
+    in the queue is not researched again.
+    
+    Returns:
+        Pipeline result, or {"cached": True} when the shared caches already
+        hold fresh research and a plan
+    """
+    cached = await offload(agent.research_cache, "get", company)
+    if cached and research_age(cached) <= RESEARCH_SOFT_TTL and await offload(agent.plan_cache, "get", company):
+        return {"cached": True}
+    result = await agent._research_flight(company)
+    await agent._cache_research(company, result)
+    return result
+
+
+async def run_job(queue: WorkQueue, job: Dict, worker_id: str, lease_seconds: float,
+                  research_cache=None, plan_cache=None) -> None:
+    """Research one leased job, heartbeating until it finishes or the lease is lost"""
+    loop = asyncio.get_running_loop()
+    request = job["payload"]["company"]
+    progress = QueueProgress()
+    agent = CompanyResearchAgent(progress=progress, research_cache=research_cache, plan_cache=plan_cache)
+    company = company_index.resolve(agent._extract_company_name(request) or request)
+    agent.current_company = company
+    print(f"🔧 [{worker_id}] Job {job['job_id']}: researching {company} (attempt {job['attempts']})")
+
+    research = asyncio.ensure_future(research_company(agent, company))
+    try:
+        while True:
+            done, _ = await asyncio.wait({research}, timeout=lease_seconds / 3)
+            if done:
+                break
+            still_owner = await loop.run_in_executor(
+                None, queue.heartbeat, job["job_id"], worker_id, lease_seconds, progress.stage
+            )
+            if not still_owner:
+                # Cancelled, or the lease expired and another worker took over
+                print(f"⚠️ [{worker_id}] Lost lease on job {job['job_id']}; stopping")
+                research.cancel()
+                return
+        result = research.result()
+    except asyncio.CancelledError:
+        research.cancel()
+        raise
+    except Exception as e:
+        status = await loop.run_in_executor(None, queue.fail, job["job_id"], worker_id, str(e))
+        print(f"❌ [{worker_id}] Job {job['job_id']} failed: {e} (now {status})")
+        return
+
+    await loop.run_in_executor(None, queue.complete, job["job_id"], worker_id, {"company": company, **result})
+    print(f"✅ [{worker_id}] Job {job['job_id']} completed: {result.get('plan_filename', 'cached research')}")
+
+
+async def worker_loop(queue: WorkQueue, worker_id: str, lease_seconds: float, poll_interval: float,
+                      research_cache=None, plan_cache=None) -> None:
+    """Lease and run jobs until cancelled"""
+    loop = asyncio.get_running_loop()
+    while True:
+        job = await loop.run_in_executor(None, queue.lease, worker_id, lease_seconds)
+        if job is None:
+            await asyncio.sleep(poll_interval)
+            continue
+        await run_job(queue, job, worker_id, lease_seconds, research_cache, plan_cache)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Company research worker")
+    parser.add_argument("--queue", default=WORK_QUEUE_PATH, help="Path to the work queue database")
+    parser.add_argument("--concurrency", type=int, default=settings.get_int("RESEARCH_WORKER_CONCURRENCY", 2),
+                        help="Jobs researched at once by this process")
+    parser.add_argument("--lease-seconds", type=float, default=60.0, help="Lease length; renewed every third")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between polls when idle")
+    args = parser.parse_args()
+
+    queue = WorkQueue(args.queue)
+    # Read and write the same research and plan caches as the API
+    cache_store = create_backend()
+    research_cache = CacheMapping(cache_store, "research", ttl=RESEARCH_HARD_TTL)
+    plan_cache = CacheMapping(cache_store, "plan", ttl=RESEARCH_HARD_TTL)
+    # Resolve names to the same canonical companies as the API's shared research cache
+    company_index.seed(research_cache.keys())
+    prefix = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    print(f"🚀 Research worker {prefix} polling {args.queue} with concurrency {args.concurrency}")
+    try:
+        await asyncio.gather(*(
+            worker_loop(queue, f"{prefix}-{n}", args.lease_seconds, args.poll_interval,
+                        research_cache, plan_cache)
+            for n in range(args.concurrency)
+        ))
+    finally:
+        await close_session()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Worker stopped; leased jobs will be retried by other workers")
@@ -0,0 +1,263 @@
+"""
+Admission Control Module for Company Research Agent
+
+Bounds how much work each endpoint can have in progress so that a burst of
+requests is turned away early instead of slowing every request down. Each
+limiter admits up to max_concurrent requests, lets up to max_queued more
+wait (for at most max_wait seconds) and rejects the rest with an estimate
+of when to retry. Because each admitted request makes its LLM calls one
+after another, a limiter on an LLM-backed endpoint also caps that
+endpoint's concurrent LLM calls.
+
+Research pipelines are limited separately and process-wide, whichever
+path started them (chat, research jobs, batches, background refresh or
+pre-warming); they wait for a slot instead of being rejected.
+"""
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from src.settings import settings
+
+# Bounds of the Retry-After estimate, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 300
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is over its endpoint's limits"""
+
+    def __init__(self, limiter: str, retry_after: int, reason: str):
+        super().__init__(f"Too many {limiter} requests ({reason}); retry in {retry_after}s")
+        self.limiter = limiter
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+def retry_after_seconds(hold_seconds: float, ahead: int, slots: int) -> int:
+    """
+    Estimate when a rejected request could be admitted
+
+    Args:
+        hold_seconds: Typical time a request holds its slot
+        ahead: Requests waiting in front of it
+        slots: Requests served concurrently
+
+    Returns:
+        Seconds, rounded up and clamped to [MIN_RETRY_AFTER, MAX_RETRY_AFTER]
+    """
+    estimate = hold_seconds * (ahead + 1) / max(slots, 1)
+    return int(min(max(math.ceil(estimate), MIN_RETRY_AFTER), MAX_RETRY_AFTER))
+
+
+class AdmissionLimiter:
+    """Concurrency limit with a bounded, time-limited wait queue"""
+
+    def __init__(self, name: str, max_concurrent: int, max_queued: int = 0, max_wait: float = 10.0,
+                 default_hold: float = 5.0):
+        """
+        Args:
+            name: Limiter name, reported in rejections and stats
+            max_concurrent: Requests admitted at once
+            max_queued: Requests allowed to wait for a slot
+            max_wait: Seconds a request may wait before it is rejected
+            default_hold: Assumed slot hold time until one has been measured
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+        self.hold_seconds = default_hold  # Moving average of how long requests keep a slot
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _condition(self) -> asyncio.Condition:
+        # Created on first use so it belongs to the serving event loop
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def retry_after(self) -> int:
+        return retry_after_seconds(self.hold_seconds, self.waiting, self.max_concurrent)
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        return AdmissionRejected(self.name, self.retry_after(), reason)
+
+    async def acquire(self) -> None:
+        """
+        Take a slot, waiting in the queue if needed; pair with release()
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait exceeds max_wait
+        """
+        cond = self._condition()
+        async with cond:
+            if self.active >= self.max_concurrent or self.waiting:
+                if self.waiting >= self.max_queued:
+                    raise self._reject("queue_full")
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(cond.wait_for(lambda: self.active < self.max_concurrent), self.max_wait)
+                except asyncio.TimeoutError:
+                    raise self._reject("timeout")
+                finally:
+                    self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+
+    async def release(self, held: float) -> None:
+        """Return a slot after holding it for held seconds"""
+        cond = self._condition()
+        async with cond:
+            self.active -= 1
+            self.hold_seconds = 0.8 * self.hold_seconds + 0.2 * held
+            # Wake every waiter: a single notify can land on one whose wait just timed out
+            cond.notify_all()
+
+    async def lease(self) -> "AdmissionLease":
+        """
+        Take a slot that outlives the handler, e.g. for a streamed response
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait exceeds max_wait
+        """
+        await self.acquire()
+        return AdmissionLease(self)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold a slot for the enclosed block
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait exceeds max_wait
+        """
+        await self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            await self.release(time.monotonic() - start)
+
+    def stats(self) -> Dict:
+        return {
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+            "waiting": self.waiting,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "avg_hold_ms": round(self.hold_seconds * 1000),
+            "saturated": self.active >= self.max_concurrent and self.waiting >= self.max_queued
+        }
+
+
+class AdmissionLease:
+    """A held slot; release() is idempotent so every exit path of a stream can call it"""
+
+    def __init__(self, limiter: AdmissionLimiter):
+        self.limiter = limiter
+        self.start = time.monotonic()
+        self.released = False
+
+    async def release(self) -> None:
+        if not self.released:
+            self.released = True
+            await self.limiter.release(time.monotonic() - self.start)
+
+
+class ConcurrencyLimiter:
+    """Process-wide cap on concurrent work; callers over it wait for a slot"""
+
+    def __init__(self, name: str, max_concurrent: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.running = 0
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _limiter(self) -> asyncio.Semaphore:
+        # Created on first use so it belongs to the serving event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot for the enclosed block, waiting as long as it takes"""
+        semaphore = self._limiter()
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "max_concurrent": self.max_concurrent,
+            "waiting": self.waiting,
+            "saturated": self.running >= self.max_concurrent and self.waiting > 0
+        }
+
+
+class AdmissionController:
+    """Named limiters, one per endpoint"""
+
+    def __init__(self, limits: Dict[str, Dict]):
+        """
+        Args:
+            limits: limiter name -> AdmissionLimiter keyword arguments
+        """
+        self.limiters = {name: AdmissionLimiter(name, **options) for name, options in limits.items()}
+
+    def limit(self, name: str):
+        """Async context manager holding a slot of the named limiter"""
+        return self.limiters[name].slot()
+
+    def stats(self) -> Dict:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+
+# Endpoint -> (default concurrency, default queue); LLM-heavy endpoints get fewer slots
+DEFAULT_LIMITS = {
+    "chat": (8, 32),
+    "edit_plan": (4, 16),
+    "generate": (8, 32),
+    "generate_stream": (8, 0),
+    "research_batch": (2, 0)
+}
+
+
+def admission_limits_from_env() -> Dict[str, Dict]:
+    """Limiter options from ADMISSION_<ENDPOINT>_CONCURRENCY / _QUEUE and ADMISSION_MAX_WAIT_SECONDS"""
+    max_wait = settings.get_float("ADMISSION_MAX_WAIT_SECONDS", 10)
+    limits = {}
+    for name, (concurrency, queued) in DEFAULT_LIMITS.items():
+        prefix = f"ADMISSION_{name.upper()}"
+        limits[name] = {
+            "max_concurrent": settings.get_int(f"{prefix}_CONCURRENCY", concurrency),
+            "max_queued": settings.get_int(f"{prefix}_QUEUE", queued),
+            "max_wait": max_wait
+        }
+    return limits
+
+
+# Shared admission controller for the API
+admission = AdmissionController(admission_limits_from_env())
+
+# Research pipelines running at once in this process, however they were started
+research_limiter = ConcurrencyLimiter("research_pipelines", settings.get_int("RESEARCH_MAX_CONCURRENT", 4))
@@ -2,187 +2,300 @@
 Simplified Article Writer Module for Company Research Agent
 """
 
+import asyncio
 import os
 import requests
 import json
+import time
 from datetime import datetime
-from typing import Generator
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, AsyncGenerator
 
-load_dotenv('config/.env')
+from src.llm_cache import response_cache
+from src.llm_router import LOCAL_PROVIDER, RouterError, llm_router
+from src.llm_scheduler import Priority, estimate_tokens, llm_scheduler
+from src.tracing import traced
 
-def generate_chat_response(context, query, silent_mode=True):
+if TYPE_CHECKING:
+    import aiohttp
+
+GENERATE_TASK = "generate"  # Router task name
+GENERATE_PARAMS = {}  # Extra payload fields for generation calls; part of every cache key
+SYSTEM_PROMPT = "You are an AI that writes professionally about the context provided, WITHOUT hallucination. Write in markdown format."
+
+def _build_prompt(context, query):
+    """Build the dated user prompt sent to the model"""
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    return f"""Current Date: {current_date}
+Context: {context}
+Query: {query}"""
+
+
+def _cache_key(route_name, prompt_message):
+    """Cache key of a completion served by one provider/model with GENERATE_PARAMS"""
+    return response_cache.make_key(route_name, SYSTEM_PROMPT, prompt_message, GENERATE_PARAMS)
+
+
+def _lookup_cache(prompt_message, use_cache, silent_mode):
+    """
+    Look up a prompt in the response cache
+    
+    Identical prompts on the same day produce the same answer, so they are
+    served from cache. Keys name the provider and model that answered, so a
+    completion is only reused while that model is still configured for
+    generation; an answer from any configured model is accepted.
+    
+    Returns:
+        str: The cached response, or None
+    """
+    if not use_cache:
+        response_cache.record_skip()
+        return None
+    keys = [
+        _cache_key(f"{provider.name}/{provider.models[GENERATE_TASK]}", prompt_message)
+        for provider in llm_router.providers.values()
+        if provider.name != LOCAL_PROVIDER and GENERATE_TASK in provider.models and provider.is_configured()
+    ]
+    cached = response_cache.get_any(keys) if keys else None
+    if cached is not None and not silent_mode:
+        print("Content served from response cache")
+    return cached
+
+
+def _finish_completion(content, route, prompt_message, silent_mode):
+    """Cache a completion and return its text"""
+    if not silent_mode:
+        print(f"Content generation completed successfully ({route.name})")
+    
+    # Offline stand-in answers are never cached; errors never reach here
+    if route.provider.name != LOCAL_PROVIDER:
+        response_cache.set(_cache_key(route.name, prompt_message), content)
+    return content
+
+
+def _error_message(e, silent_mode):
+    if isinstance(e, (RouterError, requests.exceptions.RequestException)):
+        error_msg = f"Error generating response: {str(e)}"
+    else:
+        error_msg = f"Unexpected error: {str(e)}"
+    if not silent_mode:
+        print(error_msg)
+    return error_msg
+
+
+@traced()
+def generate_chat_response(context, query, silent_mode=True, use_cache=True,
+                           priority=Priority.INTERACTIVE, flow=None):
     """
-    Generate content using the Mistral API (non-streaming version for backward compatibility)
+    Generate content using the fastest healthy LLM provider (Mistral by default)
+    
+    Blocks the calling thread while waiting for a scheduler slot; async callers
+    should use agenerate_chat_response instead.
     
     Args:
         context (str): The context to use for generating the response
         query (str): The user query
         silent_mode (bool): If True, suppress output (default for agent use)
+        use_cache (bool): If False, always call the API (e.g. for regeneration)
+        priority (Priority): Scheduler priority class for this call
+        flow (str): Fairness key for the scheduler (e.g. the company name)
         
     Returns:
         str: The generated response
     """
-    # Get the model and API key from environment
-    api_key = os.getenv("MISTRAL_API_KEY")
+    prompt_message = _build_prompt(context, query)
+    cached = _lookup_cache(prompt_message, use_cache, silent_mode)
+    if cached is not None:
+        return cached
+
+    try:
+        content, route = llm_router.complete(GENERATE_TASK, SYSTEM_PROMPT, prompt_message, dict(GENERATE_PARAMS),
+                                             priority=priority, flow=flow)
+        return _finish_completion(content, route, prompt_message, silent_mode)
+    except Exception as e:
+        return _error_message(e, silent_mode)
+
+
+@traced("generate_chat_response")
+async def agenerate_chat_response(context, query, silent_mode=True, use_cache=True,
+                                  priority=Priority.INTERACTIVE, flow=None):
+    """
+    Async version of generate_chat_response
     
-    if not api_key:
-        return "Error: Mistral API key not found. Please check your .env file."
+    Waits for a scheduler slot without holding a thread, then runs the
+    HTTP request in the default executor so the event loop stays responsive.
     
-    # Prepare the prompt message
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    prompt_message = f"""Current Date: {current_date}
-Context: {context}
-Query: {query}"""
+    Args:
+        context (str): The context to use for generating the response
+        query (str): The user query
+        silent_mode (bool): If True, suppress output
+        use_cache (bool): If False, always call the API
+        priority (Priority): Scheduler priority class for this call
+        flow (str): Fairness key for the scheduler (e.g. the company name)
+        
+    Returns:
+        str: The generated response
+    """
+    prompt_message = _build_prompt(context, query)
+    cached = _lookup_cache(prompt_message, use_cache, silent_mode)
+    if cached is not None:
+        return cached
 
     try:
-        # Prepare the API request
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        
-        payload = {
-            "model": "mistral-small-latest",
-            "messages": [
-                {
-                    "role": "system", 
-                    "content": "You are an AI that writes professionally about the context provided, WITHOUT hallucination. Write in markdown format."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt_message
-                }
-            ]
-        }
-        
-        # Make the API request
-        response = requests.post(
-            "https://api.mistral.ai/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=30
+        content, route = await llm_router.acomplete(GENERATE_TASK, SYSTEM_PROMPT, prompt_message,
+                                                    dict(GENERATE_PARAMS), priority=priority, flow=flow)
+        return _finish_completion(content, route, prompt_message, silent_mode)
+    except Exception as e:
+        return _error_message(e, silent_mode)
+
+
+# Shared aiohttp session for streaming calls; reusing its connection pool
+# avoids a TCP/TLS handshake before the first token of every request.
+# aiohttp itself is imported on the first stream to keep startup fast.
+_stream_session = None
+
+
+def _get_stream_session() -> "aiohttp.ClientSession":
+    """Return the shared streaming session, creating it on first use"""
+    import aiohttp
+
+    global _stream_session
+    if _stream_session is None or _stream_session.closed:
+        _stream_session = aiohttp.ClientSession(
+            # No total timeout: long generations are fine as long as tokens keep arriving
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=30)
         )
-        
-        # Check for errors
-        response.raise_for_status()
-        
-        # Parse the response
-        response_data = response.json()
-        
-        if not silent_mode:
-            print("Content generation completed successfully")
-            
-        return response_data['choices'][0]['message']['content']
+    return _stream_session
 
-    except requests.exceptions.RequestException as e:
-        error_msg = f"Error generating response: {str(e)}"
-        if not silent_mode:
-            print(error_msg)
-        return error_msg
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        if not silent_mode:
-            print(error_msg)
-        return error_msg
 
+async def close_stream_session() -> None:
+    """Close the shared streaming session (call on application shutdown)"""
+    global _stream_session
+    if _stream_session is not None and not _stream_session.closed:
+        await _stream_session.close()
+    _stream_session = None
 
-def generate_chat_response_stream(context: str, query: str) -> Generator[str, None, None]:
+
+async def generate_chat_response_astream(context: str, query: str, use_cache: bool = True) -> AsyncGenerator[str, None]:
     """
-    Generate content using the Mistral API with streaming for frontend display
+    Generate content with true async streaming from the fastest healthy provider
+    
+    Tokens are yielded as soon as they arrive from the upstream SSE stream.
+    Consumers pull chunks at their own pace, so a slow client slows the
+    upstream read rather than buffering the whole response. Closing the
+    generator (e.g. when the HTTP client disconnects) closes the upstream
+    connection and stops generation. If a provider fails before its first
+    token, the next healthy provider is tried.
     
     Args:
         context (str): The context to use for generating the response
         query (str): The user query
+        use_cache (bool): If True, replay a cached completion instantly
         
     Yields:
-        str: Chunks of the generated response for streaming
+        str: JSON-encoded chunks ({"content": ...}, {"error": ...} or {"done": true})
     """
-    # Get the model and API key from environment
-    api_key = os.getenv("MISTRAL_API_KEY")
-    
-    if not api_key:
-        yield json.dumps({"error": "Mistral API key not found. Please check your .env file."})
+    prompt_message = _build_prompt(context, query)
+    cached = _lookup_cache(prompt_message, use_cache, silent_mode=True)
+    if cached is not None:
+        yield json.dumps({"content": cached, "cached": True})
+        yield json.dumps({"done": True})
         return
     
-    # Prepare the prompt message
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    prompt_message = f"""Current Date: {current_date}
-Context: {context}
-Query: {query}"""
+    import aiohttp
 
-    try:
-        # Prepare the API request for streaming
+    routes = llm_router.route(GENERATE_TASK, streaming=True)
+    if not routes:
+        yield json.dumps({"error": "No LLM provider configured. Please check your .env file."})
+        return
+    
+    errors = []
+    for route in routes:
+        if not llm_router.admit(route):
+            continue
+        
         headers = {
             "Content-Type": "application/json",
             "Accept": "text/event-stream",
-            "Authorization": f"Bearer {api_key}"
+            "Authorization": f"Bearer {route.provider.api_key}"
         }
         
         payload = {
-            "model": "mistral-small-latest",
+            "model": route.model,
             "messages": [
-                {
-                    "role": "system", 
-                    "content": "You are an AI that writes professionally about the context provided, WITHOUT hallucination. Write in markdown format."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt_message
-                }
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt_message}
             ],
-            "stream": True  # Enable streaming
+            **GENERATE_PARAMS,
+            "stream": True
         }
         
-        # Make the streaming API request
-        response = requests.post(
-            "https://api.mistral.ai/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            stream=True,
-            timeout=30
-        )
-        
-        # Check for errors
-        response.raise_for_status()
-        
-        # Process the streaming response
-        for line in response.iter_lines():
-            if line:
-                # Decode the line
-                line_text = line.decode('utf-8')
+        parts = []
+        finished = False  # Upstream signalled the end of the completion
+        start = time.perf_counter()
+        try:
+            await llm_scheduler.acquire_async(route.provider.name, Priority.INTERACTIVE,
+                                              estimate_tokens(SYSTEM_PROMPT, prompt_message))
+            start = time.perf_counter()
+            session = _get_stream_session()
+            async with session.post(f"{route.provider.base_url}/chat/completions",
+                                    headers=headers, json=payload) as response:
+                if response.status != 200:
+                    body = await response.text()
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, (), status=response.status, message=body[:200]
+                    )
                 
-                # Skip empty lines and comments
-                if line_text.startswith('data: '):
-                    # Extract JSON data
-                    data_str = line_text[6:]  # Remove 'data: ' prefix
+                # Read the SSE stream line by line as it arrives
+                async for raw_line in response.content:
+                    line_text = raw_line.decode('utf-8').strip()
+                    if not line_text.startswith('data: '):
+                        continue
                     
-                    # Check for end of stream
+                    data_str = line_text[6:]
                     if data_str == '[DONE]':
+                        finished = True
                         break
                     
                     try:
-                        # Parse JSON and extract content
                         data = json.loads(data_str)
-                        
-                        # Extract the delta content
-                        if 'choices' in data and len(data['choices']) > 0:
-                            delta = data['choices'][0].get('delta', {})
-                            content = delta.get('content', '')
-                            
-                            if content:
-                                # Yield the content chunk for streaming
-                                yield json.dumps({"content": content})
-                                
                     except json.JSONDecodeError:
-                        # Skip malformed JSON
                         continue
-                        
-    except requests.exceptions.RequestException as e:
-        yield json.dumps({"error": f"Error generating response: {str(e)}"})
-    except Exception as e:
-        yield json.dumps({"error": f"Unexpected error: {str(e)}"})
+                    
+                    if 'choices' in data and len(data['choices']) > 0:
+                        if data['choices'][0].get('finish_reason'):
+                            finished = True
+                        content = data['choices'][0].get('delta', {}).get('content', '')
+                        if content:
+                            if not parts:
+                                # Time to first token is the latency that matters for streams
+                                llm_router.record(route, True, time.perf_counter() - start)
+                            parts.append(content)
+                            yield json.dumps({"content": content})
+        
+        except asyncio.CancelledError:
+            if not parts:
+                # Cancelled before the first token: free the route without counting a failure
+                llm_router.abandon(route)
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if parts:
+                # Tokens already reached the client; a retry elsewhere would duplicate them
+                yield json.dumps({"error": f"Error generating response: {str(e) or 'upstream timed out'}"})
+                return
+            llm_router.record(route, False, time.perf_counter() - start)
+            errors.append(f"{route.name}: {str(e) or 'upstream timed out'}")
+            continue
+        
+        if not parts:
+            llm_router.record(route, True, time.perf_counter() - start)
+        # Only a complete, non-empty completion is worth caching; a stream cut
+        # off without an end marker would replay as a truncated answer
+        if finished and parts:
+            response_cache.set(_cache_key(route.name, prompt_message), ''.join(parts))
+        yield json.dumps({"done": True})
+        return
+    
+    yield json.dumps({"error": f"Error generating response: {'; '.join(errors) or 'no provider available'}"})
 
 
 def save_to_file(content, filename):
@@ -0,0 +1,208 @@
+"""
+Batch Research Module for Company Research Agent
+
+Researches a list of companies (e.g. an account list from sales ops) under
+one concurrency limit shared by every batch in the process. Names that
+resolve to the same company are researched once per batch. Research
+already in the cache is reused, and a company that is already being
+researched (by a batch or an interactive session) joins that pipeline.
+Page fetches are shared through the page cache of web_context_extract.
+Progress and results are reported per company as they happen, and a
+failing company does not stop the rest of the batch.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from src.company_index import company_index
+from src.settings import settings
+
+
+class BatchProgress:
+    """
+    Progress publisher handed to the agent researching one company of a batch
+
+    Forwards events to the shared broker tagged with the batch id, and
+    copies them into the batch's output stream.
+    """
+
+    def __init__(self, batch_id: str, company: str, broker, output: asyncio.Queue):
+        self.batch_id = batch_id
+        self.company = company
+        self.broker = broker
+        self.output = output
+        self.researched = False  # This entry ran the pipeline (not served from cache or a shared run)
+        self.error: Optional[str] = None
+
+    def publish(self, event_type: str, **fields) -> Dict:
+        if event_type == "research_started":
+            self.researched = True
+        elif event_type == "research_failed":
+            self.error = fields.get("error") or "Research failed"
+        event = self.broker.publish(event_type, batch_id=self.batch_id, **fields)
+        self.output.put_nowait({"type": "progress", "company": self.company, "event": event})
+        return event
+
+
+class BatchResearchRunner:
+    """Runs research batches with a process-wide limit on concurrent companies"""
+
+    def __init__(self, agent_factory: Callable[[BatchProgress], object], broker,
+                 concurrency: int = 4, max_companies: int = 500):
+        """
+        Args:
+            agent_factory: Called with a BatchProgress to build the agent that researches one company
+            broker: ProgressBroker that also receives every batch event
+            concurrency: Companies researched at once across all batches
+            max_companies: Largest accepted batch
+        """
+        self.agent_factory = agent_factory
+        self.broker = broker
+        self.concurrency = concurrency
+        self.max_companies = max_companies
+        self.active_batches = 0
+        self.running = 0
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _limiter(self) -> asyncio.Semaphore:
+        # Created on first use so it belongs to the serving event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def plan(self, companies: List[str]) -> Tuple[List[Tuple[str, List[str]]], int]:
+        """
+        Deduplicate a company list
+
+        Args:
+            companies: Company names as submitted
+
+        Returns:
+            ([(company, [other submitted names for it]), ...] in submission order,
+             number of duplicate names removed)
+
+        Raises:
+            ValueError: If the list is empty or longer than max_companies
+        """
+        names = [name.strip() for name in companies if name and name.strip()]
+        if not names:
+            raise ValueError("No company names given")
+        if len(names) > self.max_companies:
+            raise ValueError(f"Batch has {len(names)} companies; the limit is {self.max_companies}")
+
+        unique: Dict[str, Tuple[str, List[str]]] = {}
+        for name in names:
+            key = company_index.key(name)
+            if key in unique:
+                unique[key][1].append(name)
+            else:
+                unique[key] = (name, [])
+        return list(unique.values()), len(names) - len(unique)
+
+    async def run(self, companies: List[Tuple[str, List[str]]], duplicates: int = 0) -> AsyncIterator[Dict]:
+        """
+        Research a deduplicated batch, yielding events as they happen
+
+        Yields "batch_started", then per company "started", "progress" and
+        one "result" (status "completed" or "failed"), then "batch_finished".
+        Closing the iterator early (e.g. the client disconnected) cancels
+        the companies still waiting or running.
+
+        Args:
+            companies: Output of plan()
+            duplicates: Duplicate names removed by plan(), for the report
+        """
+        batch_id = uuid.uuid4().hex
+        start = time.perf_counter()
+        output: asyncio.Queue = asyncio.Queue()
+        counts = {"completed": 0, "failed": 0, "researched": 0, "reused": 0}
+
+        yield {
+            "type": "batch_started",
+            "batch_id": batch_id,
+            "companies": len(companies),
+            "duplicates": duplicates,
+            "concurrency": self.concurrency
+        }
+
+        self.active_batches += 1
+        tasks = [
+            asyncio.ensure_future(self._research_one(batch_id, company, aliases, output))
+            for company, aliases in companies
+        ]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event = await output.get()
+                if event["type"] == "result":
+                    remaining -= 1
+                    counts[event["status"]] += 1
+                    counts["researched"] += event["researched"]
+                    # Completed from the cache or a run someone else started
+                    counts["reused"] += event["status"] == "completed" and not event["researched"]
+                yield event
+        finally:
+            self.active_batches -= 1
+            # Stops work nobody will read if the consumer went away
+            for task in tasks:
+                task.cancel()
+
+        yield {
+            "type": "batch_finished",
+            "batch_id": batch_id,
+            **counts,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000)
+        }
+
+    async def _research_one(self, batch_id: str, company: str, aliases: List[str],
+                            output: asyncio.Queue) -> None:
+        """Research one company under the global limit; always ends with a "result" event"""
+        progress = BatchProgress(batch_id, company, self.broker, output)
+        result = {"type": "result", "company": company, "aliases": aliases}
+        limiter = self._limiter()
+        self.waiting += 1
+        try:
+            await limiter.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        started = time.perf_counter()
+        output.put_nowait({"type": "started", "company": company})
+        try:
+            agent = self.agent_factory(progress)
+            message = await agent._handle_company_research(company)
+            if progress.error or not agent.account_plan:
+                result.update(status="failed", error=progress.error or message)
+            else:
+                result.update(status="completed", resolved=agent.current_company,
+                              plan=dict(agent.account_plan))
+        except Exception as e:
+            # One company failing must not end the batch
+            result.update(status="failed", error=str(e))
+        finally:
+            self.running -= 1
+            limiter.release()
+        result["researched"] = progress.researched
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000)
+        output.put_nowait(result)
+
+    def stats(self) -> Dict:
+        return {
+            "active_batches": self.active_batches,
+            "running": self.running,
+            "waiting": self.waiting,
+            "concurrency": self.concurrency,
+            "max_companies": self.max_companies
+        }
+
+
+def batch_limits_from_env() -> Dict:
+    """BatchResearchRunner keyword arguments from BATCH_RESEARCH_* environment variables"""
+    return {
+        "concurrency": settings.get_int("BATCH_RESEARCH_CONCURRENCY", 4),
+        "max_companies": settings.get_int("BATCH_RESEARCH_MAX_COMPANIES", 500)
+    }
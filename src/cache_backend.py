@@ -0,0 +1,339 @@
+"""
+Cache Backend Module for Company Research Agent
+
+Pluggable storage for the research and plan caches so that every API worker
+process (uvicorn --workers N) sees the same entries, and /cache/clear reaches
+all of them. Three backends are available:
+
+- memory: a dict in this process (single worker, lost on restart)
+- sqlite: a local database file shared by all processes on the machine and
+          kept across restarts (the default)
+- redis:  a networked Redis server shared across machines; if the redis
+          package is missing or the server is unreachable, the SQLite store
+          stands in for it
+
+Values are JSON-serialized and may carry a TTL. CacheMapping exposes a
+backend namespace as a regular mutable mapping, so agents use it like a dict.
+Nothing is loaded up front: keys and values are read from the store on access.
+The SQLite and Redis calls block, so code on the event loop goes through
+offload(), which runs them in a worker thread.
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from src.settings import settings
+
+# Optional redis client, imported only when the redis backend is selected
+REDIS_AVAILABLE = importlib.util.find_spec("redis") is not None
+
+
+class CacheBackend(ABC):
+    """Interface for string key/value stores partitioned by namespace"""
+
+    name = "base"
+    blocking = True  # Calls may wait on disk or network; keep them off the event loop
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def keys(self, namespace: str) -> List[str]:
+        ...
+
+    @abstractmethod
+    def clear(self, namespace: str) -> None:
+        ...
+
+    def stats(self) -> Dict:
+        return {"backend": self.name}
+
+
+class MemoryBackend(CacheBackend):
+    """Dictionary store local to this process"""
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self):
+        self._data: Dict[Tuple[str, str], Tuple[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get((namespace, key))
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.time():
+                del self._data[(namespace, key)]
+                return None
+            return value
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[(namespace, key)] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            return self._data.pop((namespace, key), None) is not None
+
+    def keys(self, namespace: str) -> List[str]:
+        now = time.time()
+        with self._lock:
+            return [
+                key for (ns, key), (_value, expires) in self._data.items()
+                if ns == namespace and (expires is None or expires > now)
+            ]
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            for entry in [k for k in self._data if k[0] == namespace]:
+                del self._data[entry]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"backend": self.name, "entries": len(self._data)}
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Database file shared by every process on the machine
+
+    Each thread keeps one open connection instead of connecting per call.
+    A write lock held by another process is waited on for at most
+    busy_timeout seconds.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "data/cache.db", busy_timeout: float = 5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL, updated REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """This thread's connection, opened on first use (and again after a fork)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        yield conn
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= time.time():
+                conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+                return None
+            return row[0]
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, updated) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, value, now + ttl if ttl else None, now)
+            )
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+            return cursor.rowcount == 1
+
+    def keys(self, namespace: str) -> List[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT key FROM cache WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?) "
+                "ORDER BY updated",
+                (namespace, time.time())
+            )]
+
+    def clear(self, namespace: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return {"backend": self.name, "path": self.path, "entries": entries}
+
+
+class RedisBackend(CacheBackend):
+    """
+    Networked store shared across machines
+
+    Keys live under "<prefix>:<namespace>:<generation>:<key>". Clearing a
+    namespace increments its generation, so invalidation is a single atomic
+    command; orphaned keys expire by TTL. Each process re-reads a namespace's
+    generation at most every generation_ttl seconds, so a clear made by
+    another process is seen within that time (at once in this process).
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "company_agent", orphan_ttl: float = 7 * 24 * 3600,
+                 generation_ttl: float = 1.0):
+        self.url = url
+        self.prefix = prefix
+        self.orphan_ttl = orphan_ttl
+        self.generation_ttl = generation_ttl
+        self._generations: Dict[str, Tuple[str, float]] = {}  # namespace -> (generation, read at)
+        import redis
+        self._client = redis.Redis.from_url(url, decode_responses=True, socket_timeout=2)
+        self._client.ping()
+
+    def _generation(self, namespace: str) -> str:
+        cached = self._generations.get(namespace)
+        if cached is not None and time.monotonic() - cached[1] < self.generation_ttl:
+            return cached[0]
+        generation = self._client.get(f"{self.prefix}:{namespace}:generation") or "0"
+        self._generations[namespace] = (generation, time.monotonic())
+        return generation
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{self._generation(namespace)}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        return self._client.get(self._key(namespace, key))
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None) -> None:
+        # Untimed entries still get a long TTL so keys from old generations are reclaimed
+        self._client.set(self._key(namespace, key), value, px=int((ttl or self.orphan_ttl) * 1000))
+
+    def delete(self, namespace: str, key: str) -> bool:
+        return self._client.delete(self._key(namespace, key)) == 1
+
+    def keys(self, namespace: str) -> List[str]:
+        base = f"{self.prefix}:{namespace}:{self._generation(namespace)}:"
+        return [full[len(base):] for full in self._client.scan_iter(match=base + "*", count=500)]
+
+    def clear(self, namespace: str) -> None:
+        generation = self._client.incr(f"{self.prefix}:{namespace}:generation")
+        self._generations[namespace] = (str(generation), time.monotonic())
+
+    def stats(self) -> Dict:
+        return {"backend": self.name, "url": self.url.split("@")[-1]}
+
+
+def create_backend(kind: Optional[str] = None) -> CacheBackend:
+    """
+    Build the configured cache backend
+
+    Args:
+        kind: "memory", "sqlite" or "redis" (defaults to CACHE_BACKEND, else "sqlite")
+
+    Returns:
+        The backend; redis falls back to SQLite when it cannot be used
+    """
+    kind = (kind or settings.get("CACHE_BACKEND", "sqlite")).lower()
+    sqlite_path = settings.get("CACHE_DB_PATH", "data/cache.db")
+    sqlite_timeout = settings.get_float("CACHE_DB_TIMEOUT_SECONDS", 5.0)
+    if kind == "redis":
+        if not REDIS_AVAILABLE:
+            print("⚠️ redis package not installed; using the SQLite cache instead")
+            return SQLiteBackend(sqlite_path, sqlite_timeout)
+        try:
+            return RedisBackend(settings.get("REDIS_URL", "redis://localhost:6379/0"),
+                                generation_ttl=settings.get_float("REDIS_GENERATION_TTL_SECONDS", 1.0))
+        except Exception as e:
+            print(f"⚠️ Redis unavailable ({e}); using the SQLite cache instead")
+            return SQLiteBackend(sqlite_path, sqlite_timeout)
+    if kind == "sqlite":
+        return SQLiteBackend(sqlite_path, sqlite_timeout)
+    return MemoryBackend()
+
+
+class CacheMapping(MutableMapping):
+    """A backend namespace used like a dict, with JSON values and an optional TTL"""
+
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: Optional[float] = None):
+        """
+        Args:
+            backend: Storage backend
+            namespace: Partition of the backend holding this mapping's entries
+            ttl: Seconds before an entry expires (None keeps entries until cleared)
+        """
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def __getitem__(self, key: str) -> Any:
+        raw = self.backend.get(self.namespace, key)
+        if raw is None:
+            raise KeyError(key)
+        return json.loads(raw)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.backend.set(self.namespace, key, json.dumps(value, default=str), self.ttl)
+
+    def __delitem__(self, key: str) -> None:
+        if not self.backend.delete(self.namespace, key):
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.backend.get(self.namespace, key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.backend.keys(self.namespace))
+
+    def __len__(self) -> int:
+        return len(self.backend.keys(self.namespace))
+
+    def clear(self) -> None:
+        """Remove every entry in this namespace, for all processes sharing the backend"""
+        self.backend.clear(self.namespace)
+
+
+async def offload(mapping: MutableMapping, method: str, *args) -> Any:
+    """
+    Call a cache method from the event loop without blocking it
+
+    Args:
+        mapping: A CacheMapping, or a plain dict (as used by the CLI and tests)
+        method: Mapping method name, e.g. "get", "pop", "__setitem__" or "keys"
+        *args: Arguments for the method
+
+    Returns:
+        The method's result (keys() views are returned as a list)
+    """
+    def call():
+        result = getattr(mapping, method)(*args)
+        return list(result) if method == "keys" else result
+
+    if isinstance(mapping, CacheMapping) and mapping.backend.blocking:
+        return await asyncio.to_thread(call)
+    return call()
@@ -0,0 +1,206 @@
+"""
+Company Name Index Module for Company Research Agent
+
+Maps the many ways a user can name a company ("Microsoft", "Microsoft Corp",
+"microsoft corporation", "MSFT") to one canonical name, so research and plan
+caches are hit regardless of phrasing. Names are normalized by stripping
+legal suffixes and punctuation, looked up in a ticker/alias gazetteer loaded
+from a local file, and finally fuzzy-matched against companies already
+researched. A fuzzy match is only used when the first word agrees
+("Microsoft Corporatoin" -> Microsoft), never for a different word that
+merely looks alike ("Metal" is not Meta). Every completed research run
+registers its company in the index, and processes seed it from the shared
+research cache when they start.
+"""
+
+import difflib
+import json
+import re
+import threading
+from typing import Dict, Iterable, Optional
+from src.settings import settings
+
+ALIASES_FILE = settings.get("COMPANY_ALIASES_FILE", "data/company_aliases.json")
+FUZZY_CUTOFF = settings.get_float("COMPANY_FUZZY_CUTOFF", 0.88)
+
+# Trailing legal forms and filler words that do not identify the company
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited",
+    "llc", "llp", "plc", "lp", "gmbh", "ag", "sa", "nv", "bv", "ab", "as", "oy", "spa",
+    "srl", "pte", "pty", "kk", "holdings", "holding", "group", "the",
+}
+
+
+def normalize_company_name(name: str) -> str:
+    """
+    Reduce a company name to its comparison key
+
+    Args:
+        name: Company name as written by the user
+
+    Returns:
+        Lowercase name without punctuation, leading "the" or trailing legal suffixes
+        ("Microsoft Corp." -> "microsoft"); empty string for empty input
+    """
+    text = name.lower().replace("&", " and ")
+    text = re.sub(r"[^\w\s]", " ", text)
+    words = text.split()
+    if words and words[0] == "the" and len(words) > 1:
+        words = words[1:]
+    # Strip suffixes from the end, but never reduce a name to nothing
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+class CompanyIndex:
+    """Normalization, alias and fuzzy lookup of canonical company names"""
+
+    def __init__(self, aliases_file: Optional[str] = ALIASES_FILE, fuzzy_cutoff: float = FUZZY_CUTOFF):
+        """
+        Args:
+            aliases_file: JSON file mapping canonical names to lists of aliases/tickers
+            fuzzy_cutoff: Minimum similarity (0-1) for a fuzzy match
+        """
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._aliases: Dict[str, str] = {}   # normalized alias -> canonical name
+        self._known: Dict[str, str] = {}     # normalized name -> canonical name (researched)
+        self._lock = threading.Lock()
+        if aliases_file:
+            self.load_aliases(aliases_file)
+
+    def load_aliases(self, path: str) -> int:
+        """
+        Load a gazetteer file of {"Canonical Name": ["alias", "TICKER", ...]}
+
+        Args:
+            path: Path to the JSON file
+
+        Returns:
+            Number of aliases loaded (0 if the file is missing or invalid)
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                gazetteer = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load company aliases from {path}: {e}")
+            return 0
+
+        count = 0
+        with self._lock:
+            for canonical, aliases in gazetteer.items():
+                for alias in [canonical, *aliases]:
+                    key = normalize_company_name(alias)
+                    if key:
+                        self._aliases[key] = canonical
+                        count += 1
+        return count
+
+    def add(self, company_name: str, aliases: Iterable[str] = ()) -> str:
+        """
+        Register a researched company (and optional aliases) under its canonical name
+
+        Args:
+            company_name: Canonical name to register
+            aliases: Additional names that should resolve to it
+
+        Returns:
+            The canonical name
+        """
+        with self._lock:
+            for name in [company_name, *aliases]:
+                key = normalize_company_name(name)
+                if key:
+                    self._known[key] = company_name
+        return company_name
+
+    def seed(self, company_names: Iterable[str]) -> int:
+        """
+        Register companies researched earlier, e.g. the keys of the shared research cache
+
+        Returns:
+            Number of companies registered
+        """
+        count = 0
+        for company_name in company_names:
+            self.add(company_name)
+            count += 1
+        return count
+
+    def remove(self, company_name: str) -> None:
+        """Forget a researched company (e.g. after its cache entry is cleared)"""
+        with self._lock:
+            for key in [k for k, v in self._known.items() if v == company_name]:
+                del self._known[key]
+
+    def clear_researched(self) -> None:
+        """Forget every researched company (gazetteer aliases are kept)"""
+        with self._lock:
+            self._known.clear()
+
+    def resolve(self, company_name: str) -> str:
+        """
+        Map a user-supplied name to its canonical company name
+
+        Lookup order: researched companies, gazetteer aliases, fuzzy match
+        against researched and gazetteer names. Unknown names are returned
+        unchanged (stripped) so they become canonical once researched.
+
+        Args:
+            company_name: Company name as extracted from user input
+
+        Returns:
+            Canonical company name
+        """
+        name = company_name.strip()
+        key = normalize_company_name(name)
+        if not key:
+            return name
+
+        with self._lock:
+            if key in self._known:
+                return self._known[key]
+            if key in self._aliases:
+                return self._aliases[key]
+
+            # Tickers and very short names are too ambiguous to fuzzy-match
+            if len(key) >= 4:
+                match = self._fuzzy_match(key)
+                if match:
+                    return match
+        return name
+
+    def _fuzzy_match(self, key: str) -> Optional[str]:
+        """
+        Closest known name sharing the first word of key (caller holds the lock)
+
+        Similar-looking single words are different companies as often as
+        they are typos (Metal/Meta, Tuber/Uber), so only variations after
+        an identical first word are matched.
+        """
+        first = key.split()[0]
+        candidates = {
+            candidate: canonical
+            for candidate, canonical in {**self._aliases, **self._known}.items()
+            if candidate.split()[0] == first
+        }
+        match = difflib.get_close_matches(key, candidates.keys(), n=1, cutoff=self.fuzzy_cutoff)
+        return candidates[match[0]] if match else None
+
+    def key(self, company_name: str) -> str:
+        """Normalized key of the canonical name, used to deduplicate work"""
+        return normalize_company_name(self.resolve(company_name))
+
+    def stats(self) -> Dict:
+        """Sizes of the alias and researched-company tables"""
+        with self._lock:
+            return {
+                "aliases": len(self._aliases),
+                "researched": len(set(self._known.values()))
+            }
+
+
+# Shared index used by every agent in the process
+company_index = CompanyIndex()
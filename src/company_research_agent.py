@@ -7,17 +7,80 @@ import asyncio
 import json
 import os
 import re
-from typing import Dict, List, Optional
+import time
+from collections import deque
+from functools import partial
+from typing import Deque, Dict, List, Optional
 from enum import Enum
 from datetime import datetime
-from dotenv import load_dotenv
 
 # Import existing modules
+from src.settings import settings
 from src.web_context_extract import extract
-from src.context_summarizer import summarize_context
-from src.article_writer import generate_chat_response
+from src.context_summarizer import asummarize_research
+from src.admission import research_limiter
+from src.cache_backend import offload
+from src.article_writer import agenerate_chat_response
+from src.llm_scheduler import Priority
+from src.progress import ProgressBroker, progress_broker
+from src.single_flight import SingleFlight
+from src.intent_classifier import IntentResult, classify_intent, intent_log
+from src.company_index import company_index
+from src.conversation_memory import ConversationMemory
+from src.http_client import close_session
+from src.plan_index import plan_index
+from src.metrics import cache_requests, section_latency, stage_latency
+from src.tracing import span, traced
 
-load_dotenv('config/.env')
+# Research runs in flight, shared by every agent in the process so concurrent
+# requests for the same company attach to one pipeline instead of repeating it
+research_flights = SingleFlight()
+
+# Cached research older than the soft TTL is served while a background refresh
+# runs; past the hard TTL it is discarded and research runs before responding
+RESEARCH_SOFT_TTL = settings.get_float("RESEARCH_CACHE_SOFT_TTL_SECONDS", 24 * 3600)
+RESEARCH_HARD_TTL = settings.get_float("RESEARCH_CACHE_HARD_TTL_SECONDS", 7 * 24 * 3600)
+
+# Status reported before any research starts (also for clients without a session)
+IDLE_STATUS = "I'm ready to start researching. Just tell me which company!"
+
+# Companies a session has loaded research for, named in its LLM prompts (most recent last)
+RECENT_COMPANIES = 5
+
+# Background refresh tasks by research key (also keeps them from being garbage collected)
+_refresh_tasks: Dict[str, asyncio.Task] = {}
+
+def research_age(entry: Dict) -> float:
+    """Seconds since a research cache entry was produced (infinite if unknown)"""
+    try:
+        return (datetime.now() - datetime.fromisoformat(entry['timestamp'])).total_seconds()
+    except (KeyError, TypeError, ValueError):
+        return float("inf")
+
+def format_plan_markdown(company_name: str, plan_sections: Dict) -> str:
+    """Render plan sections as the markdown saved to ./account_plans"""
+    plan_output = f"\n{'='*60}\n"
+    plan_output += f"ACCOUNT PLAN: {company_name.upper()}\n"
+    plan_output += f"{'='*60}\n\n"
+    
+    for section, content in plan_sections.items():
+        section_title = section.replace('_', ' ').title()
+        plan_output += f"## {section_title}\n"
+        plan_output += f"{content}\n\n"
+    return plan_output
+
+def format_saved_plan(company_name: str, plan_sections: Dict, generated: datetime) -> str:
+    """Render plan sections as the markdown written when the user saves the plan"""
+    plan_output = f"# ACCOUNT PLAN: {company_name.upper()}\n\n"
+    plan_output += f"Generated: {generated.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+    plan_output += "=" * 60 + "\n\n"
+    
+    for section, content in plan_sections.items():
+        section_title = section.replace('_', ' ').title()
+        plan_output += f"## {section_title}\n\n"
+        plan_output += f"{content}\n\n"
+        plan_output += "-" * 40 + "\n\n"
+    return plan_output
 
 class ConversationMode(Enum):
     """Different conversation modes for the agent"""
@@ -36,19 +99,53 @@ class ResearchState(Enum):
     EDITING = "editing"
     COMPLETE = "complete"
 
+class ResearchFlightProgress:
+    """
+    Progress publisher of a shared research run
+    
+    The pipeline runs on a dedicated agent. Its events are forwarded to
+    every agent waiting on the run (once per distinct publisher) and its
+    state changes are mirrored onto them, so callers that join a run in
+    progress follow it like the caller that started it.
+    """
+    
+    def __init__(self):
+        self.followers: List["CompanyResearchAgent"] = []
+    
+    def publish(self, event_type: str, **fields) -> Optional[Dict]:
+        event = None
+        published = set()
+        for agent in list(self.followers):
+            if event_type == "state_changed":
+                agent._state = ResearchState(fields["state"])
+            if id(agent.progress) not in published:
+                published.add(id(agent.progress))
+                event = agent.progress.publish(event_type, **fields)
+        return event
+
+# Progress of the research runs in flight, by research key
+_flight_progress: Dict[str, ResearchFlightProgress] = {}
+
 class CompanyResearchAgent:
     """Interactive agent for company research and account planning"""
     
-    def __init__(self, user_mode: ConversationMode = ConversationMode.NORMAL):
+    def __init__(self, user_mode: ConversationMode = ConversationMode.NORMAL,
+                 progress: Optional[ProgressBroker] = None,
+                 research_cache: Optional[Dict] = None,
+                 plan_cache: Optional[Dict] = None):
         self.user_mode = user_mode  # Track user's conversation style
-        self.state = ResearchState.IDLE
-        self.conversation_history = []
+        self.progress = progress or progress_broker  # Receives structured progress events
+        self._state = ResearchState.IDLE
+        self.conversation_history = ConversationMemory()  # Recent turns plus a rolling summary
         self.current_company = None
         self.research_data = {}
+        self.research_data_bytes: Dict[str, int] = {}  # Serialized size per research_data entry
         self.account_plan = {}
         self.context_summary = ""
-        self.research_cache = {}  # Cache for company research data
-        self.plan_cache = {}  # Cache for generated plans
+        self.recent_companies: Deque[str] = deque(maxlen=RECENT_COMPANIES)
+        # Caches may be shared between agents (one agent per API session)
+        self.research_cache = research_cache if research_cache is not None else {}  # Company research data
+        self.plan_cache = plan_cache if plan_cache is not None else {}  # Generated plans
         
         # Agent always responds normally/professionally
         self.response_templates = {
@@ -56,6 +153,7 @@ class CompanyResearchAgent:
             "clarify": "Could you provide more details about {info}?",
             "update": "Update: Currently {status}",
             "complete": "I've completed the account plan. Would you like to review it?",
+            "thanks": "You're welcome! Let me know if you'd like to research another company or refine the plan.",
             "help": """I can help you with:
         
         1. **Company Research**: Just tell me a company name and I'll gather comprehensive information
@@ -72,6 +170,22 @@ class CompanyResearchAgent:
         Just talk to me naturally - I'll understand!"""
         }
         
+    @property
+    def state(self) -> ResearchState:
+        """Current research state"""
+        return self._state
+    
+    @state.setter
+    def state(self, value: ResearchState) -> None:
+        if value != self._state:
+            self._state = value
+            self._emit("state_changed", state=value.value)
+    
+    def _emit(self, event_type: str, **fields) -> None:
+        """Publish a progress event tagged with the current company"""
+        fields.setdefault("company", self.current_company)
+        self.progress.publish(event_type, **fields)
+    
     def get_response(self, template_key: str, **kwargs) -> str:
         """Get a professional response"""
         template = self.response_templates.get(template_key, "")
@@ -134,6 +248,7 @@ class CompanyResearchAgent:
         # For everything else, let the LLM handle it
         return "llm_process"
     
+    @traced()
     async def _handle_company_research(self, user_input: str) -> str:
         """Handle company research request with caching"""
         # Extract company name
@@ -143,17 +258,41 @@ class CompanyResearchAgent:
             self.state = ResearchState.GATHERING_INFO
             return self.get_response("clarify", info="the company name")
         
+        # "Microsoft Corp", "MSFT" and "microsoft" all share one cache entry
+        company_name = company_index.resolve(company_name)
         self.current_company = company_name
         
         # Check if we have cached data for this company
-        if company_name in self.research_cache:
+        with span("research_cache_lookup", company=company_name) as lookup:
+            cached = await offload(self.research_cache, "get", company_name)
+            age = research_age(cached) if cached else None
+            if cached and age > RESEARCH_HARD_TTL:
+                # Too old to serve; research again before answering
+                print(f"⌛ Cached research for {company_name} has expired")
+                await offload(self.research_cache, "pop", company_name, None)
+                await offload(self.plan_cache, "pop", company_name, None)
+                cached = None
+                lookup["result"] = "expired"
+            elif cached:
+                lookup["result"] = "stale" if age > RESEARCH_SOFT_TTL else "hit"
+            else:
+                lookup["result"] = "miss"
+        cache_requests.inc(cache="research", result=lookup["result"])
+        
+        if cached:
             print(f"✅ Using cached research data for {company_name}")
             response = f"I have existing research data for {company_name}. "
+            if age > RESEARCH_SOFT_TTL and self._refresh_in_background(company_name):
+                response += f"It is {age / 3600:.0f} hours old, so I'm refreshing it in the background. "
             
             # Check if we also have a cached plan
-            if company_name in self.plan_cache:
-                self.account_plan = self.plan_cache[company_name]
-                self.context_summary = self.research_cache[company_name]['summary']
+            cached_plan = await offload(self.plan_cache, "get", company_name)
+            cache_requests.inc(cache="plan", result="hit" if cached_plan else "miss")
+            if cached_plan:
+                # Edits apply to this agent's copy, not the cached plan
+                self.account_plan = dict(cached_plan)
+                self.context_summary = cached['summary']
+                self._remember_company(company_name)
                 self.state = ResearchState.COMPLETE
                 
                 response += "Loading the existing account plan.\n\n"
@@ -166,45 +305,169 @@ class CompanyResearchAgent:
                 return response
             else:
                 # Use cached research to generate a new plan
-                self.context_summary = self.research_cache[company_name]['summary']
-                self.research_data[company_name] = self.research_cache[company_name]['data']
+                self.context_summary = cached['summary']
+                self._set_research_data(company_name, cached['data'])
+                self._remember_company(company_name)
                 self.state = ResearchState.GENERATING_PLAN
                 response += "Generating a new account plan based on existing research...\n"
                 response += "\n" + await self._generate_account_plan()
                 return response
         
-        # No cache - perform new research
+        # No cache - perform new research, or attach to a run already in flight
         self.state = ResearchState.RESEARCHING
-        response = f"Starting fresh research on {company_name}...\n"
-        response += "I'll search for information about this company and gather data from multiple sources...\n"
+        key = company_index.key(company_name)
+        if research_flights.is_in_flight(key):
+            response = f"Research on {company_name} is already in progress. I'll share its results...\n"
+        else:
+            response = f"Starting fresh research on {company_name}...\n"
+            response += "I'll search for information about this company and gather data from multiple sources...\n"
         
         # Perform actual research
         try:
-            await self._perform_research(company_name)
-            response += "\n" + self.get_response("update", status="research complete")
-            
-            # Cache the research data
-            self.research_cache[company_name] = {
-                'data': self.research_data[company_name],
-                'summary': self.context_summary,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            # Generate account plan
-            response += "\n" + await self._generate_account_plan()
-            
-            # Cache the plan
-            self.plan_cache[company_name] = self.account_plan
+            with span("research_flight", company=company_name, joined=research_flights.is_in_flight(key)):
+                result = await self._research_flight(company_name)
+            response += "\n" + await self.adopt_research(company_name, result)
             
+        except asyncio.CancelledError:
+            # The caller went away; leave the session ready for its next request
+            self.state = ResearchState.IDLE
+            raise
         except Exception as e:
             response += f"\nError during research: {str(e)}"
+            self._emit("research_failed", error=str(e))
             self.state = ResearchState.IDLE
         
         return response
     
-    async def _perform_research(self, company_name: str) -> None:
+    async def adopt_research(self, company_name: str, result: Dict) -> str:
+        """
+        Cache a finished research pipeline result and make its plan current
+        
+        Also used for results produced by out-of-process research workers.
+        
+        Args:
+            company_name: Canonical company name
+            result: Output of _run_research_pipeline
+            
+        Returns:
+            Status message with the plan summary
+        """
+        self.current_company = company_name
+        self._set_research_data(company_name, result['data'])
+        self.context_summary = result['summary']
+        self._remember_company(company_name)
+        await self._cache_research(company_name, result)
+        
+        response = self.get_response("update", status="research complete")
+        # Each caller edits its own copy of the shared plan
+        return response + "\n" + self._adopt_plan(dict(result['plan']), result['plan_filename'])
+    
+    def _set_research_data(self, company_name: str, data) -> None:
+        """Keep a company's research data, measuring its size once for session memory accounting"""
+        self.research_data[company_name] = data
+        try:
+            self.research_data_bytes[company_name] = len(json.dumps(data, default=str))
+        except (TypeError, ValueError):
+            self.research_data_bytes[company_name] = 0
+    
+    def _remember_company(self, company_name: str) -> None:
+        """Record that this session loaded research for a company (moves it to the end if already listed)"""
+        if company_name in self.recent_companies:
+            self.recent_companies.remove(company_name)
+        self.recent_companies.append(company_name)
+    
+    async def _cache_research(self, company_name: str, result: Dict) -> None:
+        """Store a pipeline result in the research and plan caches"""
+        company_index.add(company_name)
+        await offload(self.research_cache, "__setitem__", company_name, {
+            'data': result['data'],
+            'summary': result['summary'],
+            'timestamp': result['timestamp']
+        })
+        await offload(self.plan_cache, "__setitem__", company_name, dict(result['plan']))
+    
+    def _refresh_in_background(self, company_name: str) -> bool:
+        """
+        Re-research a company without blocking the caller (stale-while-revalidate)
+        
+        The refresh runs on a separate agent so this session's state and plan
+        are untouched; only the shared caches are updated.
+        
+        Returns:
+            True if a refresh was started, False if one is already running
+        """
+        key = company_index.key(company_name)
+        if key in _refresh_tasks or research_flights.is_in_flight(key):
+            return False
+        refresher = CompanyResearchAgent(
+            self.user_mode,
+            progress=self.progress,
+            research_cache=self.research_cache,
+            plan_cache=self.plan_cache
+        )
+        
+        async def refresh():
+            try:
+                result = await refresher._research_flight(company_name)
+                await refresher._cache_research(company_name, result)
+                print(f"🔄 Refreshed cached research for {company_name}")
+            except Exception as e:
+                print(f"⚠️ Background refresh for {company_name} failed: {str(e)}")
+        
+        _refresh_tasks[key] = asyncio.ensure_future(refresh())
+        _refresh_tasks[key].add_done_callback(lambda _task: _refresh_tasks.pop(key, None))
+        return True
+    
+    async def _research_flight(self, company_name: str) -> Dict:
+        """
+        Research a company, or join the research already in flight for it
+        
+        The pipeline runs on a dedicated agent, so cancelling this caller
+        (e.g. its client disconnected) leaves nothing running against this
+        agent while other callers still wait for the result. This agent
+        follows the run's progress until the result arrives.
+        
+        Returns:
+            Output of _run_research_pipeline (shared; callers copy what they keep)
+        """
+        key = company_index.key(company_name)
+        flight = _flight_progress.setdefault(key, ResearchFlightProgress())
+        flight.followers.append(self)
+        try:
+            return await research_flights.do(key, partial(self._start_flight, company_name, flight))
+        finally:
+            flight.followers.remove(self)
+            if not flight.followers and _flight_progress.get(key) is flight:
+                del _flight_progress[key]
+    
+    def _start_flight(self, company_name: str, flight: ResearchFlightProgress):
+        """Pipeline coroutine run on a dedicated agent that reports to the flight's followers"""
+        runner = CompanyResearchAgent(
+            self.user_mode,
+            progress=flight,
+            research_cache=self.research_cache,
+            plan_cache=self.plan_cache
+        )
+        runner.current_company = company_name
+        
+        async def run():
+            # One process-wide limit covers research from every entry point
+            async with research_limiter.slot():
+                return await runner._run_research_pipeline(company_name)
+        return run()
+    
+    async def _run_research_pipeline(self, company_name: str) -> Dict:
+        """Research a company and generate its plan (shared by concurrent callers)"""
+        research = await self._perform_research(company_name)
+        self.state = ResearchState.GENERATING_PLAN
+        plan, plan_filename = await self._create_plan(company_name, research['summary'])
+        return {**research, 'plan': plan, 'plan_filename': plan_filename}
+    
+    @traced()
+    async def _perform_research(self, company_name: str) -> Dict:
         """Perform the actual research using existing modules"""
         print(f"🔍 Researching {company_name}...")
+        self._emit("research_started", company=company_name)
         
         # Create search queries for different aspects
         queries = [
@@ -220,39 +483,49 @@ class CompanyResearchAgent:
             # Provide progress update
             aspect = query.split(company_name)[1].strip()
             print(f"📊 Researching: {aspect}...")
+            self._emit("search_started", company=company_name, aspect=aspect, query=query)
             
             # Check for conflicting information scenarios
             if "challenges" in aspect or "problems" in aspect:
                 print("I'm finding some conflicting information about challenges. Let me dig deeper...")
             
-            # Use the simplified extract function with silent mode
-            await extract(query, silent_mode=True)
-            
-            # Read the extracted data
-            try:
-                with open("data/context.json", "r") as f:
-                    data = json.load(f)
-                    all_data.extend(data)
-            except:
-                pass
-        
-        # Save all research data
-        self.research_data[company_name] = all_data
-        
-        # Summarize the context (silently)
-        summarize_context(silent_mode=True)
-        
-        # Read the summary
-        try:
-            with open("data/context.txt", "r") as f:
-                self.context_summary = f.read()
-        except:
-            self.context_summary = "No summary available"
+            # Use the returned data rather than data/context.json, which
+            # concurrent research runs would overwrite
+            data = await extract(
+                query,
+                silent_mode=True,
+                progress_callback=partial(self._emit, company=company_name, aspect=aspect)
+            )
+            all_data.extend(data)
+        
+        # Summarize all aspects together (silently; cancelled with the pipeline)
+        self.state = ResearchState.SUMMARIZING
+        self._emit("summarization_started", company=company_name, sources=len(all_data))
+        summarize_start = time.perf_counter()
+        if all_data:
+            with span("summarize", sources=len(all_data)):
+                summary = await asummarize_research(all_data, silent_mode=True)
+        else:
+            summary = "No summary available"
+        summarize_seconds = time.perf_counter() - summarize_start
+        stage_latency.observe(summarize_seconds, stage="summarize")
+        self._emit("summarization_finished", company=company_name,
+                   duration_ms=round(summarize_seconds * 1000))
+        
+        return {
+            'data': all_data,
+            'summary': summary,
+            'timestamp': datetime.now().isoformat()
+        }
     
-    async def _generate_account_plan(self) -> str:
-        """Generate an account plan based on research"""
-        self.state = ResearchState.GENERATING_PLAN
+    @traced()
+    async def _create_plan(self, company_name: str, context_summary: str):
+        """
+        Generate and save the plan sections for a company
         
+        Returns:
+            tuple: (plan sections dict, saved plan filename)
+        """
         # Create more concise account plan structure - fewer sections
         plan_sections = {
             "executive_summary": "",
@@ -264,51 +537,67 @@ class CompanyResearchAgent:
         
         # Generate each section with conciseness instructions        
         for section, _ in plan_sections.items():
-            section_query = f"""Based on the research about {self.current_company}, write a CONCISE {section.replace('_', ' ')} section for an account plan. 
+            section_query = f"""Based on the research about {company_name}, write a CONCISE {section.replace('_', ' ')} section for an account plan. 
             
             IMPORTANT: Keep it brief - maximum 3-4 bullet points or 2-3 short paragraphs. 
             Focus only on the most critical and actionable points.
             Be direct and avoid unnecessary elaboration."""
             
+            section_start = time.perf_counter()
             try:
-                section_content = generate_chat_response(
-                    self.context_summary,
-                    section_query,
-                    silent_mode=True  # Suppress output for cleaner agent interaction
-                )
+                # Bulk section generation yields to interactive chat traffic
+                with span("plan_section", section=section):
+                    section_content = await agenerate_chat_response(
+                        context_summary,
+                        section_query,
+                        silent_mode=True,  # Suppress output for cleaner agent interaction
+                        priority=Priority.BACKGROUND,
+                        flow=company_name
+                    )
                 # Limit content length
                 if len(section_content) > 800:
                     section_content = section_content[:797] + "..."
                 plan_sections[section] = section_content
             except Exception as e:
                 plan_sections[section] = f"[Section generation failed: {str(e)}]"
-        
-        self.account_plan = plan_sections
-        self.state = ResearchState.COMPLETE
+            section_seconds = time.perf_counter() - section_start
+            stage_latency.observe(section_seconds, stage="plan_section")
+            section_latency.observe(section_seconds, section=section)
+            self._emit("section_completed", company=company_name, section=section,
+                       content=plan_sections[section],
+                       duration_ms=round(section_seconds * 1000))
         
         # Format the plan for display
-        plan_output = f"\n{'='*60}\n"
-        plan_output += f"ACCOUNT PLAN: {self.current_company.upper()}\n"
-        plan_output += f"{'='*60}\n\n"
-        
-        for section, content in plan_sections.items():
-            section_title = section.replace('_', ' ').title()
-            plan_output += f"## {section_title}\n"
-            plan_output += f"{content}\n\n"
+        plan_output = format_plan_markdown(company_name, plan_sections)
         
         # Save the plan to file
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        plan_filename = f"account_plan_{self.current_company.replace(' ', '_')}_{timestamp}.md"
+        plan_filename = f"account_plan_{company_name.replace(' ', '_')}_{timestamp}.md"
         
         os.makedirs("./account_plans", exist_ok=True)
         with open(f"./account_plans/{plan_filename}", "w") as f:
             f.write(plan_output)
+        plan_index.add(plan_filename)
+        self._emit("plan_completed", company=company_name, filename=plan_filename)
+        
+        return plan_sections, plan_filename
+    
+    def _adopt_plan(self, plan_sections: Dict, plan_filename: str) -> str:
+        """Make a generated plan the current one and describe it"""
+        self.account_plan = plan_sections
+        self.state = ResearchState.COMPLETE
         
         # Generate and return a summary
         summary = self.get_plan_summary()
         
         return f"Account plan generated and saved to {plan_filename}\n\n{summary}"
     
+    async def _generate_account_plan(self) -> str:
+        """Generate an account plan based on research"""
+        self.state = ResearchState.GENERATING_PLAN
+        plan_sections, plan_filename = await self._create_plan(self.current_company, self.context_summary)
+        return self._adopt_plan(plan_sections, plan_filename)
+    
     async def _handle_edit_request(self, user_input: str) -> str:
         """Enhanced handler for editing account plan sections with partial edits and regeneration"""
         self.state = ResearchState.EDITING
@@ -388,10 +677,12 @@ What changes would you like to make?"""
         
         try:
             # Regenerate the section
-            new_content = generate_chat_response(
+            new_content = await agenerate_chat_response(
                 self.context_summary,
                 section_query,
-                silent_mode=True
+                silent_mode=True,
+                flow=self.current_company,
+                use_cache=False  # The user asked for a new version, not the cached one
             )
             
             # Update the plan
@@ -426,10 +717,11 @@ Keep the existing content and add the requested improvements. Write in a profess
         
         try:
             # Generate enhanced content
-            enhanced_content = generate_chat_response(
+            enhanced_content = await agenerate_chat_response(
                 self.context_summary,
                 enhancement_query,
-                silent_mode=True
+                silent_mode=True,
+                flow=self.current_company
             )
             
             # Update the plan
@@ -455,15 +747,7 @@ Would you like to edit another section or save the plan?"""
             return "No account plan to save. Please research a company first."
         
         # Format the complete plan
-        plan_output = f"# ACCOUNT PLAN: {self.current_company.upper()}\n\n"
-        plan_output += f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        plan_output += "=" * 60 + "\n\n"
-        
-        for section, content in self.account_plan.items():
-            section_title = section.replace('_', ' ').title()
-            plan_output += f"## {section_title}\n\n"
-            plan_output += f"{content}\n\n"
-            plan_output += "-" * 40 + "\n\n"
+        plan_output = format_saved_plan(self.current_company, self.account_plan, datetime.now())
         
         # Save to data folder
         os.makedirs("./data", exist_ok=True)
@@ -519,10 +803,11 @@ The plan has been preserved and can be accessed anytime from the data folder."""
         Be concise and specific. If the information is not available in the research, say so clearly."""
         
         try:
-            response = generate_chat_response(
+            response = await agenerate_chat_response(
                 self.context_summary,
                 query,
-                silent_mode=True
+                silent_mode=True,
+                flow=self.current_company
             )
             
             return f"Based on my research about {self.current_company}:\n\n{response}"
@@ -539,7 +824,7 @@ The plan has been preserved and can be accessed anytime from the data folder."""
     def _get_status_update(self) -> str:
         """Provide status update on current research"""
         status_messages = {
-            ResearchState.IDLE: "I'm ready to start researching. Just tell me which company!",
+            ResearchState.IDLE: IDLE_STATUS,
             ResearchState.GATHERING_INFO: "I'm waiting for more information from you.",
             ResearchState.RESEARCHING: f"I'm currently researching {self.current_company}...",
             ResearchState.SUMMARIZING: "I'm summarizing the research findings...",
@@ -584,10 +869,11 @@ The plan has been preserved and can be accessed anytime from the data folder."""
         Be empathetic and clear about what you need from them (a company name) to help them."""
         
         try:
-            response = generate_chat_response(
+            response = await agenerate_chat_response(
                 context,
                 query,
-                silent_mode=True
+                silent_mode=True,
+                flow=self.current_company
             )
             return response
         except Exception as e:
@@ -623,20 +909,23 @@ Need specific section? Just ask."""
     async def _handle_llm_process(self, user_input: str) -> str:
         """Let LLM decide whether to research or converse"""
         
-        # Build context about conversation history
-        recent_history = ""
-        if len(self.conversation_history) > 2:
-            # Include last 2 exchanges for context
-            recent_history = "Recent conversation:\n"
-            for msg in self.conversation_history[-4:]:
-                recent_history += f"{msg['role']}: {msg['content']}\n"
+        # Obvious requests are routed locally without an LLM round-trip
+        start = time.perf_counter()
+        local = classify_intent(user_input, self.current_company, bool(self.context_summary))
+        if local.is_confident():
+            intent_log.record(user_input, "local", local.intent, local.confidence,
+                              time.perf_counter() - start, local.company)
+            return await self._handle_local_intent(local, user_input)
+        
+        # Summary of older turns plus the last 2 exchanges; bounded however long the session
+        recent_history = self.conversation_history.prompt_context(recent=4)
         
         # Build context for the LLM
         context = f"""You are a professional company research assistant that helps create account plans.
         
         Current state: {self.state.value}
         Current company being researched: {self.current_company if self.current_company else 'None'}
-        Has cached research: {list(self.research_cache.keys()) if self.research_cache else 'None'}
+        Research loaded in this conversation: {', '.join(self.recent_companies) or 'None'}
         
         {recent_history}
         
@@ -682,11 +971,14 @@ Need specific section? Just ask."""
         
         try:
             # Use the LLM to generate a response
-            response = generate_chat_response(
+            response = await agenerate_chat_response(
                 context,
                 query,
-                silent_mode=True
+                silent_mode=True,
+                flow=self.current_company
             )
+            llm_intent = response.split(":", 1)[0].lower() if response.startswith(("RESEARCH:", "ANSWER:")) else "conversation"
+            intent_log.record(user_input, "llm", llm_intent, local.confidence, time.perf_counter() - start)
             
             # Check if LLM wants to trigger research
             if response.startswith("RESEARCH:"):
@@ -722,16 +1014,30 @@ Need specific section? Just ask."""
             # Fallback to simple response if LLM fails
             return "I'm here to help you research companies and create account plans. Which company would you like to know about?"
     
+    async def _handle_local_intent(self, result: IntentResult, user_input: str) -> str:
+        """Act on an intent the local classifier is confident about"""
+        if result.intent == "research":
+            self.current_company = result.company
+            return await self._handle_company_research(f"Research {result.company}")
+        if result.intent == "answer":
+            return await self._answer_from_research(user_input)
+        if result.intent == "status":
+            return self._get_status_update()
+        
+        if result.intent == "help":
+            response = self._provide_help()
+        elif result.intent == "thanks":
+            response = self.get_response("thanks")
+        else:
+            response = self.get_response("greeting")
+        self.conversation_history.append({"role": "assistant", "content": response})
+        return response
+    
     async def _handle_general_conversation(self, user_input: str) -> str:
         """Handle general conversation using Mistral LLM for natural responses"""
         
-        # Build context about conversation history
-        recent_history = ""
-        if len(self.conversation_history) > 2:
-            # Include last 2 exchanges for context
-            recent_history = "Recent conversation:\n"
-            for msg in self.conversation_history[-4:]:
-                recent_history += f"{msg['role']}: {msg['content']}\n"
+        # Summary of older turns plus the last 2 exchanges; bounded however long the session
+        recent_history = self.conversation_history.prompt_context(recent=4)
         
         # Build context for the LLM
         context = f"""You are a professional company research assistant that helps create account plans.
@@ -766,10 +1072,11 @@ Need specific section? Just ask."""
         
         try:
             # Use the LLM to generate a natural response
-            response = generate_chat_response(
+            response = await agenerate_chat_response(
                 context,
                 query,
-                silent_mode=True
+                silent_mode=True,
+                flow=self.current_company
             )
             # Add the response to conversation history
             self.conversation_history.append({"role": "assistant", "content": response})
@@ -851,17 +1158,21 @@ Need specific section? Just ask."""
         
         return summary
     
-    def clear_cache(self, company_name: str = None) -> str:
+    async def clear_cache(self, company_name: str = None) -> str:
         """Clear cache for a specific company or all companies"""
         if company_name:
-            if company_name in self.research_cache:
-                del self.research_cache[company_name]
-            if company_name in self.plan_cache:
-                del self.plan_cache[company_name]
+            company_name = company_index.resolve(company_name)
+            await offload(self.research_cache, "pop", company_name, None)
+            await offload(self.plan_cache, "pop", company_name, None)
+            company_index.remove(company_name)
+            if company_name in self.recent_companies:
+                self.recent_companies.remove(company_name)
             return f"Cache cleared for {company_name}"
         else:
-            self.research_cache.clear()
-            self.plan_cache.clear()
+            await offload(self.research_cache, "clear")
+            await offload(self.plan_cache, "clear")
+            company_index.clear_researched()
+            self.recent_companies.clear()
             return "All cache cleared"
 
 
@@ -934,7 +1245,10 @@ class InteractiveSession:
 async def main():
     """Main entry point"""
     session = InteractiveSession()
-    await session.run()
+    try:
+        await session.run()
+    finally:
+        await close_session()
 
 
 if __name__ == "__main__":
@@ -4,17 +4,105 @@ Simplified Context Summarizer Module for Company Research Agent
 
 import os
 import json
-import requests
-from dotenv import load_dotenv
 
-load_dotenv('config/.env')
+from src.llm_router import llm_router
+from src.llm_scheduler import Priority
+from src.tracing import traced
 
-def summarize_context(silent_mode=True):
+SUMMARIZE_TASK = "summarize"
+SUMMARY_SYSTEM_PROMPT = "You are a technical writer who excels at extracting and formatting all relevant useful data into clear summaries."
+
+def _summary_prompt(json_data):
+    context = json.dumps(json_data, indent=2)
+    return f"""Summarize the following research data into clear, detailed points without any JSON formatting:
+
+{context}
+
+Provide a comprehensive summary that extracts all relevant information, organized by topics."""
+
+
+def _simple_extraction(json_data):
+    """Fallback summary when no provider could summarize"""
+    return "\n".join([
+        f"- {item.get('summary', 'No summary available')}"
+        for item in json_data if not item.get('error', False)
+    ])
+
+
+@traced()
+def summarize_research(json_data, silent_mode=True, priority=Priority.BACKGROUND):
+    """
+    Summarize extracted research data
+    
+    Args:
+        json_data: List of extracted source dictionaries (as returned by extract)
+        silent_mode: If True, suppress output
+        priority: Scheduler priority class for the LLM call
+        
+    Returns:
+        str: The summary text (a simple extraction if no provider is available)
+    """
+    try:
+        # The router picks the fastest healthy provider (Groq by default) and
+        # waits for the shared scheduler to admit the call under its rate limits
+        summary, route = llm_router.complete(
+            SUMMARIZE_TASK,
+            SUMMARY_SYSTEM_PROMPT,
+            _summary_prompt(json_data),
+            params={"temperature": 0.3, "max_tokens": 2000},
+            priority=priority
+        )
+        if not silent_mode:
+            print(f"Summarized with {route.name}")
+        return summary
+            
+    except Exception as e:
+        if not silent_mode:
+            print(f"API error, using simple extraction: {e}")
+    
+    return _simple_extraction(json_data)
+
+
+@traced()
+async def asummarize_research(json_data, silent_mode=True, priority=Priority.BACKGROUND):
+    """
+    Async variant of summarize_research(); cancelling the caller cancels the LLM call
+    
+    Args:
+        json_data: List of extracted source dictionaries (as returned by extract)
+        silent_mode: If True, suppress output
+        priority: Scheduler priority class for the LLM call
+        
+    Returns:
+        str: The summary text (a simple extraction if no provider is available)
+    """
+    try:
+        summary, route = await llm_router.acomplete(
+            SUMMARIZE_TASK,
+            SUMMARY_SYSTEM_PROMPT,
+            _summary_prompt(json_data),
+            params={"temperature": 0.3, "max_tokens": 2000},
+            priority=priority
+        )
+        if not silent_mode:
+            print(f"Summarized with {route.name}")
+        return summary
+            
+    except Exception as e:
+        if not silent_mode:
+            print(f"API error, using simple extraction: {e}")
+    
+    return _simple_extraction(json_data)
+
+
+@traced()
+def summarize_context(silent_mode=True, priority=Priority.BACKGROUND):
     """
     Summarize the context from the JSON file and save it to a text file
     
     Args:
         silent_mode: If True, suppress output
+        priority: Scheduler priority class for the LLM call
         
     Returns:
         int: Exit code (0 for success, non-zero for failure)
@@ -29,72 +117,7 @@ def summarize_context(silent_mode=True):
                 print("Warning: No context data found to summarize.")
             return 1
         
-        # Use Groq API directly for summarization
-        api_key = os.getenv("GROQ_API_KEY")
-        
-        if not api_key:
-            # Fallback: Simple text extraction if no API key
-            summary = "\n".join([
-                f"- {item.get('summary', item.get('url', 'Unknown source'))}"
-                for item in json_data if not item.get('error', False)
-            ])
-        else:
-            # Prepare the prompt
-            context = json.dumps(json_data, indent=2)
-            prompt = f"""Summarize the following research data into clear, detailed points without any JSON formatting:
-
-{context}
-
-Provide a comprehensive summary that extracts all relevant information, organized by topics."""
-            
-            try:
-                # Make API request to Groq
-                headers = {
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "model": "llama-3.1-8b-instant",
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a technical writer who excels at extracting and formatting all relevant useful data into clear summaries."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 2000
-                }
-                
-                response = requests.post(
-                    "https://api.groq.com/openai/v1/chat/completions",
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    response_data = response.json()
-                    summary = response_data['choices'][0]['message']['content']
-                else:
-                    # Fallback to simple extraction
-                    summary = "\n".join([
-                        f"- {item.get('summary', 'No summary available')}"
-                        for item in json_data if not item.get('error', False)
-                    ])
-                    
-            except Exception as e:
-                if not silent_mode:
-                    print(f"API error, using simple extraction: {e}")
-                # Fallback to simple extraction
-                summary = "\n".join([
-                    f"- {item.get('summary', 'No summary available')}"
-                    for item in json_data if not item.get('error', False)  
-                ])
+        summary = summarize_research(json_data, silent_mode=silent_mode, priority=priority)
         
         # Ensure data directory exists
         os.makedirs("data", exist_ok=True)
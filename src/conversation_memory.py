@@ -0,0 +1,158 @@
+"""
+Conversation Memory Module for Company Research Agent
+
+Bounded per-session conversation history. The most recent turns are kept
+verbatim in a ring buffer; turns pushed out of it are folded into a compact
+rolling summary of one short line per turn, and the oldest summary lines
+are dropped in turn. Long messages (e.g. a full account plan sent as a
+reply) are clipped on the way in, so a session's history never exceeds
+its byte limit however long the conversation runs. The summary is built
+without an LLM call, so keeping it current costs no quota.
+
+ConversationMemory supports append(), len(), iteration and indexing or
+slicing over the retained turns, like the list it replaces.
+"""
+
+import re
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Union
+
+from src.settings import settings
+
+MAX_TURNS = settings.get_int("CONVERSATION_MAX_TURNS", 20)
+MAX_BYTES = settings.get_int("CONVERSATION_MAX_BYTES", 32 * 1024)
+MAX_TURN_CHARS = settings.get_int("CONVERSATION_MAX_TURN_CHARS", 4000)
+SUMMARY_CHARS = settings.get_int("CONVERSATION_SUMMARY_CHARS", 1500)
+
+# Length of one summary line and of one turn quoted in a prompt
+DIGEST_CHARS = 160
+PROMPT_TURN_CHARS = 500
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def digest(message: Dict) -> str:
+    """
+    One-line gist of a turn: its first sentence, whitespace collapsed
+
+    Args:
+        message: {"role": ..., "content": ...}
+
+    Returns:
+        "role: first sentence", at most DIGEST_CHARS long
+    """
+    text = " ".join(str(message.get("content", "")).split())
+    first = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    return _clip(f"{message.get('role', 'user')}: {first}", DIGEST_CHARS)
+
+
+def _size(message: Dict) -> int:
+    return len(message["role"]) + len(message["content"].encode("utf-8"))
+
+
+class ConversationMemory:
+    """Recent turns in a ring buffer plus a rolling summary of older turns"""
+
+    def __init__(self, max_turns: int = MAX_TURNS, max_bytes: int = MAX_BYTES,
+                 max_turn_chars: int = MAX_TURN_CHARS, summary_chars: int = SUMMARY_CHARS):
+        """
+        Args:
+            max_turns: Turns kept verbatim
+            max_bytes: Limit on the retained turns and summary together
+            max_turn_chars: Longer messages are clipped when appended
+            summary_chars: Limit on the rolling summary
+        """
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.max_turn_chars = max_turn_chars
+        self.summary_chars = summary_chars
+        self._turns: Deque[Dict] = deque()
+        self._turn_bytes = 0
+        self._summary: Deque[str] = deque()
+        self._summary_len = 0
+        self.total_turns = 0  # Turns appended since the session started
+        self.summarized_turns = 0  # Turns folded into the summary
+
+    def append(self, message: Dict) -> None:
+        """Add a turn ({"role", "content"}), folding the oldest turns into the summary if over a limit"""
+        turn = {"role": str(message.get("role", "user")),
+                "content": _clip(str(message.get("content", "")), self.max_turn_chars)}
+        self._turns.append(turn)
+        self._turn_bytes += _size(turn)
+        self.total_turns += 1
+        while len(self._turns) > 1 and (
+            len(self._turns) > self.max_turns or self.size_bytes() > self.max_bytes
+        ):
+            self._fold(self._turns.popleft())
+
+    def _fold(self, turn: Dict) -> None:
+        """Move an evicted turn into the summary, dropping the oldest summary lines over the limit"""
+        self._turn_bytes -= _size(turn)
+        line = digest(turn)
+        self._summary.append(line)
+        self._summary_len += len(line) + 1
+        self.summarized_turns += 1
+        while len(self._summary) > 1 and self._summary_len > self.summary_chars:
+            self._summary_len -= len(self._summary.popleft()) + 1
+
+    @property
+    def summary(self) -> str:
+        """Rolling summary of the turns no longer kept verbatim ("" if none)"""
+        return "\n".join(self._summary)
+
+    def size_bytes(self) -> int:
+        """Approximate size of the retained turns and summary"""
+        return self._turn_bytes + self._summary_len
+
+    def prompt_context(self, recent: int = 4) -> str:
+        """
+        History block for an LLM prompt: the rolling summary and the last turns
+
+        Bounded by summary_chars plus recent * PROMPT_TURN_CHARS, so prompts
+        stay the same size however long the conversation is.
+
+        Args:
+            recent: Number of latest turns quoted (only once there are more than two)
+
+        Returns:
+            Text for the prompt ("" at the start of a conversation)
+        """
+        parts = []
+        if self._summary:
+            parts.append(f"Earlier conversation (summary):\n{self.summary}\n")
+        if len(self._turns) > 2:
+            lines = [f"{turn['role']}: {_clip(turn['content'], PROMPT_TURN_CHARS)}"
+                     for turn in list(self._turns)[-recent:]]
+            parts.append("Recent conversation:\n" + "\n".join(lines) + "\n")
+        return "\n".join(parts)
+
+    def clear(self) -> None:
+        self._turns.clear()
+        self._summary.clear()
+        self._turn_bytes = self._summary_len = 0
+
+    def to_dict(self) -> Dict:
+        return {"summary": self.summary, "turns": list(self._turns)}
+
+    def stats(self) -> Dict:
+        return {
+            "turns": len(self._turns),
+            "total_turns": self.total_turns,
+            "summarized_turns": self.summarized_turns,
+            "summary_lines": len(self._summary),
+            "bytes": self.size_bytes(),
+            "max_bytes": self.max_bytes
+        }
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._turns)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict, List[Dict]]:
+        if isinstance(index, slice):
+            return list(self._turns)[index]
+        return self._turns[index]
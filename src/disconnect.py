@@ -0,0 +1,67 @@
+"""
+Client Disconnect Module for Company Research Agent
+
+Stops request work nobody will read. cancel_on_disconnect() runs a
+handler's work as a task and polls the client connection while it runs;
+when the client goes away the task is cancelled. Cancellation travels down
+the whole task tree: research joined through a single-flight keeps running
+only while another waiter (another request, a background refresh or a
+pre-warm run) still needs it, and LLM calls and page downloads on the
+shared HTTP session are closed instead of running to the end.
+"""
+
+import asyncio
+from typing import Awaitable, TypeVar
+
+from src.metrics import requests_cancelled
+from src.settings import settings
+
+T = TypeVar("T")
+
+# How often a running request checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = settings.get_float("DISCONNECT_POLL_SECONDS", 0.5)
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client disconnected before its request finished"""
+
+    def __init__(self, endpoint: str):
+        super().__init__(f"Client disconnected during {endpoint}")
+        self.endpoint = endpoint
+
+
+async def cancel_on_disconnect(request, work: Awaitable[T], endpoint: str,
+                               poll_interval: float = DISCONNECT_POLL_SECONDS) -> T:
+    """
+    Await work, cancelling it if the client disconnects first
+
+    Args:
+        request: The incoming request (anything with an async is_disconnected())
+        work: Coroutine doing the request's work
+        endpoint: Endpoint name for logs and the requests_cancelled metric
+        poll_interval: Seconds between connection checks
+
+    Returns:
+        The work's result
+
+    Raises:
+        ClientDisconnected: If the client went away and the work was cancelled
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                break
+    except asyncio.CancelledError:
+        # The server is cancelling this request; take the work down with it
+        task.cancel()
+        raise
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    requests_cancelled.inc(endpoint=endpoint)
+    print(f"🔌 Client disconnected; cancelled {endpoint} request")
+    raise ClientDisconnected(endpoint)
@@ -0,0 +1,34 @@
+"""
+HTTP Client Module for Company Research Agent
+
+Shared aiohttp session for outbound requests made from the event loop (LLM
+completions and page downloads). Unlike a blocking requests call run in an
+executor, an awaited aiohttp request stops as soon as its task is
+cancelled, so work abandoned by a disconnected client does not keep
+running upstream. aiohttp is imported on first use to keep startup fast.
+"""
+
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+_session: Optional["aiohttp.ClientSession"] = None
+
+
+def get_session() -> "aiohttp.ClientSession":
+    """Return the shared session, creating it on first use (timeouts are set per request)"""
+    import aiohttp
+
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession()
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared session (call on application shutdown)"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,230 @@
+"""
+Local Intent Classifier Module for Company Research Agent
+
+A CPU-only, rule-based classifier for the obvious cases that would otherwise
+need a full LLM round-trip just to decide what the user wants: research
+requests ("research X", "tell me about X"), questions about the company
+already loaded, greetings, help and status requests. Each result carries a
+confidence; callers fall back to the LLM when it is low.
+
+Every routing decision is recorded with its latency so the rules and the
+threshold can be tuned from real traffic.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Optional
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+CONFIDENCE_THRESHOLD = settings.get_float("INTENT_CONFIDENCE_THRESHOLD", 0.8)
+
+RESEARCH_PATTERNS = [
+    r"^(?:can you |could you |please )*(?:research|look up|look into|investigate|analy[sz]e)\s+(?P<company>.+)$",
+    r"^(?:can you |could you |please )*tell me (?:about|more about)\s+(?P<company>.+)$",
+    r"^(?:i\s+)?(?:want|wanna|would like|need)\s+to\s+(?:know|learn)\s+(?:about|more about)\s+(?P<company>.+)$",
+    r"^(?:please\s+)?(?:create|generate|make|build|write)\s+(?:an?\s+)?(?:account\s+)?plan\s+(?:for|about|on)\s+(?P<company>.+)$",
+    r"^(?:i\s+)?(?:need|want)\s+(?:an?\s+)?(?:account\s+)?plan\s+(?:for|about|on)\s+(?P<company>.+)$",
+    r"^(?:information|info|details)\s+(?:on|about)\s+(?P<company>.+)$",
+]
+
+# Objects of "tell me about ..." that are topics, not companies
+GENERIC_TOPICS = {
+    "it", "them", "this", "that", "this company", "that company", "the company", "they",
+    "something", "anything", "everything", "stuff", "things", "a company", "companies",
+    "business", "businesses", "the corporate world", "corporate world", "the market",
+    "the stock market", "stocks", "yourself", "you", "what you can do", "your capabilities",
+}
+
+# Captures starting like this ("their products", "the challenges", "your plan") are
+# topics or references to the loaded company, never a new company name
+REFERENCE_START = re.compile(
+    r"^(?:the|a|an|this|that|these|those|their|theirs|they|them|its|it|his|her|your|my|our)\b"
+)
+POSSESSIVE = re.compile(r"\w['’]s\b")
+
+PRONOUN_REFERENCES = re.compile(r"\b(?:they|them|their|theirs|it|its|the company|this company)\b")
+
+QUESTION_START = re.compile(
+    r"^(?:what|who|whom|whose|which|when|where|why|how|does|do|did|is|are|was|were|can|could|should|will|would|has|have)\b"
+)
+
+COMPANY_TOPICS = re.compile(
+    r"\b(?:products?|services?|revenue|profit|earnings|ceo|cfo|founder|leadership|executives?|"
+    r"management|competitors?|competition|challenges?|risks?|opportunit(?:y|ies)|strategy|"
+    r"market share|customers?|headquarters|employees|news|funding|valuation|growth)\b"
+)
+
+GREETING = re.compile(
+    r"^(?:hi|hello|hey|hiya|howdy|yo|good (?:morning|afternoon|evening)|greetings)(?:\s+there)?[\s!.,]*$"
+)
+# Bare acknowledgements ("ok", "great", "perfect") often answer a question the
+# agent just asked, so they only count as thanks alongside an actual thank-you
+THANKS = re.compile(
+    r"^(?:(?:ok(?:ay)?|great|awesome|perfect|cool|nice)[\s!.,]+)?"
+    r"(?:thanks|thank you|thx|ty|cheers|many thanks)(?: (?:a lot|so much|very much))?[\s!.,]*$"
+)
+HELP = re.compile(r"^(?:help|\?|what can you do\??|how does this work\??|what do you do\??)[\s!.]*$")
+STATUS = re.compile(r"^(?:status|progress|what(?:'s| is) (?:your )?(?:status|progress)|what(?:'s| is) happening(?: now)?)[\s?!.]*$")
+
+
+class IntentResult:
+    """Outcome of local classification"""
+
+    __slots__ = ("intent", "company", "confidence")
+
+    def __init__(self, intent: str, confidence: float, company: Optional[str] = None):
+        self.intent = intent          # research | answer | greeting | thanks | help | status | unknown
+        self.company = company
+        self.confidence = confidence
+
+    def is_confident(self, threshold: float = CONFIDENCE_THRESHOLD) -> bool:
+        return self.intent != "unknown" and self.confidence >= threshold
+
+
+def _clean_company(raw: str) -> Optional[str]:
+    """Trim trailing filler from a captured company name; None if it is not a company"""
+    company = raw.strip(" ?!.,'\"")
+    company = re.sub(r"\s+(?:please|for me|now|today|thanks|thank you)$", "", company)
+    company = re.sub(r"^(?:the\s+)?company\s+(?:called|named)\s+", "", company)
+    if not company or company in GENERIC_TOPICS:
+        return None
+    # "their products", "tesla's ceo", "the challenges": a topic, not a company to research
+    if REFERENCE_START.match(company) or POSSESSIVE.search(company) or COMPANY_TOPICS.search(company):
+        return None
+    # Long captures are usually sentences, not names
+    if len(company.split()) > 5:
+        return None
+    return company
+
+
+def classify_intent(user_input: str, current_company: Optional[str] = None,
+                    has_research: bool = False) -> IntentResult:
+    """
+    Classify a message without calling an LLM
+
+    Args:
+        user_input: Raw user message
+        current_company: Company currently loaded in the agent, if any
+        has_research: True if research data for current_company is available
+
+    Returns:
+        IntentResult; intent "unknown" (confidence 0) when no rule applies
+    """
+    text = " ".join(user_input.lower().split())
+
+    if GREETING.match(text):
+        return IntentResult("greeting", 0.95)
+    if THANKS.match(text):
+        return IntentResult("thanks", 0.9)
+    if HELP.match(text):
+        return IntentResult("help", 0.95)
+    if STATUS.match(text):
+        return IntentResult("status", 0.9)
+
+    for pattern in RESEARCH_PATTERNS:
+        match = re.match(pattern, text)
+        if not match:
+            continue
+        company = _clean_company(match.group("company"))
+        if company:
+            if current_company and has_research and company == current_company.lower():
+                # Asking again about the loaded company reuses its cached plan
+                return IntentResult("research", 0.9, current_company)
+            return IntentResult("research", 0.95, _title_case(company))
+        captured = match.group("company")
+        if current_company and has_research and (
+            PRONOUN_REFERENCES.search(captured)
+            or COMPANY_TOPICS.search(captured)
+            or current_company.lower() in captured
+        ):
+            # A follow-up about the loaded company is answered from its research
+            return IntentResult("answer", 0.85)
+        # Anything else ("your plan", ...) is left to the LLM
+        return IntentResult("unknown", 0.0)
+
+    # Questions about the company we already researched
+    if current_company and has_research:
+        mentions_company = current_company.lower() in text
+        is_question = text.endswith("?") or bool(QUESTION_START.match(text))
+        refers_back = mentions_company or bool(PRONOUN_REFERENCES.search(text))
+        on_topic = bool(COMPANY_TOPICS.search(text))
+        if is_question and refers_back and on_topic:
+            return IntentResult("answer", 0.9)
+        if is_question and (refers_back or on_topic):
+            return IntentResult("answer", 0.7)
+
+    return IntentResult("unknown", 0.0)
+
+
+def _title_case(company: str) -> str:
+    # Keep tokens like "eightfold.ai" or "3m" readable while capitalizing words
+    return " ".join(word[:1].upper() + word[1:] for word in company.split())
+
+
+class IntentDecisionLog:
+    """Recent routing decisions and aggregate counters for tuning the classifier"""
+
+    def __init__(self, maxlen: int = 500):
+        self.recent = deque(maxlen=maxlen)
+        self.counts = Counter()
+        self.latency_total = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, user_input: str, source: str, intent: str, confidence: float,
+               latency_seconds: float, company: Optional[str] = None) -> None:
+        """
+        Record one routing decision
+
+        Only the message's length is kept: the log is served by a public
+        endpoint and must not expose what users of other sessions typed.
+
+        Args:
+            user_input: The message that was routed
+            source: "local" (classifier decided) or "llm" (fell back to the LLM)
+            intent: Intent that was acted on
+            confidence: Local classifier confidence for the message
+            latency_seconds: Time taken to reach the decision
+            company: Company extracted for research intents
+        """
+        entry = {
+            "timestamp": time.time(),
+            "input_chars": len(user_input),
+            "source": source,
+            "intent": intent,
+            "confidence": round(confidence, 3),
+            "company": company,
+            "latency_ms": round(latency_seconds * 1000, 3)
+        }
+        with self._lock:
+            self.recent.append(entry)
+            self.counts[(source, intent)] += 1
+            self.latency_total[source] += latency_seconds
+        logger.info("intent route source=%s intent=%s confidence=%.2f latency_ms=%.3f company=%s",
+                    source, intent, confidence, entry["latency_ms"], company)
+
+    def stats(self) -> Dict:
+        """Decision counts by source and intent, mean latency per source and recent decisions"""
+        with self._lock:
+            per_source = Counter()
+            for (source, _intent), count in self.counts.items():
+                per_source[source] += count
+            total = sum(per_source.values())
+            return {
+                "decisions": total,
+                "local_ratio": round(per_source["local"] / total, 4) if total else 0.0,
+                "by_intent": {f"{source}:{intent}": count for (source, intent), count in self.counts.items()},
+                "mean_latency_ms": {
+                    source: round(self.latency_total[source] / count * 1000, 3)
+                    for source, count in per_source.items()
+                },
+                "recent": list(self.recent)[-50:]
+            }
+
+
+# Shared decision log
+intent_log = IntentDecisionLog()
@@ -0,0 +1,219 @@
+"""
+LLM Response Cache Module for Company Research Agent
+
+Caches LLM completions keyed by a hash of (model, system prompt, user prompt,
+parameters). Lookups hit an in-memory LRU first, then a size-limited disk
+store under data/llm_cache.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from src.settings import settings
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU + disk) cache for deterministic LLM responses"""
+
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[str] = "data/llm_cache",
+                 max_disk_bytes: int = 50 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._disk_index = None  # key -> size in bytes, built lazily on first disk access
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "skipped": 0,
+            "bytes_saved": 0
+        }
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str, params: Optional[Dict] = None) -> str:
+        """
+        Build a stable cache key for an LLM call
+
+        Args:
+            model: Model identifier
+            system_prompt: System message content
+            user_prompt: User message content
+            params: Additional generation parameters (temperature, max_tokens, ...)
+
+        Returns:
+            Hex digest identifying the call
+        """
+        material = json.dumps(
+            {
+                "model": model,
+                "system": system_prompt,
+                "user": user_prompt,
+                "params": params or {}
+            },
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss"""
+        return self.get_any([key])
+
+    def get_any(self, keys: List[str]) -> Optional[str]:
+        """
+        Return the response cached under the first of several keys that has one
+
+        Used when any of several models may have answered the same prompt.
+        A lookup that finds none counts as one miss.
+        """
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    value = self._memory[key]
+                    self._stats["memory_hits"] += 1
+                    self._stats["bytes_saved"] += len(value.encode("utf-8"))
+                    return value
+            for key in keys:
+                value = self._read_disk(key)
+                if value is not None:
+                    self._remember(key, value)
+                    self._stats["disk_hits"] += 1
+                    self._stats["bytes_saved"] += len(value.encode("utf-8"))
+                    return value
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response in both tiers"""
+        with self._lock:
+            self._remember(key, value)
+            self._write_disk(key, value)
+
+    def record_skip(self) -> None:
+        """Count a call that bypassed the cache"""
+        with self._lock:
+            self._stats["skipped"] += 1
+
+    def clear(self) -> None:
+        """Drop every cached response from memory and disk"""
+        with self._lock:
+            self._memory.clear()
+            self._load_disk_index()
+            for key in list(self._disk_index):
+                self._remove_disk(key)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and tier sizes"""
+        with self._lock:
+            self._load_disk_index()
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            lookups = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk_index),
+                "disk_bytes": self._disk_bytes
+            }
+
+    # Internal helpers (callers must hold the lock)
+
+    def _remember(self, key: str, value: str) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _load_disk_index(self) -> None:
+        if self._disk_index is not None:
+            return
+        self._disk_index = {}
+        self._disk_bytes = 0
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return
+        for filename in os.listdir(self.disk_dir):
+            if filename.endswith(".json"):
+                size = os.path.getsize(os.path.join(self.disk_dir, filename))
+                self._disk_index[filename[:-5]] = size
+                self._disk_bytes += size
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        self._load_disk_index()
+        if key not in self._disk_index:
+            return None
+        try:
+            path = self._path(key)
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)["response"]
+            # Touch the file so disk eviction follows recency of use
+            os.utime(path, None)
+            return value
+        except (OSError, ValueError, KeyError):
+            self._remove_disk(key)
+            return None
+
+    def _write_disk(self, key: str, value: str) -> None:
+        if not self.disk_dir:
+            return
+        self._load_disk_index()
+        content = json.dumps({"response": value}, ensure_ascii=False)
+        size = len(content.encode("utf-8"))
+        if size > self.max_disk_bytes:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            with open(self._path(key), "w", encoding="utf-8") as f:
+                f.write(content)
+        except OSError:
+            return
+        self._disk_bytes += size - self._disk_index.get(key, 0)
+        self._disk_index[key] = size
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        # Oldest-used files go first
+        by_age = sorted(
+            self._disk_index,
+            key=lambda k: os.path.getmtime(self._path(k)) if os.path.exists(self._path(k)) else 0
+        )
+        for key in by_age:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            self._remove_disk(key)
+
+    def _remove_disk(self, key: str) -> None:
+        size = self._disk_index.pop(key, 0)
+        self._disk_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+# Shared cache used by generate_chat_response
+response_cache = LLMResponseCache(
+    max_entries=settings.get_int("LLM_CACHE_MAX_ENTRIES", 256),
+    disk_dir=settings.get("LLM_CACHE_DIR", "data/llm_cache"),
+    max_disk_bytes=settings.get_int("LLM_CACHE_MAX_DISK_MB", 50) * 1024 * 1024
+)
+
+
+def get_cache_stats() -> Dict:
+    """Return statistics for the shared LLM response cache"""
+    return response_cache.stats()
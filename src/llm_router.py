@@ -0,0 +1,432 @@
+"""
+LLM Provider Routing Module for Company Research Agent
+
+Routes each LLM task ("summarize", "generate") to the fastest healthy
+provider that can handle it. Live latency (EWMA) and error rate are tracked
+per provider and model; a circuit breaker opens after sustained failures so
+requests skip a struggling provider instead of waiting out its timeout.
+
+All remote providers speak the OpenAI-compatible chat completions API. A
+local stand-in provider (LLM_LOCAL_PROVIDER=1) answers without any network
+access so the pipeline can run offline; it is only used when no remote
+provider is available.
+
+Async callers (acomplete) send requests on the shared aiohttp session, so
+cancelling the calling task, e.g. when the HTTP client disconnects, stops
+the outbound call instead of leaving it to finish in a thread.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from src.settings import settings
+from src.http_client import get_session
+from src.llm_scheduler import Priority, estimate_tokens, llm_scheduler
+from src.metrics import llm_calls, llm_in_flight, llm_latency, llm_tokens
+from src.tracing import span
+
+LOCAL_PROVIDER = "local"
+
+
+class RouterError(Exception):
+    """Raised when no provider could complete a task"""
+
+
+class ProviderConfig:
+    """Static description of a provider and the models it serves per task"""
+
+    def __init__(self, name: str, base_url: str, api_key_env: Optional[str], models: Dict[str, str],
+                 expected_latency: Dict[str, float], fallback_only: bool = False, streaming: bool = True):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.api_key_env = api_key_env
+        self.models = models
+        self.expected_latency = expected_latency  # Per-task prior used until real samples exist
+        self.fallback_only = fallback_only
+        self.streaming = streaming
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return settings.get(self.api_key_env) if self.api_key_env else None
+
+    def is_configured(self) -> bool:
+        if self.name == LOCAL_PROVIDER:
+            return settings.get_bool("LLM_LOCAL_PROVIDER")
+        return bool(self.api_key)
+
+
+class CircuitBreaker:
+    """Closed -> open after sustained failures -> half-open probe after a cooldown"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, error_rate_threshold: float = 0.5,
+                 window: int = 20, min_samples: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            # Let exactly one probe through
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+            return True
+        return self.state == self.CLOSED
+
+    def record(self, success: bool) -> None:
+        self.outcomes.append(success)
+        if success:
+            self.consecutive_failures = 0
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                self.outcomes.clear()
+            return
+        self.consecutive_failures += 1
+        sustained = (
+            self.consecutive_failures >= self.failure_threshold
+            or (len(self.outcomes) >= self.min_samples and self.error_rate() >= self.error_rate_threshold)
+        )
+        if self.state == self.HALF_OPEN or sustained:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.probe_in_flight = False
+
+    def release(self) -> None:
+        """Give back a half-open probe whose call ended without an outcome"""
+        if self.state == self.HALF_OPEN:
+            self.probe_in_flight = False
+
+
+class RouteHealth:
+    """Live latency and breaker for one provider/model/task combination"""
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self.latency = 0.0
+        self.samples = 0
+        self.calls = 0
+        self.failures = 0
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.get_int("LLM_BREAKER_FAILURES", 3),
+            cooldown=settings.get_float("LLM_BREAKER_COOLDOWN_SECONDS", 30)
+        )
+
+    def record(self, success: bool, latency: float) -> None:
+        self.calls += 1
+        if success:
+            # Exponentially weighted moving average of successful call latency
+            self.latency = latency if self.samples == 0 else (
+                self.alpha * latency + (1 - self.alpha) * self.latency
+            )
+            self.samples += 1
+        else:
+            self.failures += 1
+            # Failures count as slow so a flaky provider also sorts later
+            penalty = max(latency, self.latency * 2, 1.0)
+            self.latency = self.alpha * penalty + (1 - self.alpha) * self.latency
+        self.breaker.record(success)
+
+    def read_timeout(self) -> float:
+        """Adaptive read timeout: generous until latency is known, then ~3x typical"""
+        if self.samples < 5:
+            return 30.0
+        return max(10.0, min(30.0, self.latency * 3))
+
+
+class Route:
+    """A concrete provider/model choice for a task"""
+
+    def __init__(self, provider: ProviderConfig, model: str, health: RouteHealth):
+        self.provider = provider
+        self.model = model
+        self.health = health
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider.name}/{self.model}"
+
+
+class LLMRouter:
+    """Chooses providers per task and tracks their health"""
+
+    def __init__(self, providers: List[ProviderConfig]):
+        self.providers = {provider.name: provider for provider in providers}
+        self._health: Dict[Tuple[str, str, str], RouteHealth] = {}
+        self._lock = threading.Lock()
+
+    def _health_for(self, provider: ProviderConfig, model: str, task: str) -> RouteHealth:
+        # Latency is tracked per task: summarization prompts are far larger than chat prompts
+        key = (provider.name, model, task)
+        if key not in self._health:
+            self._health[key] = RouteHealth()
+        return self._health[key]
+
+    def route(self, task: str, streaming: bool = False) -> List[Route]:
+        """
+        Candidate routes for a task, fastest healthy first
+
+        Args:
+            task: Task name ("summarize" or "generate")
+            streaming: Only include providers that can stream
+
+        Returns:
+            Ordered list of routes whose circuit breaker currently allows traffic
+        """
+        with self._lock:
+            primary, fallback = [], []
+            for provider in self.providers.values():
+                model = provider.models.get(task)
+                if not model or not provider.is_configured():
+                    continue
+                if streaming and not provider.streaming:
+                    continue
+                health = self._health_for(provider, model, task)
+                if health.breaker.state == CircuitBreaker.OPEN and \
+                        time.monotonic() - health.breaker.opened_at < health.breaker.cooldown:
+                    continue
+                (fallback if provider.fallback_only else primary).append(Route(provider, model, health))
+            primary.sort(key=lambda route: route.health.latency if route.health.calls
+                          else route.provider.expected_latency.get(task, 1.0))
+            return primary + fallback
+
+    def admit(self, route: Route) -> bool:
+        """Check (and claim) the route's circuit breaker before calling it"""
+        with self._lock:
+            return route.health.breaker.allow()
+
+    def record(self, route: Route, success: bool, latency: float) -> None:
+        """Record the outcome of a call made on a route"""
+        with self._lock:
+            route.health.record(success, latency)
+        provider = route.provider.name
+        llm_latency.observe(latency, provider=provider)
+        llm_calls.inc(provider=provider, model=route.model, outcome="success" if success else "failure")
+
+    def abandon(self, route: Route) -> None:
+        """Release a route claimed by admit() whose call was cancelled; not counted against it"""
+        with self._lock:
+            route.health.breaker.release()
+        llm_calls.inc(provider=route.provider.name, model=route.model, outcome="cancelled")
+
+    def complete(self, task: str, system_prompt: str, user_prompt: str, params: Optional[Dict] = None,
+                 priority: Priority = Priority.INTERACTIVE, flow: Optional[str] = None) -> Tuple[str, Route]:
+        """
+        Run a chat completion on the best available provider, failing over in order
+
+        Blocks the calling thread; async callers should use acomplete().
+
+        Args:
+            task: Task name used to pick providers and models
+            system_prompt: System message content
+            user_prompt: User message content
+            params: Extra payload fields (temperature, max_tokens, ...)
+            priority: Scheduler priority class
+            flow: Scheduler fairness key
+
+        Returns:
+            tuple: (completion text, route that served it)
+
+        Raises:
+            RouterError: If every candidate failed or none is available
+        """
+        params = params or {}
+        tokens = estimate_tokens(system_prompt, user_prompt, completion_tokens=params.get("max_tokens", 1000))
+        errors = []
+        for route in self.route(task):
+            if not self.admit(route):
+                continue
+            slot = None
+            if route.provider.name != LOCAL_PROVIDER:
+                slot = llm_scheduler.acquire(route.provider.name, priority, tokens, flow)
+            # Time only the provider call, not the wait for a scheduler slot
+            start = time.perf_counter()
+            try:
+                content = self._call(route, task, system_prompt, user_prompt, params, slot)
+            except Exception as e:
+                self.record(route, False, time.perf_counter() - start)
+                errors.append(f"{route.name}: {e}")
+                continue
+            self.record(route, True, time.perf_counter() - start)
+            return content, route
+        raise RouterError("; ".join(errors) or f"No LLM provider available for task '{task}'")
+
+    async def acomplete(self, task: str, system_prompt: str, user_prompt: str, params: Optional[Dict] = None,
+                        priority: Priority = Priority.INTERACTIVE, flow: Optional[str] = None) -> Tuple[str, Route]:
+        """
+        Async variant of complete(): waits for slots without a thread
+
+        Cancelling the caller cancels the provider request in flight.
+        """
+        params = params or {}
+        tokens = estimate_tokens(system_prompt, user_prompt, completion_tokens=params.get("max_tokens", 1000))
+        errors = []
+        for route in self.route(task):
+            if not self.admit(route):
+                continue
+            try:
+                slot = None
+                if route.provider.name != LOCAL_PROVIDER:
+                    slot = await llm_scheduler.acquire_async(route.provider.name, priority, tokens, flow)
+                start = time.perf_counter()
+                try:
+                    with span("llm_call", route=route.name, task=task):
+                        content = await self._acall(route, task, system_prompt, user_prompt, params, slot)
+                except Exception as e:
+                    self.record(route, False, time.perf_counter() - start)
+                    errors.append(f"{route.name}: {e}")
+                    continue
+            except asyncio.CancelledError:
+                # Nobody needs the answer any more; that says nothing about the provider
+                self.abandon(route)
+                raise
+            self.record(route, True, time.perf_counter() - start)
+            return content, route
+        raise RouterError("; ".join(errors) or f"No LLM provider available for task '{task}'")
+
+    def _call(self, route: Route, task: str, system_prompt: str, user_prompt: str, params: Dict, slot) -> str:
+        """Send one completion request to the route's provider"""
+        with llm_in_flight.track(provider=route.provider.name):
+            return self._send(route, task, system_prompt, user_prompt, params, slot)
+
+    async def _acall(self, route: Route, task: str, system_prompt: str, user_prompt: str, params: Dict, slot) -> str:
+        """Send one completion request to the route's provider without blocking the event loop"""
+        with llm_in_flight.track(provider=route.provider.name):
+            if route.provider.name == LOCAL_PROVIDER:
+                return _local_completion(task, user_prompt, params)
+            return await self._asend(route, system_prompt, user_prompt, params, slot)
+
+    def _send(self, route: Route, task: str, system_prompt: str, user_prompt: str, params: Dict, slot) -> str:
+        if route.provider.name == LOCAL_PROVIDER:
+            return _local_completion(task, user_prompt, params)
+
+        url, headers, payload = self._request(route, system_prompt, user_prompt, params)
+        response = requests.post(
+            url,
+            headers=headers,
+            json=payload,
+            # Fail fast on connect; read timeout adapts to observed latency
+            timeout=(5, route.health.read_timeout())
+        )
+        response.raise_for_status()
+        return self._parse_response(route, response.json(), slot)
+
+    async def _asend(self, route: Route, system_prompt: str, user_prompt: str, params: Dict, slot) -> str:
+        import aiohttp
+
+        url, headers, payload = self._request(route, system_prompt, user_prompt, params)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=route.health.read_timeout())
+        async with get_session().post(url, headers=headers, json=payload, timeout=timeout) as response:
+            response.raise_for_status()
+            response_data = await response.json(content_type=None)
+        return self._parse_response(route, response_data, slot)
+
+    @staticmethod
+    def _request(route: Route, system_prompt: str, user_prompt: str, params: Dict) -> Tuple[str, Dict, Dict]:
+        """URL, headers and payload of a chat completion request"""
+        payload = {
+            "model": route.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            **params
+        }
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Authorization": f"Bearer {route.provider.api_key}"
+        }
+        return f"{route.provider.base_url}/chat/completions", headers, payload
+
+    @staticmethod
+    def _parse_response(route: Route, response_data: Dict, slot) -> str:
+        """Record token usage and return the completion text"""
+        usage = response_data.get("usage") or {}
+        slot.record_usage(usage.get("total_tokens"))
+        for kind in ("prompt", "completion"):
+            if usage.get(f"{kind}_tokens"):
+                llm_tokens.inc(usage[f"{kind}_tokens"], provider=route.provider.name, type=kind)
+        return response_data['choices'][0]['message']['content']
+
+    def status(self) -> Dict:
+        """Latency, error rate and breaker state per provider/model"""
+        with self._lock:
+            report = {}
+            for (provider_name, model, task), health in self._health.items():
+                report[f"{provider_name}/{model}:{task}"] = {
+                    "configured": self.providers[provider_name].is_configured(),
+                    "breaker": health.breaker.state,
+                    "latency_ewma_seconds": round(health.latency, 3),
+                    "error_rate": round(health.breaker.error_rate(), 3),
+                    "calls": health.calls,
+                    "failures": health.failures
+                }
+            return report
+
+
+def _local_completion(task: str, user_prompt: str, params: Dict) -> str:
+    """
+    Offline stand-in: a deterministic extractive answer built from the prompt
+
+    Good enough to exercise the whole pipeline without network access.
+    """
+    # Keep the context part of the prompt when present
+    match = re.search(r"Context:(.*?)(?:\nQuery:|$)", user_prompt, re.DOTALL)
+    text = match.group(1) if match else user_prompt
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", " ".join(text.split())) if len(s.strip()) > 20]
+    limit = 12 if task == "summarize" else 4
+    points = sentences[:limit] or ["No information available in the provided context."]
+    return "\n".join(f"- {point}" for point in points)
+
+
+# Provider table; base URLs can be overridden to point at proxies or local stand-ins
+llm_router = LLMRouter([
+    ProviderConfig(
+        "groq",
+        settings.get("GROQ_API_BASE", "https://api.groq.com/openai/v1"),
+        "GROQ_API_KEY",
+        {"summarize": "llama-3.1-8b-instant", "generate": "llama-3.1-8b-instant"},
+        # Priors keep today's defaults: Groq summarizes, Mistral generates
+        expected_latency={"summarize": 1.0, "generate": 2.0}
+    ),
+    ProviderConfig(
+        "mistral",
+        settings.get("MISTRAL_API_BASE", "https://api.mistral.ai/v1"),
+        "MISTRAL_API_KEY",
+        {"summarize": "mistral-small-latest", "generate": "mistral-small-latest"},
+        expected_latency={"summarize": 2.0, "generate": 1.0}
+    ),
+    ProviderConfig(
+        LOCAL_PROVIDER,
+        "",
+        None,
+        {"summarize": "extractive", "generate": "extractive"},
+        expected_latency={"summarize": 0.0, "generate": 0.0},
+        fallback_only=True,
+        streaming=False
+    )
+])
@@ -0,0 +1,309 @@
+"""
+LLM Request Scheduler Module for Company Research Agent
+
+Every LLM call acquires a slot from the shared scheduler before it is sent.
+The scheduler enforces per-provider token buckets (requests and tokens per
+minute), admits interactive traffic ahead of background generation, and
+round-robins between flows (e.g. companies) within a priority class so one
+large job cannot starve the others. Threads wait on a condition and async
+callers on an asyncio.Event; both are woken whenever the queue head or the
+buckets change, so nobody polls.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Dict, Optional, Set, Tuple
+from src.settings import settings
+
+
+class Priority(IntEnum):
+    """Priority classes (lower value is admitted first)"""
+    INTERACTIVE = 0  # A user is waiting on this response
+    BACKGROUND = 1   # Bulk plan generation, summarization, pre-warming
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at capacity per minute"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)"""
+        self._refill()
+        # Requests larger than the whole bucket only wait for a full bucket
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Remove tokens; the level may go negative to account for large requests"""
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        """Return unused tokens (e.g. when an estimate was too high)"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _Ticket:
+    """A queued request for a slot"""
+
+    __slots__ = ("provider", "priority", "flow", "tokens", "enqueued", "seq")
+
+    def __init__(self, provider: str, priority: Priority, flow: str, tokens: int, seq: int):
+        self.provider = provider
+        self.priority = priority
+        self.flow = flow
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.seq = seq
+
+
+class Slot:
+    """An admitted LLM call; report real usage so the token bucket stays accurate"""
+
+    def __init__(self, scheduler: "LLMScheduler", ticket: _Ticket, wait_seconds: float):
+        self._scheduler = scheduler
+        self.provider = ticket.provider
+        self.priority = ticket.priority
+        self.estimated_tokens = ticket.tokens
+        self.wait_seconds = wait_seconds
+
+    def record_usage(self, total_tokens: Optional[int]) -> None:
+        """Correct the token bucket with the provider-reported token count"""
+        if total_tokens is None:
+            return
+        self._scheduler._adjust_tokens(self.provider, total_tokens - self.estimated_tokens)
+        self.estimated_tokens = total_tokens
+
+
+class _ProviderState:
+    """Buckets, queues and metrics for one provider"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        # priority -> flow -> deque of tickets; flow order rotates for fairness
+        self.queues = {priority: {} for priority in Priority}
+        self.flow_order = {priority: deque() for priority in Priority}
+        self.admitted = {priority.name.lower(): 0 for priority in Priority}
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=500)
+
+    def head(self) -> Optional[_Ticket]:
+        for priority in Priority:
+            order = self.flow_order[priority]
+            if order:
+                return self.queues[priority][order[0]][0]
+        return None
+
+    def enqueue(self, ticket: _Ticket) -> None:
+        flows = self.queues[ticket.priority]
+        if ticket.flow not in flows:
+            flows[ticket.flow] = deque()
+            self.flow_order[ticket.priority].append(ticket.flow)
+        flows[ticket.flow].append(ticket)
+
+    def remove(self, ticket: _Ticket, served: bool) -> None:
+        flows = self.queues[ticket.priority]
+        order = self.flow_order[ticket.priority]
+        queue = flows.get(ticket.flow)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        if not queue:
+            del flows[ticket.flow]
+            order.remove(ticket.flow)
+        elif served and order and order[0] == ticket.flow:
+            # Served flow goes to the back of its class so other flows get a turn
+            order.rotate(-1)
+
+    def depth(self) -> Dict[str, int]:
+        return {
+            priority.name.lower(): sum(len(q) for q in self.queues[priority].values())
+            for priority in Priority
+        }
+
+
+class LLMScheduler:
+    """Central admission point for all LLM calls"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]]):
+        """
+        Args:
+            limits: provider -> (requests per minute, tokens per minute)
+        """
+        self._providers = {
+            name: _ProviderState(rpm, tpm) for name, (rpm, tpm) in limits.items()
+        }
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._async_waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def _notify(self) -> None:
+        """Wake every waiting thread and coroutine so each re-checks admission (caller holds lock)"""
+        self._cond.notify_all()
+        for loop, event in list(self._async_waiters):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The waiter's loop is closed; it is removed when its acquire ends
+                pass
+
+    def _state(self, provider: str) -> _ProviderState:
+        if provider not in self._providers:
+            # Unknown providers get generous defaults rather than failing the call
+            self._providers[provider] = _ProviderState(600, 1_000_000)
+        return self._providers[provider]
+
+    def _enqueue(self, provider: str, priority: Priority, flow: Optional[str], tokens: int) -> _Ticket:
+        with self._cond:
+            ticket = _Ticket(provider, Priority(priority), flow or "default", max(int(tokens), 1), next(self._seq))
+            self._state(provider).enqueue(ticket)
+            return ticket
+
+    def _try_admit(self, ticket: _Ticket) -> Tuple[bool, Optional[float]]:
+        """Admit the ticket if it is at the head and both buckets allow it (caller holds lock)"""
+        state = self._state(ticket.provider)
+        if state.head() is not ticket:
+            return False, None
+        wait = max(state.requests.wait_time(1), state.tokens.wait_time(ticket.tokens))
+        if wait > 0:
+            return False, wait
+        state.requests.take(1)
+        state.tokens.take(ticket.tokens)
+        state.remove(ticket, served=True)
+
+        waited = time.monotonic() - ticket.enqueued
+        state.admitted[ticket.priority.name.lower()] += 1
+        state.total_wait += waited
+        state.max_wait = max(state.max_wait, waited)
+        state.recent_waits.append(waited)
+        if waited > 0.01:
+            state.throttled += 1
+        self._notify()
+        return True, waited
+
+    def _abandon(self, ticket: _Ticket) -> None:
+        with self._cond:
+            self._state(ticket.provider).remove(ticket, served=False)
+            self._notify()
+
+    def _adjust_tokens(self, provider: str, delta: int) -> None:
+        with self._cond:
+            bucket = self._state(provider).tokens
+            if delta > 0:
+                bucket.take(delta)
+            elif delta < 0:
+                bucket.give(-delta)
+            self._notify()
+
+    def acquire(self, provider: str, priority: Priority = Priority.INTERACTIVE,
+                tokens: int = 1000, flow: Optional[str] = None) -> Slot:
+        """
+        Block the calling thread until the call may be sent
+
+        Args:
+            provider: Provider name (e.g. "mistral", "groq")
+            priority: Priority class of the call
+            tokens: Estimated prompt + completion tokens
+            flow: Fairness key (e.g. company or session); defaults to a shared flow
+
+        Returns:
+            Slot for reporting actual token usage
+        """
+        ticket = self._enqueue(provider, priority, flow, tokens)
+        try:
+            with self._cond:
+                while True:
+                    admitted, info = self._try_admit(ticket)
+                    if admitted:
+                        return Slot(self, ticket, info)
+                    self._cond.wait(timeout=info)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    async def acquire_async(self, provider: str, priority: Priority = Priority.INTERACTIVE,
+                            tokens: int = 1000, flow: Optional[str] = None) -> Slot:
+        """
+        Async variant of acquire() that waits without holding a thread
+
+        Sleeps until the tokens it needs have refilled, or until it is woken
+        because the queue head or the buckets changed.
+        """
+        ticket = self._enqueue(provider, priority, flow, tokens)
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        try:
+            while True:
+                with self._cond:
+                    admitted, info = self._try_admit(ticket)
+                    if admitted:
+                        return Slot(self, ticket, info)
+                    # Registered under the lock, so a change made after this check still wakes us
+                    waiter[1].clear()
+                    self._async_waiters.add(waiter)
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout=info)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+
+    def metrics(self) -> Dict:
+        """Queue depth, admission counts and wait times per provider"""
+        with self._cond:
+            report = {}
+            for name, state in self._providers.items():
+                admitted = sum(state.admitted.values())
+                waits = sorted(state.recent_waits)
+                report[name] = {
+                    "queue_depth": state.depth(),
+                    "admitted": dict(state.admitted),
+                    "throttled": state.throttled,
+                    "avg_wait_seconds": round(state.total_wait / admitted, 4) if admitted else 0.0,
+                    "p95_wait_seconds": round(waits[int(len(waits) * 0.95) - 1], 4) if waits else 0.0,
+                    "max_wait_seconds": round(state.max_wait, 4),
+                    "available_requests": round(max(state.requests.level, 0), 2),
+                    "available_tokens": round(max(state.tokens.level, 0))
+                }
+            return report
+
+
+def estimate_tokens(*texts: str, completion_tokens: int = 1000) -> int:
+    """Rough token estimate (about 4 characters per token) plus expected output"""
+    return sum(len(text or "") for text in texts) // 4 + completion_tokens
+
+
+# Shared scheduler; limits are configurable per provider
+llm_scheduler = LLMScheduler({
+    "mistral": (
+        settings.get_float("MISTRAL_REQUESTS_PER_MINUTE", 60),
+        settings.get_float("MISTRAL_TOKENS_PER_MINUTE", 500000)
+    ),
+    "groq": (
+        settings.get_float("GROQ_REQUESTS_PER_MINUTE", 30),
+        settings.get_float("GROQ_TOKENS_PER_MINUTE", 6000)
+    )
+})
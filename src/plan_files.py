@@ -0,0 +1,202 @@
+"""
+Plan File Serving Module for Company Research Agent
+
+Loads account plan files for /plan/{filename} with the metadata needed for
+HTTP caching: a strong ETag derived from the file content, Last-Modified,
+and pre-compressed gzip/brotli bodies. Loaded plans are kept in a small LRU
+keyed by path and revalidated with a stat() call, so repeat views neither
+re-read nor re-compress the file.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from src.plan_index import PLANS_DIR
+
+# Try to import optional brotli support
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+
+
+class PlanNotFound(Exception):
+    """Raised when a plan file does not exist"""
+
+
+def resolve_plan_path(filename: str, plans_dir: str = PLANS_DIR) -> str:
+    """
+    Map a requested file name to a path inside the plans directory
+
+    Raises:
+        ValueError: If the name is not a plain .md file name (e.g. "../x" or "a/b.md")
+    """
+    if not filename.endswith(".md") or os.path.basename(filename) != filename or filename.startswith("."):
+        raise ValueError(f"Invalid plan name: {filename}")
+    base = os.path.realpath(plans_dir)
+    path = os.path.realpath(os.path.join(base, filename))
+    if os.path.dirname(path) != base:
+        raise ValueError(f"Invalid plan name: {filename}")
+    return path
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the response encoding from an Accept-Encoding header
+
+    Returns:
+        "br", "gzip" or None (identity); codings with q=0 are never chosen
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for coding in (("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)):
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+class PlanFile:
+    """A loaded plan with its validators and encoded representations"""
+
+    def __init__(self, filename: str, path: str, content: bytes, mtime: float, mtime_ns: int, size: int):
+        self.filename = filename
+        self.path = path
+        self.content = content
+        self.mtime = mtime
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = hashlib.sha256(content).hexdigest()[:32]
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self._bodies: Dict = {}
+        self._lock = threading.RLock()
+
+    def etag(self, variant: str, encoding: Optional[str] = None) -> str:
+        """Strong ETag for one representation (raw markdown or JSON, per encoding)"""
+        return f'"{self.digest}-{variant}{"-" + encoding if encoding else ""}"'
+
+    def body(self, variant: str, encoding: Optional[str] = None) -> bytes:
+        """
+        Response body for a representation, built once and then reused
+
+        Args:
+            variant: "md" for the raw markdown, "json" for the JSON envelope
+            encoding: "br", "gzip" or None
+        """
+        key = (variant, encoding)
+        with self._lock:
+            if key not in self._bodies:
+                if encoding == "br":
+                    data = brotli.compress(self.body(variant))
+                elif encoding == "gzip":
+                    data = gzip.compress(self.body(variant), mtime=0)
+                elif variant == "md":
+                    data = self.content
+                else:
+                    data = json.dumps({
+                        "success": True,
+                        "filename": self.filename,
+                        "content": self.content.decode("utf-8", errors="replace")
+                    }).encode("utf-8")
+                self._bodies[key] = data
+            return self._bodies[key]
+
+    def compressible(self, variant: str) -> bool:
+        return len(self.body(variant)) >= MIN_COMPRESS_BYTES
+
+    def not_modified(self, etag: str, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """
+        Evaluate conditional request headers (If-None-Match takes precedence)
+
+        Returns:
+            True if a 304 Not Modified response should be sent
+        """
+        if if_none_match:
+            candidates = {tag.strip() for tag in if_none_match.split(",")}
+            return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.mtime) <= since
+        return False
+
+
+class PlanFileCache:
+    """LRU of loaded plans, revalidated against the file's mtime and size"""
+
+    def __init__(self, plans_dir: str = PLANS_DIR, max_entries: int = 128):
+        self.plans_dir = plans_dir
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, PlanFile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, filename: str) -> PlanFile:
+        """
+        Get a plan, reading it from disk only if it changed since the last load
+
+        Raises:
+            ValueError: For names outside the plans directory
+            PlanNotFound: If the file does not exist
+        """
+        path = resolve_plan_path(filename, self.plans_dir)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise PlanNotFound(filename)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+
+        with open(path, "rb") as f:
+            content = f.read()
+        entry = PlanFile(filename, path, content, stat.st_mtime, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            self.misses += 1
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> Dict:
+        """Loaded plan count and stat-revalidation hit/miss counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "brotli": BROTLI_AVAILABLE
+            }
+
+
+# Shared plan file cache
+plan_files = PlanFileCache()
@@ -0,0 +1,236 @@
+"""
+Plan Index Module for Company Research Agent
+
+Keeps an index of the account plan files in ./account_plans so /plans no
+longer lists and parses the whole directory on every call. Plans are added
+to the index as they are written and the index is reconciled with the
+directory at startup. The index lives in SQLite, so plans written by other
+processes (API workers, research workers) show up too, and supports
+pagination, company and date filters, a latest-per-company view and an
+incremental "since" cursor.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from src.settings import settings
+from src.company_index import normalize_company_name
+
+PLANS_DIR = "./account_plans"
+PLAN_INDEX_PATH = settings.get("PLAN_INDEX_PATH", "data/plan_index.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    filename TEXT PRIMARY KEY,
+    company TEXT NOT NULL,
+    company_key TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    created REAL NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plans_created ON plans (created);
+CREATE INDEX IF NOT EXISTS plans_company ON plans (company_key, created);
+CREATE INDEX IF NOT EXISTS plans_seq ON plans (seq);
+"""
+
+
+def parse_plan_filename(filename: str) -> Tuple[str, str]:
+    """
+    Split "account_plan_<Company_Name>_<YYYYmmdd>_<HHMMSS>.md" into its parts
+
+    Returns:
+        tuple: (company name, timestamp string); ("Unknown", "") if the name does not match
+    """
+    parts = filename.replace(".md", "").split("_")
+    company = " ".join(parts[2:-2]) if len(parts) > 2 else "Unknown"
+    timestamp = "_".join(parts[-2:]) if len(parts) > 2 else ""
+    return company, timestamp
+
+
+class PlanIndex:
+    """SQLite-backed index of generated account plans"""
+
+    def __init__(self, path: str = PLAN_INDEX_PATH, plans_dir: str = PLANS_DIR):
+        """
+        Args:
+            path: SQLite database file for the index
+            plans_dir: Directory holding the plan markdown files
+        """
+        self.path = path
+        self.plans_dir = plans_dir
+        self._lock = threading.Lock()  # Serializes writers in this process
+        self._ready = False
+        self._schema_lock = threading.Lock()
+
+    def _ensure_schema(self) -> None:
+        # The database is created on first use, not when the module is imported
+        with self._schema_lock:
+            if self._ready:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+            finally:
+                conn.close()
+            self._ready = True
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        if not self._ready:
+            self._ensure_schema()
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _entry(self, filename: str) -> Optional[Tuple]:
+        """Index row values for a plan file, or None if it is not a readable plan"""
+        path = os.path.join(self.plans_dir, filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        company, timestamp = parse_plan_filename(filename)
+        try:
+            created = datetime.strptime(timestamp, "%Y%m%d_%H%M%S").timestamp()
+        except ValueError:
+            created = stat.st_mtime
+        return (filename, company, normalize_company_name(company), timestamp,
+                created, stat.st_size, stat.st_mtime)
+
+    def _upsert(self, conn: sqlite3.Connection, entry: Tuple) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO plans (filename, company, company_key, timestamp, created, size, mtime, seq) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM plans))",
+            entry
+        )
+
+    def add(self, filename: str) -> bool:
+        """
+        Index a plan file that was just written
+
+        Args:
+            filename: Plan file name inside plans_dir
+
+        Returns:
+            True if the file exists and was indexed
+        """
+        entry = self._entry(filename)
+        if entry is None:
+            return False
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._upsert(conn, entry)
+            conn.execute("COMMIT")
+        return True
+
+    def rebuild(self) -> Dict[str, int]:
+        """
+        Reconcile the index with the plans directory
+
+        New or modified files are (re)indexed and rows for deleted files are
+        removed; unchanged files are left alone, so restarts stay cheap.
+
+        Returns:
+            Counts of added/updated and removed entries
+        """
+        try:
+            files = {f for f in os.listdir(self.plans_dir) if f.endswith(".md")}
+        except FileNotFoundError:
+            files = set()
+
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            indexed = {row["filename"]: row["mtime"] for row in conn.execute("SELECT filename, mtime FROM plans")}
+            removed = [name for name in indexed if name not in files]
+            conn.executemany("DELETE FROM plans WHERE filename = ?", [(name,) for name in removed])
+            updated = 0
+            for filename in sorted(files):
+                entry = self._entry(filename)
+                if entry and indexed.get(filename) != entry[-1]:
+                    self._upsert(conn, entry)
+                    updated += 1
+            conn.execute("COMMIT")
+        return {"indexed": updated, "removed": len(removed), "total": len(files)}
+
+    def query(self, company: Optional[str] = None, start: Optional[datetime] = None,
+              end: Optional[datetime] = None, latest_per_company: bool = False,
+              since: Optional[int] = None, limit: int = 50, offset: int = 0) -> Dict:
+        """
+        List plans, newest first
+
+        Args:
+            company: Only plans for this company (compared after normalization)
+            start: Only plans created at or after this time
+            end: Only plans created at or before this time
+            latest_per_company: Only the newest plan of each company
+            since: Only plans indexed after this cursor (from a previous response)
+            limit: Page size
+            offset: Number of matching plans to skip
+
+        Returns:
+            Dict with the page of plans, total matches and the current cursor
+        """
+        conditions, params = [], []
+        if company:
+            conditions.append("company_key = ?")
+            params.append(normalize_company_name(company))
+        if start:
+            conditions.append("created >= ?")
+            params.append(start.timestamp())
+        if end:
+            conditions.append("created <= ?")
+            params.append(end.timestamp())
+        if since:
+            conditions.append("seq > ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        source = "plans"
+        if latest_per_company:
+            source = (
+                "(SELECT * FROM plans p WHERE NOT EXISTS ("
+                "SELECT 1 FROM plans q WHERE q.company_key = p.company_key AND q.created > p.created))"
+            )
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM {source} {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM {source} {where} ORDER BY created DESC, filename DESC LIMIT ? OFFSET ?",
+                [*params, limit, offset]
+            ).fetchall()
+            cursor = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM plans").fetchone()[0]
+
+        return {
+            "plans": [self._to_dict(row) for row in rows],
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "cursor": cursor
+        }
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict:
+        return {
+            "filename": row["filename"],
+            "company": row["company"],
+            "timestamp": row["timestamp"],
+            "created": datetime.fromtimestamp(row["created"]).isoformat(),
+            "size": row["size"],
+            "path": f"{self.plans_dir}/{row['filename']}"
+        }
+
+
+# Shared plan index
+plan_index = PlanIndex()
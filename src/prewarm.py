@@ -0,0 +1,266 @@
+"""
+Cache Pre-warming Module for Company Research Agent
+
+Keeps research and plans for a watchlist of key accounts warm so the first
+interactive request for them is served from the research and plan caches.
+A background task wakes up periodically and, during the configured
+off-peak hours, re-researches watched companies whose cached research is
+missing or older than PREWARM_MAX_AGE_SECONDS. Companies are warmed one at
+a time with a pause in between. A company is not started while
+interactive traffic is waiting, and all LLM calls of the pipeline run at
+background priority, so pre-warming stays within the fetch and LLM rate
+limits. Runs started by the loop and through the API are serialized by
+one lock, and cache and watchlist reads run in worker threads.
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, MutableMapping, Optional, Tuple
+
+from src.company_index import company_index
+from src.cache_backend import offload
+from src.company_research_agent import RESEARCH_SOFT_TTL, research_age
+from src.settings import settings
+
+WATCHLIST_FILE = settings.get("WATCHLIST_FILE", "data/watchlist.json")
+
+
+def parse_hours(value: str) -> Tuple[int, int]:
+    """
+    Parse an off-peak window such as "1-6" or "22-5" (local hours, end exclusive)
+
+    Returns:
+        (start hour, end hour)
+
+    Raises:
+        ValueError: If the value is not two hours between 0 and 24
+    """
+    start, end = (int(part) for part in value.split("-", 1))
+    if not (0 <= start <= 24 and 0 <= end <= 24):
+        raise ValueError(f"Invalid hour range: {value}")
+    return start, end
+
+
+class PrewarmScheduler:
+    """Refreshes watched companies in the background during off-peak hours"""
+
+    def __init__(self, agent_factory: Callable[[], object], research_cache: MutableMapping,
+                 plan_cache: MutableMapping, watchlist_file: str = WATCHLIST_FILE,
+                 extra_companies: Optional[List[str]] = None, hours: Tuple[int, int] = (1, 6),
+                 interval: float = 900, max_age: float = RESEARCH_SOFT_TTL / 2, pause: float = 30,
+                 is_busy: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            agent_factory: Builds an agent (sharing the caches) to run one refresh
+            research_cache: Shared research cache checked for freshness
+            plan_cache: Shared plan cache checked for a plan
+            watchlist_file: JSON list of company names, editable through the API
+            extra_companies: Companies watched in addition to the file (e.g. from WATCHLIST)
+            hours: Off-peak window as (start hour, end hour) in local time
+            interval: Seconds between checks of the window and the watchlist
+            max_age: Research older than this is refreshed
+            pause: Seconds between two refreshes, and between checks while busy
+            is_busy: Returns True while interactive work should go first
+        """
+        self.agent_factory = agent_factory
+        self.research_cache = research_cache
+        self.plan_cache = plan_cache
+        self.watchlist_file = watchlist_file
+        self.extra_companies = extra_companies or []
+        self.hours = hours
+        self.interval = interval
+        self.max_age = max_age
+        self.pause = pause
+        self.is_busy = is_busy or (lambda: False)
+        self.companies: Dict[str, Dict] = {}  # Canonical name -> last refresh outcome
+        self.last_run: Optional[Dict] = None
+        self._run_lock = asyncio.Lock()  # One run at a time, whether from the loop or the API
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """True while a run holds the lock"""
+        return self._run_lock.locked()
+
+    def in_window(self, now: Optional[datetime] = None) -> bool:
+        """True during the off-peak hours"""
+        hour = (now or datetime.now()).hour
+        start, end = self.hours
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end  # Window across midnight
+
+    def watchlist(self) -> List[str]:
+        """Watched companies: the watchlist file plus extra_companies, deduplicated"""
+        names = list(self.extra_companies)
+        if os.path.exists(self.watchlist_file):
+            try:
+                with open(self.watchlist_file, "r", encoding="utf-8") as f:
+                    names.extend(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not read watchlist {self.watchlist_file}: {str(e)}")
+        unique = {}
+        for name in names:
+            if isinstance(name, str) and name.strip():
+                unique.setdefault(company_index.key(name), name.strip())
+        return list(unique.values())
+
+    def save_watchlist(self, companies: List[str]) -> List[str]:
+        """Replace the watchlist file and return the resulting watchlist"""
+        os.makedirs(os.path.dirname(self.watchlist_file) or ".", exist_ok=True)
+        with open(self.watchlist_file, "w", encoding="utf-8") as f:
+            json.dump([name.strip() for name in companies if name and name.strip()], f, indent=2)
+        return self.watchlist()
+
+    async def due(self, company_name: str) -> Optional[str]:
+        """
+        Why a company needs a refresh
+
+        Returns:
+            "missing", "no_plan" or "aged", or None if its cache entries are fresh
+        """
+        cached = await offload(self.research_cache, "get", company_name)
+        if not cached:
+            return "missing"
+        if await offload(self.plan_cache, "get", company_name) is None:
+            return "no_plan"
+        if research_age(cached) > self.max_age:
+            return "aged"
+        return None
+
+    async def warm(self, company: str, force: bool = False) -> Dict:
+        """
+        Refresh one company's research and plan if they are due
+
+        Args:
+            company: Company name
+            force: Refresh even if the cache is fresh
+
+        Returns:
+            Outcome with the canonical name, status ("fresh", "warmed" or "failed") and timing
+        """
+        company_name = company_index.resolve(company)
+        reason = await self.due(company_name) or ("forced" if force else None)
+        outcome = {"company": company_name, "reason": reason, "checked": time.time()}
+        if reason is None:
+            outcome["status"] = "fresh"
+        else:
+            start = time.perf_counter()
+            agent = self.agent_factory()
+            try:
+                # Joins an interactive run for the same company instead of repeating it
+                result = await agent._research_flight(company_name)
+                await agent._cache_research(company_name, result)
+                outcome.update(status="warmed", plan_filename=result["plan_filename"])
+                print(f"🔥 Pre-warmed {company_name} ({reason})")
+            except Exception as e:
+                outcome.update(status="failed", error=str(e))
+                print(f"⚠️ Pre-warming {company_name} failed: {str(e)}")
+            outcome["duration_ms"] = round((time.perf_counter() - start) * 1000)
+        self.companies[company_name] = outcome
+        return outcome
+
+    async def run_once(self, ignore_window: bool = False, force: bool = False) -> Dict:
+        """
+        Go through the watchlist once
+
+        Stops early when the off-peak window closes. Waits while is_busy()
+        reports interactive work, and for a run already in progress.
+
+        Args:
+            ignore_window: Keep going outside the off-peak window
+            force: Refresh every company, fresh or not
+
+        Returns:
+            Summary of the run
+        """
+        async with self._run_lock:
+            return await self._run(ignore_window, force)
+
+    async def start_run(self, ignore_window: bool = False, force: bool = False) -> Optional[asyncio.Task]:
+        """
+        Start a run in the background unless one is in progress
+
+        The lock is taken before this returns, so a second call made right
+        after sees the run even if its task has not started yet.
+
+        Returns:
+            The run's task, or None if a run already holds the lock
+        """
+        if self._run_lock.locked():
+            return None
+        await self._run_lock.acquire()  # Uncontended, so acquired without yielding
+
+        async def run():
+            try:
+                return await self._run(ignore_window, force)
+            finally:
+                self._run_lock.release()
+        return asyncio.ensure_future(run())
+
+    async def _run(self, ignore_window: bool, force: bool) -> Dict:
+        # Called with _run_lock held
+        run = {"started": time.time(), "forced": force, "ignore_window": ignore_window, "warmed": 0, "fresh": 0, "failed": 0, "skipped": 0}
+        try:
+            companies = await asyncio.to_thread(self.watchlist)
+            for index, company in enumerate(companies):
+                if not ignore_window and not self.in_window():
+                    run["skipped"] = len(companies) - index
+                    break
+                while self.is_busy():
+                    await asyncio.sleep(self.pause)
+                outcome = await self.warm(company, force=force)
+                run[outcome["status"]] += 1
+                if outcome["status"] != "fresh":
+                    await asyncio.sleep(self.pause)
+        finally:
+            run["finished"] = time.time()
+            self.last_run = run
+        return run
+
+    def start(self) -> None:
+        """Start the background loop on the running event loop (idempotent)"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            if self.in_window():
+                try:
+                    await self.run_once()
+                except Exception as e:
+                    print(f"⚠️ Pre-warming run failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def status(self) -> Dict:
+        """Scheduler state, the watchlist (read in a worker thread) and recent outcomes"""
+        return {
+            "enabled": self._task is not None,
+            "running": self.running,
+            "in_window": self.in_window(),
+            "hours": f"{self.hours[0]}-{self.hours[1]}",
+            "max_age_seconds": self.max_age,
+            "watchlist": await asyncio.to_thread(self.watchlist),
+            "companies": self.companies,
+            "last_run": self.last_run
+        }
+
+
+def prewarm_settings_from_env() -> Dict:
+    """PrewarmScheduler keyword arguments from WATCHLIST and PREWARM_* environment variables"""
+    return {
+        "extra_companies": settings.get_list("WATCHLIST"),
+        "hours": parse_hours(settings.get("PREWARM_HOURS", "1-6")),
+        "interval": settings.get_float("PREWARM_INTERVAL_SECONDS", 900),
+        "max_age": settings.get_float("PREWARM_MAX_AGE_SECONDS", RESEARCH_SOFT_TTL / 2),
+        "pause": settings.get_float("PREWARM_PAUSE_SECONDS", 30)
+    }
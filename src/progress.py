@@ -0,0 +1,154 @@
+"""
+Research Progress Events Module for Company Research Agent
+
+A small publish/subscribe broker for structured progress events. The agent
+publishes events while it researches; the API streams them to clients over
+Server-Sent Events so the UI no longer has to poll /status. Each session's
+agent publishes through a SessionProgress, which tags its events with the
+session id so a client is only streamed its own session's events.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, Optional
+
+
+class ProgressBroker:
+    """Fan-out broker for research progress events"""
+
+    def __init__(self, history_size: int = 200, queue_size: int = 500):
+        self.history = deque(maxlen=history_size)  # Recent events, replayed to late subscribers
+        self.queue_size = queue_size
+        self._subscribers = set()  # (loop, queue) pairs
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, **fields) -> Dict:
+        """
+        Publish an event to every subscriber
+
+        Safe to call from the event loop or from worker threads.
+
+        Args:
+            event_type: Event name (e.g. "search_started", "section_completed")
+            **fields: Event payload; "company" and "session_id" are used for filtering
+
+        Returns:
+            The published event
+        """
+        with self._lock:
+            event = {
+                "id": next(self._seq),
+                "type": event_type,
+                "timestamp": time.time(),
+                **fields
+            }
+            self.history.append(event)
+            subscribers = list(self._subscribers)
+
+        for loop, queue in subscribers:
+            try:
+                if _running_loop() is loop:
+                    _deliver(queue, event)
+                else:
+                    loop.call_soon_threadsafe(_deliver, queue, event)
+            except RuntimeError:
+                # Subscriber's loop is closed; it will be dropped on unsubscribe
+                pass
+        return event
+
+    async def subscribe(self, company: Optional[str] = None, since: int = 0,
+                        heartbeat: Optional[float] = None,
+                        session_id: Optional[str] = None) -> AsyncIterator[Optional[Dict]]:
+        """
+        Iterate over events as they are published
+
+        Args:
+            company: Only yield events for this company (plus global events)
+            since: Replay buffered events with an id greater than this first
+            heartbeat: If set, yield None after this many idle seconds
+            session_id: If set, only yield events tagged with this session
+                        ("" matches no session, so nothing but heartbeats)
+
+        Yields:
+            Event dictionaries (or None as an idle heartbeat)
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            backlog = [event for event in self.history if event["id"] > since] if since else []
+            self._subscribers.add(entry)
+        try:
+            for event in backlog:
+                if _matches(event, company, session_id):
+                    yield event
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if _matches(event, company, session_id):
+                    yield event
+        finally:
+            with self._lock:
+                self._subscribers.discard(entry)
+
+    def last_id(self) -> int:
+        """Id of the most recent event (0 if none), for resuming with since="""
+        with self._lock:
+            return self.history[-1]["id"] if self.history else 0
+
+    def subscriber_count(self) -> int:
+        """Number of connected subscribers"""
+        with self._lock:
+            return len(self._subscribers)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _deliver(queue: asyncio.Queue, event: Dict) -> None:
+    # A slow subscriber loses its oldest events rather than stalling publishers
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(event)
+
+
+def _matches(event: Dict, company: Optional[str], session_id: Optional[str] = None) -> bool:
+    if session_id is not None and event.get("session_id") != session_id:
+        return False
+    if not company:
+        return True
+    event_company = event.get("company")
+    return event_company is None or event_company.lower() == company.lower()
+
+
+def public_event(event: Dict) -> Dict:
+    """An event as sent to clients: the session id is a credential and is never echoed"""
+    return {key: value for key, value in event.items() if key != "session_id"}
+
+
+class SessionProgress:
+    """Progress publisher of one session's agent; forwards events to the broker tagged with the session id"""
+
+    def __init__(self, session_id: str, broker: ProgressBroker):
+        self.session_id = session_id
+        self.broker = broker
+
+    def publish(self, event_type: str, **fields) -> Dict:
+        return self.broker.publish(event_type, **{**fields, "session_id": self.session_id})
+
+
+# Shared broker used by the agent and the API
+progress_broker = ProgressBroker()
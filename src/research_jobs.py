@@ -0,0 +1,287 @@
+"""
+Research Job Queue Module for Company Research Agent
+
+Runs research as background jobs so HTTP requests return immediately with a
+job id instead of holding the connection open for the whole pipeline. A
+bounded pool of async workers takes jobs in submission order; clients poll,
+stream or cancel a job and fetch its result when it finishes. Each job
+records its queue position and how long each research stage took.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict, deque
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from src.settings import settings
+from src.admission import retry_after_seconds
+
+
+class JobStatus(Enum):
+    """Lifecycle of a research job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+TERMINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+# Agent states that end a stage without starting a new one
+_IDLE_STATES = {"idle", "complete"}
+
+
+class JobQueueFull(Exception):
+    """Raised when the pending queue is at capacity"""
+
+
+class ResearchJob:
+    """One queued or running research request"""
+
+    def __init__(self, company: str, session_id: Optional[str] = None, options: Optional[Dict] = None):
+        self.job_id = uuid.uuid4().hex
+        self.company = company
+        self.session_id = session_id
+        self.options = options or {}  # Runner flags, e.g. {"trace": True}
+        self.status = JobStatus.QUEUED
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.stages: List[Dict] = []  # [{"stage", "started", "duration_ms"}]
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.cancel_requested = False
+        self.watchers = 0  # Clients streaming this job's events
+        self.task: Optional[asyncio.Task] = None
+        self._stage_start: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def enter_stage(self, stage: Optional[str]) -> None:
+        """Close the current stage and start timing the next one"""
+        now = time.perf_counter()
+        if self.stages and self.stages[-1]["duration_ms"] is None:
+            self.stages[-1]["duration_ms"] = round((now - self._stage_start) * 1000)
+        if stage and stage not in _IDLE_STATES:
+            self.stages.append({"stage": stage, "started": time.time(), "duration_ms": None})
+            self._stage_start = now
+
+    def to_dict(self, position: Optional[int] = None) -> Dict:
+        """JSON-ready status of the job"""
+        now = time.time()
+        return {
+            "job_id": self.job_id,
+            "company": self.company,
+            "status": self.status.value,
+            "queue_position": position,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "queued_ms": round(((self.started or now) - self.created) * 1000),
+            "elapsed_ms": round(((self.finished or now) - self.started) * 1000) if self.started else None,
+            "stages": [dict(stage) for stage in self.stages],
+            "error": self.error
+        }
+
+
+class JobProgress:
+    """
+    Progress publisher handed to the agent while it runs a job
+
+    Forwards events to the shared broker tagged with the job id, and turns
+    the agent's state changes into stage timings.
+    """
+
+    def __init__(self, job: ResearchJob, broker):
+        self.job = job
+        self.broker = broker
+
+    def publish(self, event_type: str, **fields) -> Dict:
+        if event_type == "state_changed":
+            self.job.enter_stage(fields.get("state"))
+        elif event_type == "research_failed":
+            self.job.error = fields.get("error") or "Research failed"
+        return self.broker.publish(event_type, job_id=self.job.job_id, **fields)
+
+
+class ResearchJobQueue:
+    """Bounded worker pool running research jobs in submission order"""
+
+    def __init__(self, runner: Callable[[ResearchJob], Awaitable[Dict]], broker,
+                 workers: int = 2, max_pending: int = 100, history_size: int = 500):
+        """
+        Args:
+            runner: Coroutine function that performs a job and returns its result
+            broker: ProgressBroker that receives job lifecycle events
+            workers: Number of jobs run concurrently
+            max_pending: Maximum queued (not yet running) jobs
+            history_size: Finished jobs kept for polling
+        """
+        self.runner = runner
+        self.broker = broker
+        self.worker_count = workers
+        self.max_pending = max_pending
+        self.history_size = history_size
+        self._jobs: "OrderedDict[str, ResearchJob]" = OrderedDict()
+        self._pending: deque = deque()  # Job ids in run order
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.run_seconds = 60.0  # Moving average of job run time, for Retry-After estimates
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop (idempotent)"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        for _ in range(self.worker_count):
+            self._workers.append(asyncio.ensure_future(self._worker()))
+        # Jobs submitted before start are picked up now
+        for job_id in self._pending:
+            self._queue.put_nowait(job_id)
+
+    async def stop(self) -> None:
+        """Stop the workers; cancelling a worker cancels the job it is running"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, company: str, session_id: Optional[str] = None, options: Optional[Dict] = None) -> ResearchJob:
+        """
+        Queue a research job
+
+        Args:
+            company: Company name (or raw research request)
+            session_id: Session whose agent runs the job
+            options: Flags passed through to the runner
+
+        Returns:
+            The queued job
+
+        Raises:
+            JobQueueFull: If max_pending jobs are already waiting
+        """
+        if len(self._pending) >= self.max_pending:
+            raise JobQueueFull(f"Research queue is full ({self.max_pending} jobs waiting)")
+        self.start()
+        job = ResearchJob(company, session_id, options)
+        self._jobs[job.job_id] = job
+        self._pending.append(job.job_id)
+        self._trim_history()
+        self._queue.put_nowait(job.job_id)
+        self._publish(job, "job_queued", queue_position=self.position(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        return self._jobs.get(job_id)
+
+    def position(self, job: ResearchJob) -> Optional[int]:
+        """1-based position among waiting jobs, or None once it has left the queue"""
+        if job.status is not JobStatus.QUEUED:
+            return None
+        try:
+            return self._pending.index(job.job_id) + 1
+        except ValueError:
+            return None
+
+    def status(self, job: ResearchJob) -> Dict:
+        return job.to_dict(self.position(job))
+
+    def jobs(self, session_id: Optional[str] = None) -> List[Dict]:
+        """Status of known jobs, newest first, optionally for one session"""
+        return [
+            self.status(job) for job in reversed(self._jobs.values())
+            if session_id is None or job.session_id == session_id
+        ]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job
+
+        Returns:
+            True if the job was cancelled (or cancellation was requested)
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_requested = True
+        if job.status is JobStatus.QUEUED:
+            self._pending.remove(job.job_id)
+            self._finish(job, JobStatus.CANCELLED)
+        elif job.task:
+            job.task.cancel()
+        return True
+
+    def retry_after(self) -> int:
+        """Seconds until a slot in the pending queue is likely to free up"""
+        return retry_after_seconds(self.run_seconds, len(self._pending) - self.max_pending, self.worker_count)
+
+    def stats(self) -> Dict:
+        """Worker pool size, queue depth and job counts by status"""
+        counts = {status.value: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            counts[job.status.value] += 1
+        return {
+            "workers": self.worker_count,
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "avg_run_ms": round(self.run_seconds * 1000),
+            "jobs": counts
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status is not JobStatus.QUEUED:
+                continue  # Cancelled while waiting
+            self._pending.remove(job_id)
+            job.status = JobStatus.RUNNING
+            job.started = time.time()
+            self._publish(job, "job_started")
+
+            job.task = asyncio.ensure_future(self.runner(job))
+            try:
+                job.result = await job.task
+                self._finish(job, JobStatus.FAILED if job.error else JobStatus.COMPLETED)
+            except asyncio.CancelledError:
+                if not job.cancel_requested:
+                    # The worker itself is being stopped
+                    self._finish(job, JobStatus.CANCELLED)
+                    raise
+                self._finish(job, JobStatus.CANCELLED)
+            except Exception as e:
+                job.error = str(e)
+                self._finish(job, JobStatus.FAILED)
+            finally:
+                job.task = None
+
+    def _finish(self, job: ResearchJob, status: JobStatus) -> None:
+        job.enter_stage(None)
+        job.status = status
+        job.finished = time.time()
+        if job.started and status is JobStatus.COMPLETED:
+            self.run_seconds = 0.8 * self.run_seconds + 0.2 * (job.finished - job.started)
+        self._publish(job, f"job_{status.value}")
+
+    def _publish(self, job: ResearchJob, event_type: str, **fields: Any) -> None:
+        self.broker.publish(event_type, job_id=job.job_id, session_id=job.session_id,
+                            company=job.company, status=job.status.value, **fields)
+
+    def _trim_history(self) -> None:
+        # Forget the oldest finished jobs; queued and running jobs are always kept
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(len(finished) - self.history_size, 0)]:
+            del self._jobs[job_id]
+
+
+def job_limits_from_env() -> Dict:
+    """ResearchJobQueue keyword arguments from RESEARCH_* environment variables"""
+    return {
+        "workers": settings.get_int("RESEARCH_WORKERS", 2),
+        "max_pending": settings.get_int("RESEARCH_QUEUE_MAX", 100)
+    }
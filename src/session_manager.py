@@ -0,0 +1,228 @@
+"""
+Session Manager Module for Company Research Agent
+
+Keeps one CompanyResearchAgent per client session so concurrent users no
+longer overwrite each other's current company, plan and edit state. Each
+session has its own asyncio lock (requests from one session run one at a
+time; different sessions run concurrently). Research and plan caches are
+shared by all sessions. Idle sessions expire after a TTL, and the least
+recently used sessions are evicted when the session count or the estimated
+memory of per-session state exceeds its cap.
+
+Session ids are issued by the server and signed with SESSION_SECRET, so a
+client cannot pick its own id. Every worker process must share the secret
+to accept the ids issued by the others; without one, each process uses a
+random secret.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import secrets
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, MutableMapping, Optional
+from src.settings import settings
+
+SESSION_HEADER = "X-Session-ID"
+SESSION_COOKIE = "session_id"
+
+
+class Session:
+    """One client's agent and the lock serializing its requests"""
+
+    __slots__ = ("session_id", "agent", "lock", "created", "last_used", "size_bytes")
+
+    def __init__(self, session_id: str, agent):
+        self.session_id = session_id
+        self.agent = agent
+        self.lock = asyncio.Lock()
+        self.created = time.time()
+        self.last_used = time.monotonic()
+        self.size_bytes = 0
+
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_used
+
+
+def estimate_agent_bytes(agent) -> int:
+    """
+    Approximate memory held by an agent's per-session state
+
+    Shared caches are excluded; they are accounted once, not per session.
+    Cheap enough to run after every request: the history keeps a running
+    size and research data is measured once when the agent loads it.
+
+    Args:
+        agent: CompanyResearchAgent instance
+
+    Returns:
+        Approximate size in bytes of history, research data, summary and plan
+    """
+    return (
+        agent.conversation_history.size_bytes()
+        + sum(agent.research_data_bytes.values())
+        + len(agent.context_summary)
+        + sum(len(section) + len(str(content)) for section, content in agent.account_plan.items())
+    )
+
+
+class SessionManager:
+    """Per-session agents with idle TTL, LRU eviction and a memory cap"""
+
+    def __init__(self, agent_factory: Callable[[str, MutableMapping, MutableMapping], object],
+                 idle_ttl: float = 1800, max_sessions: int = 1000,
+                 max_memory_bytes: int = 256 * 1024 * 1024,
+                 research_cache: Optional[MutableMapping] = None,
+                 plan_cache: Optional[MutableMapping] = None,
+                 secret: Optional[str] = None):
+        """
+        Args:
+            agent_factory: Called with (session_id, research_cache, plan_cache) to build a session's agent
+            idle_ttl: Seconds of inactivity before a session expires
+            max_sessions: Maximum number of live sessions
+            max_memory_bytes: Cap on the estimated per-session state across all sessions
+            research_cache: Research cache shared by all sessions (defaults to a dict)
+            plan_cache: Plan cache shared by all sessions (defaults to a dict)
+            secret: Key signing session ids (defaults to a random key for this process)
+        """
+        self.agent_factory = agent_factory
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.max_memory_bytes = max_memory_bytes
+        # Shared by every session's agent
+        self.research_cache = research_cache if research_cache is not None else {}
+        self.plan_cache = plan_cache if plan_cache is not None else {}
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()  # LRU order, oldest first
+        self.created_count = 0
+        self.evicted = {"idle": 0, "lru": 0, "memory": 0}
+        self._secret = (secret or secrets.token_hex(32)).encode("utf-8")
+
+    def _sign(self, token: str) -> str:
+        return hmac.new(self._secret, token.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+    def new_session_id(self) -> str:
+        """Issue a new signed session id"""
+        token = uuid.uuid4().hex
+        return f"{token}.{self._sign(token)}"
+
+    def is_valid_id(self, session_id: Optional[str]) -> bool:
+        """True if the id was issued by this server (or another sharing its secret)"""
+        if not session_id or session_id.count(".") != 1:
+            return False
+        token, signature = session_id.split(".")
+        return hmac.compare_digest(signature, self._sign(token))
+
+    def peek(self, session_id: Optional[str]) -> Optional[Session]:
+        """Return a live session without creating it or changing its LRU position"""
+        if not session_id:
+            return None
+        return self._sessions.get(session_id)
+
+    def get(self, session_id: str) -> Session:
+        """
+        Return the session for this id, creating it if needed
+
+        Args:
+            session_id: Client session id
+
+        Returns:
+            The Session (marked as most recently used)
+        """
+        session = self._sessions.get(session_id)
+        if session is None:
+            agent = self.agent_factory(session_id, self.research_cache, self.plan_cache)
+            session = Session(session_id, agent)
+            self._sessions[session_id] = session
+            self.created_count += 1
+            self.sweep(keep=session_id)
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_used = time.monotonic()
+        return session
+
+    @asynccontextmanager
+    async def use(self, session_id: str) -> AsyncIterator:
+        """
+        Hold a session's lock for the duration of a request
+
+        Args:
+            session_id: Client session id
+
+        Yields:
+            The session's agent
+        """
+        session = self.get(session_id)
+        async with session.lock:
+            try:
+                yield session.agent
+            finally:
+                session.last_used = time.monotonic()
+                session.size_bytes = estimate_agent_bytes(session.agent)
+        self.sweep()
+
+    def remove(self, session_id: str) -> bool:
+        """End a session explicitly; returns True if it existed"""
+        return self._sessions.pop(session_id, None) is not None
+
+    def memory_bytes(self) -> int:
+        """Estimated per-session state across all live sessions"""
+        return sum(session.size_bytes for session in self._sessions.values())
+
+    def sweep(self, keep: Optional[str] = None) -> int:
+        """
+        Expire idle sessions, then evict LRU sessions over the count or memory cap
+
+        Sessions with a request in progress are never evicted.
+
+        Args:
+            keep: Session id that must survive (e.g. one just created)
+
+        Returns:
+            Number of sessions removed
+        """
+        removed = 0
+        for session_id, session in list(self._sessions.items()):
+            if session_id != keep and not session.lock.locked() and session.idle_seconds() > self.idle_ttl:
+                del self._sessions[session_id]
+                self.evicted["idle"] += 1
+                removed += 1
+
+        total_bytes = self.memory_bytes()
+        for session_id, session in list(self._sessions.items()):
+            over_count = len(self._sessions) > self.max_sessions
+            over_memory = total_bytes > self.max_memory_bytes
+            if not (over_count or over_memory):
+                break
+            if session_id == keep or session.lock.locked():
+                continue
+            del self._sessions[session_id]
+            total_bytes -= session.size_bytes
+            self.evicted["lru" if over_count else "memory"] += 1
+            removed += 1
+        return removed
+
+    def stats(self) -> Dict:
+        """Session counts, memory estimate and eviction counters"""
+        return {
+            "active_sessions": len(self._sessions),
+            "busy_sessions": sum(1 for s in self._sessions.values() if s.lock.locked()),
+            "sessions_created": self.created_count,
+            "memory_bytes": self.memory_bytes(),
+            "max_memory_bytes": self.max_memory_bytes,
+            "max_sessions": self.max_sessions,
+            "idle_ttl_seconds": self.idle_ttl,
+            "evicted": dict(self.evicted)
+        }
+
+
+def session_limits_from_env() -> Dict:
+    """SessionManager keyword arguments from SESSION_* environment variables"""
+    return {
+        "idle_ttl": settings.get_float("SESSION_IDLE_TTL_SECONDS", 1800),
+        "max_sessions": settings.get_int("SESSION_MAX_COUNT", 1000),
+        "max_memory_bytes": int(settings.get_float("SESSION_MAX_MEMORY_MB", 256) * 1024 * 1024),
+        "secret": settings.get("SESSION_SECRET")
+    }
@@ -0,0 +1,58 @@
+"""
+Settings Module for Company Research Agent
+
+Loads config/.env once per process and gives every module typed access to
+configuration. Values come from the process environment, which the .env
+file only fills in (real environment variables win), so settings can still
+be overridden per deployment or per test run.
+"""
+
+import os
+from typing import List, Optional
+from dotenv import load_dotenv
+
+ENV_FILE = os.getenv("COMPANY_AGENT_ENV_FILE", "config/.env")
+
+_TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+class Settings:
+    """Typed accessors over the environment, with config/.env loaded once"""
+
+    def __init__(self, env_file: str = ENV_FILE):
+        """
+        Args:
+            env_file: dotenv file read on the first load()
+        """
+        self.env_file = env_file
+        self.loaded = False
+
+    def load(self) -> None:
+        """Read the dotenv file into the environment (only the first call does anything)"""
+        if not self.loaded:
+            load_dotenv(self.env_file)
+            self.loaded = True
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return os.environ.get(name, default)
+
+    def get_int(self, name: str, default: int) -> int:
+        return int(self.get(name, str(default)))
+
+    def get_float(self, name: str, default: float) -> float:
+        return float(self.get(name, str(default)))
+
+    def get_bool(self, name: str, default: bool = False) -> bool:
+        value = self.get(name)
+        if value is None or value == "":
+            return default
+        return value.lower() in _TRUE_VALUES
+
+    def get_list(self, name: str, default: str = "") -> List[str]:
+        """Comma-separated value as a list of non-empty, stripped items"""
+        return [item.strip() for item in self.get(name, default).split(",") if item.strip()]
+
+
+# Shared settings, loaded on import
+settings = Settings()
+settings.load()
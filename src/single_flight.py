@@ -0,0 +1,74 @@
+"""
+Single-Flight Module for Company Research Agent
+
+Coalesces concurrent calls for the same key into one running task. Later
+callers attach to the task already in flight and receive its result. A
+caller that is cancelled only detaches; the shared task is cancelled when
+its last waiter goes away.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+class _Call:
+    """A task in flight and the number of callers waiting on it"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent async work by key"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+
+    def is_in_flight(self, key: str) -> bool:
+        """True if a task for this key is currently running"""
+        return key in self._calls
+
+    def in_flight(self) -> List[str]:
+        """Keys with a running task"""
+        return list(self._calls)
+
+    def waiters(self, key: str) -> int:
+        """Number of callers attached to the task for this key"""
+        call = self._calls.get(key)
+        return call.waiters if call else 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run factory() once per key, sharing the result with concurrent callers
+
+        Args:
+            key: Deduplication key
+            factory: Zero-argument callable returning the awaitable to run
+
+        Returns:
+            The result of the shared task (exceptions propagate to every waiter)
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task, key=key, call=call: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            # Shield so cancelling this caller does not cancel the shared task
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Nobody else is waiting; stop the work
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
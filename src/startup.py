@@ -0,0 +1,50 @@
+"""
+Startup Module for Company Research Agent
+
+Measures how long a process takes to import its modules and become ready,
+and which heavy optional dependencies were imported on the way. Those are
+meant to load on first use, so one showing up here points at an eager
+import that slows cold starts.
+"""
+
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Optional dependencies that are slow to import and only needed by some requests
+HEAVY_MODULES = ("crawl4ai", "playwright", "duckduckgo_search", "bs4", "aiohttp", "redis")
+
+
+def loaded_heavy_modules() -> List[str]:
+    """Heavy optional modules already imported in this process"""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+class StartupReport:
+    """Import and readiness timings of one process"""
+
+    def __init__(self, started: float):
+        """
+        Args:
+            started: time.perf_counter() taken before the first application import;
+                the imports are considered done when the report is created
+        """
+        self.started = started
+        self.import_seconds = time.perf_counter() - started
+        self.imported_heavy = loaded_heavy_modules()
+        self.ready_seconds: Optional[float] = None
+
+    def ready(self) -> None:
+        """Record that the process has finished starting up and print the report"""
+        self.ready_seconds = time.perf_counter() - self.started
+        heavy = ", ".join(self.imported_heavy) or "none"
+        print(f"🚀 Started in {self.ready_seconds * 1000:.0f} ms "
+              f"(imports {self.import_seconds * 1000:.0f} ms; heavy modules loaded at import: {heavy})")
+
+    def to_dict(self) -> Dict:
+        return {
+            "import_ms": round(self.import_seconds * 1000, 1),
+            "ready_ms": round(self.ready_seconds * 1000, 1) if self.ready_seconds is not None else None,
+            "heavy_modules_at_import": self.imported_heavy,
+            "heavy_modules_loaded": loaded_heavy_modules()
+        }
@@ -0,0 +1,284 @@
+"""
+Tracing Module for Company Research Agent
+
+Records a timeline of spans for a single request so a slow research run can
+be broken down step by step (cache lookup, each search and page fetch,
+summarization, each LLM call). A trace is started per request and carried
+through async calls with contextvars; when no trace is active, span() costs
+one context variable lookup. An opt-in sampling profiler captures stack
+samples while a request runs and returns them as folded stacks, the input
+format of flamegraph.pl and speedscope.
+"""
+
+import functools
+import inspect
+import itertools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+from src.settings import settings
+
+# Profiling adds per-request overhead, so it has to be enabled explicitly
+PROFILING_ENABLED = settings.get_bool("PROFILING_ENABLED")
+PROFILE_INTERVAL_MS = settings.get_float("PROFILE_INTERVAL_MS", 5)
+PROFILE_MAX_SECONDS = settings.get_float("PROFILE_MAX_SECONDS", 300)
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[int]] = ContextVar("current_span", default=None)
+
+
+class Trace:
+    """Spans recorded for one request"""
+
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._spans: List[Dict] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()  # Spans may finish on executor threads
+
+    def offset_ms(self) -> float:
+        return round((time.perf_counter() - self._start) * 1000, 2)
+
+    def next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def add(self, record: Dict) -> None:
+        with self._lock:
+            self._spans.append(record)
+
+    def timeline(self) -> Dict:
+        """
+        JSON-ready trace
+
+        Returns:
+            Dict with the trace id, total duration and spans ordered by start time
+        """
+        with self._lock:
+            spans = sorted(self._spans, key=lambda record: (record["start_ms"], record["span_id"]))
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started": self.started,
+            "duration_ms": self.offset_ms(),
+            "spans": spans
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(name: str) -> Iterator[Trace]:
+    """
+    Record spans opened in this context (and tasks created from it) into a new trace
+
+    Args:
+        name: Trace name, e.g. the endpoint
+
+    Yields:
+        The Trace; call timeline() once the traced work is done
+    """
+    trace = Trace(name)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Dict]:
+    """
+    Time the enclosed block as a span of the current trace
+
+    Args:
+        name: Span name
+        **attrs: Attributes recorded with the span
+
+    Yields:
+        The span's attribute dict, for attributes known only inside the block
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+
+    span_id = trace.next_id()
+    record = {
+        "span_id": span_id,
+        "parent_id": _current_span.get(),
+        "name": name,
+        "start_ms": trace.offset_ms(),
+        "duration_ms": None,
+        "attrs": attrs
+    }
+    token = _current_span.set(span_id)
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        _current_span.reset(token)
+        trace.add(record)
+
+
+def traced(name: Optional[str] = None):
+    """
+    Decorator recording each call of a function (sync or async) as a span
+
+    Args:
+        name: Span name (defaults to the function name)
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every thread at a fixed interval
+
+    Runs in its own thread and only reads frames, so the profiled code is
+    not instrumented. All threads in the process are sampled (the event
+    loop and executor threads), so concurrent requests show up as well;
+    each stack is rooted at its thread name to tell them apart.
+    """
+
+    _active = threading.Lock()  # One profile per process at a time
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, max_seconds: float = PROFILE_MAX_SECONDS):
+        self.interval = interval_ms / 1000
+        self.max_seconds = max_seconds
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._duration = 0.0
+
+    def start(self) -> None:
+        """
+        Start sampling
+
+        Raises:
+            ProfilerBusy: If another profile is already running
+        """
+        if not SamplingProfiler._active.acquire(blocking=False):
+            raise ProfilerBusy("Another request is being profiled")
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict:
+        """Stop sampling and return the profile"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+            self._duration = time.perf_counter() - self._started
+            SamplingProfiler._active.release()
+        return self.result()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        deadline = time.perf_counter() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def result(self) -> Dict:
+        """
+        Profile in folded-stack format ("thread;file:func;file:func count" per line)
+
+        Returns:
+            Dict with the sampling interval, sample count and folded stacks
+        """
+        folded = "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+        return {
+            "format": "folded",
+            "interval_ms": self.interval * 1000,
+            "duration_ms": round(self._duration * 1000, 2),
+            "samples": self.samples,
+            "folded": folded
+        }
+
+
+@contextmanager
+def diagnostics(name: str, trace: bool = False, profile: bool = False) -> Iterator[Dict]:
+    """
+    Optionally trace and profile the enclosed block for a response
+
+    Args:
+        name: Trace name
+        trace: Record a span timeline
+        profile: Run the sampling profiler (ignored unless PROFILING_ENABLED)
+
+    Yields:
+        Dict that holds "trace" and/or "profile" once the block has finished
+    """
+    extra: Dict = {}
+    profiler = None
+    if profile and PROFILING_ENABLED:
+        profiler = SamplingProfiler()
+        try:
+            profiler.start()
+        except ProfilerBusy as e:
+            profiler = None
+            extra["profile"] = {"error": str(e)}
+
+    try:
+        if trace:
+            with start_trace(name) as active:
+                try:
+                    yield extra
+                finally:
+                    extra["trace"] = active.timeline()
+        else:
+            yield extra
+    finally:
+        if profiler:
+            extra["profile"] = profiler.stop()
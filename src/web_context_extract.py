@@ -3,30 +3,103 @@ Simplified Web Context Extraction Module for Company Research Agent
 """
 
 import asyncio
-import os
+import functools
+import importlib.util
 import json
-import requests
-import aiohttp
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from dotenv import load_dotenv
-from duckduckgo_search import DDGS
-from bs4 import BeautifulSoup
+from types import SimpleNamespace
+from typing import Dict, Optional
 
-# Load .env from config directory
-load_dotenv('config/.env')
+from src.settings import settings
+from src.http_client import get_session
+from src.metrics import stage_latency
+from src.single_flight import SingleFlight
+from src.tracing import span, traced
 
-# Try to import optional crawl4ai
-try:
+# crawl4ai (with Playwright and pydantic), duckduckgo_search, BeautifulSoup and
+# aiohttp are slow to import, so they are imported on first use rather than at
+# startup. Set CRAWL4AI_ENABLED=0 to force simple extraction (e.g. in offline benchmarks)
+CRAWL4AI_AVAILABLE = (
+    settings.get_bool("CRAWL4AI_ENABLED", True)
+    and importlib.util.find_spec("crawl4ai") is not None
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_crawl4ai() -> SimpleNamespace:
+    """Import crawl4ai and define the page summary schema (once, on the first crawl)"""
     from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode, LLMConfig
     from crawl4ai.extraction_strategy import LLMExtractionStrategy
     from pydantic import BaseModel, Field
-    
+
     class PageSummary(BaseModel):
         summary: str = Field(..., description="Detailed page summary related to query")
-    
-    CRAWL4AI_AVAILABLE = True
-except ImportError:
-    CRAWL4AI_AVAILABLE = False
+
+    return SimpleNamespace(
+        AsyncWebCrawler=AsyncWebCrawler,
+        BrowserConfig=BrowserConfig,
+        CrawlerRunConfig=CrawlerRunConfig,
+        CacheMode=CacheMode,
+        LLMConfig=LLMConfig,
+        LLMExtractionStrategy=LLMExtractionStrategy,
+        PageSummary=PageSummary
+    )
+
+# Enabled search providers and the Serper endpoint (overridable for local stand-ins)
+SEARCH_PROVIDERS = settings.get_list("SEARCH_PROVIDERS", "duckduckgo,serper")
+SERPER_API_BASE = settings.get("SERPER_API_BASE", "https://google.serper.dev")
+
+# Recently fetched pages, shared by every research run; companies researched
+# together (e.g. in a batch) often hit the same articles and listings. Simple
+# extraction caches page text by URL; crawl4ai summaries are query-specific and
+# cached by query and URL
+PAGE_CACHE_TTL = settings.get_float("PAGE_CACHE_TTL_SECONDS", 600)
+PAGE_CACHE_SIZE = settings.get_int("PAGE_CACHE_SIZE", 256)
+
+
+class PageCache:
+    """Small LRU of cleaned page text by URL, with entries expiring after a TTL"""
+
+    def __init__(self, max_entries: int = PAGE_CACHE_SIZE, ttl: float = PAGE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._pages: "OrderedDict[str, tuple]" = OrderedDict()  # url -> (stored at, page)
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._pages.get(url)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self._pages.move_to_end(url)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._pages[url]
+            self.misses += 1
+            return None
+
+    def set(self, url: str, page: Dict) -> None:
+        with self._lock:
+            self._pages[url] = (time.monotonic(), page)
+            self._pages.move_to_end(url)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._pages), "hits": self.hits, "misses": self.misses}
+
+
+page_cache = PageCache()
+
+# Page downloads in flight; concurrent simple-extraction fetches of one URL
+# share a request (crawl4ai crawls each batch in its own browser session)
+fetch_flights = SingleFlight()
 
 
 async def save_to_file(data, filename, base_path="./data"):
@@ -53,6 +126,16 @@ async def save_to_file(data, filename, base_path="./data"):
         f.write(content)
 
 
+def _search_duckduckgo(query: str, max_results: int):
+    """Run a blocking DuckDuckGo text search and return result URLs"""
+    from duckduckgo_search import DDGS
+
+    with DDGS() as search:
+        results = search.text(query, max_results=max_results)
+        return [result["href"] for result in results if "href" in result]
+
+
+@traced()
 async def search_web(query: str, max_results: int = 5):
     """
     Search the web using DuckDuckGo (free) or Serper API (if available)
@@ -65,18 +148,19 @@ async def search_web(query: str, max_results: int = 5):
         List of URLs
     """
     # Try DuckDuckGo first (free)
-    try:
-        with DDGS() as search:
-            results = search.text(query, max_results=max_results)
-            urls = [result["href"] for result in results if "href" in result]
+    if "duckduckgo" in SEARCH_PROVIDERS:
+        try:
+            # DDGS is blocking; keep the event loop free while it runs
+            loop = asyncio.get_running_loop()
+            urls = await loop.run_in_executor(None, _search_duckduckgo, query, max_results)
             if urls:
                 return urls
-    except Exception as e:
-        print(f"DuckDuckGo search failed: {e}")
+        except Exception as e:
+            print(f"DuckDuckGo search failed: {e}")
     
     # Try Serper API if available
-    serper_key = os.getenv("SERPER_API_KEY")
-    if serper_key:
+    serper_key = settings.get("SERPER_API_KEY")
+    if serper_key and "serper" in SEARCH_PROVIDERS:
         try:
             headers = {
                 "Content-Type": "application/json",
@@ -84,27 +168,137 @@ async def search_web(query: str, max_results: int = 5):
             }
             payload = {"q": query, "num": max_results}
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    "https://google.serper.dev/search", 
-                    json=payload, 
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        urls = []
-                        for result in data.get("organic", []):
-                            link = result.get("link")
-                            if link and "youtube.com" not in link and "youtu.be" not in link:
-                                urls.append(link)
-                        if urls:
-                            return urls[:max_results]
+            async with get_session().post(
+                f"{SERPER_API_BASE}/search", 
+                json=payload, 
+                headers=headers
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    urls = []
+                    for result in data.get("organic", []):
+                        link = result.get("link")
+                        if link and "youtube.com" not in link and "youtu.be" not in link:
+                            urls.append(link)
+                    if urls:
+                        return urls[:max_results]
         except Exception as e:
             print(f"Serper API search failed: {e}")
     
     return []
 
 
+def clean_html(html: str, max_chars: int = 3000) -> str:
+    """
+    Reduce an HTML page to its visible text
+    
+    Args:
+        html: Page source
+        max_chars: Length limit of the returned text
+        
+    Returns:
+        Whitespace-normalized text without scripts and styles
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Remove script and style elements
+    for script in soup(["script", "style"]):
+        script.decompose()
+    
+    # Get text
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = ' '.join(chunk for chunk in chunks if chunk)
+    
+    # Limit text length
+    return text[:max_chars]
+
+
+async def _download_page(url: str) -> Dict:
+    """Fetch a page and reduce it to text, caching successful fetches"""
+    import aiohttp
+
+    # Awaited on the shared session, so cancelling the research run stops the download
+    with stage_latency.time(stage="fetch"), span("fetch", url=url):
+        async with get_session().get(url, timeout=aiohttp.ClientTimeout(total=10), headers={
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }) as response:
+            if response.status != 200:
+                return {"status": response.status, "text": ""}
+            html = await response.text(errors="replace")
+    
+    # Parsing a large page takes tens of milliseconds; keep the event loop free while it runs
+    loop = asyncio.get_running_loop()
+    with stage_latency.time(stage="extract"), span("html_extract", url=url):
+        text = await loop.run_in_executor(None, clean_html, html)
+    page = {"status": 200, "text": text}
+    page_cache.set(url, page)
+    return page
+
+
+async def fetch_page(url: str) -> Dict:
+    """
+    Cleaned text of a page, from the page cache or a (shared) download
+    
+    Args:
+        url: Page URL
+        
+    Returns:
+        Dict with the HTTP status and the page text
+    """
+    page = page_cache.get(url)
+    if page is not None:
+        return page
+    return await fetch_flights.do(url, lambda: _download_page(url))
+
+
+def _crawl_cache_key(query: str, url: str) -> str:
+    """Page cache key of a crawl4ai summary (distinct from the plain page entry for the URL)"""
+    return f"crawl:{query}\n{url}"
+
+
+async def _crawl_pages(urls) -> Dict[str, Dict]:
+    """
+    Crawl pages with crawl4ai and summarize each one with the LLM
+    
+    Args:
+        urls: Page URLs, crawled as one batch
+        
+    Returns:
+        Dict of URL to {"status", "summary"}; status is 200 for successful crawls
+    """
+    crawl4ai = _load_crawl4ai()
+    browser_config = crawl4ai.BrowserConfig(headless=True, verbose=False)
+    extraction_strategy = crawl4ai.LLMExtractionStrategy(
+        llm_config=crawl4ai.LLMConfig(
+            provider="mistral/mistral-small-latest", 
+            api_token=settings.get("MISTRAL_API_KEY")
+        ),
+        schema=crawl4ai.PageSummary.model_json_schema()
+    )
+    
+    async with crawl4ai.AsyncWebCrawler(config=browser_config) as crawler:
+        results = await crawler.arun_many(
+            urls=urls, 
+            config=crawl4ai.CrawlerRunConfig(
+                cache_mode=crawl4ai.CacheMode.BYPASS,
+                extraction_strategy=extraction_strategy
+            )
+        )
+    
+    pages = {}
+    for url, result in zip(urls, results):
+        if result.success:
+            pages[url] = {"status": 200, "summary": json.loads(result.extracted_content).get("summary", "")}
+        else:
+            pages[url] = {"status": None, "summary": ""}
+    return pages
+
+
+@traced()
 async def extract_from_url(url: str, query: str):
     """
     Extract content from a single URL
@@ -117,26 +311,10 @@ async def extract_from_url(url: str, query: str):
         Dictionary with extracted content
     """
     try:
-        response = requests.get(url, timeout=10, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        page = await fetch_page(url)
         
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Get text
-            text = soup.get_text()
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            # Limit text length
-            text = text[:3000]  # First 3000 characters
-            
+        if page["status"] == 200:
+            text = page["text"]
             return {
                 "url": url,
                 "summary": f"Content from {url} about {query}: {text[:500]}...",
@@ -146,7 +324,7 @@ async def extract_from_url(url: str, query: str):
         else:
             return {
                 "url": url,
-                "summary": f"Failed to fetch {url}: Status {response.status_code}",
+                "summary": f"Failed to fetch {url}: Status {page['status']}",
                 "error": True
             }
             
@@ -158,13 +336,22 @@ async def extract_from_url(url: str, query: str):
         }
 
 
-async def extract(query: str = None, silent_mode: bool = False):
+def _notify(progress_callback, event_type: str, **fields) -> None:
+    """Forward a progress event to the caller's callback, if any"""
+    if progress_callback:
+        progress_callback(event_type, **fields)
+
+
+@traced()
+async def extract(query: str = None, silent_mode: bool = False, progress_callback=None):
     """
     Main extraction function - search and extract web content
     
     Args:
         query: Search query
         silent_mode: If True, suppress output
+        progress_callback: Optional callable(event_type, **fields) receiving
+            "search_finished" and per-URL "fetch_finished" events
         
     Returns:
         List of extracted data
@@ -176,7 +363,12 @@ async def extract(query: str = None, silent_mode: bool = False):
         print(f"🔍 Searching for: {query}")
     
     # Search for URLs
+    search_start = time.perf_counter()
     urls = await search_web(query)
+    search_seconds = time.perf_counter() - search_start
+    stage_latency.observe(search_seconds, stage="search")
+    _notify(progress_callback, "search_finished", query=query, url_count=len(urls),
+            duration_ms=round(search_seconds * 1000))
     
     if not urls:
         if not silent_mode:
@@ -198,30 +390,27 @@ async def extract(query: str = None, silent_mode: bool = False):
     # Try advanced extraction if crawl4ai is available
     if CRAWL4AI_AVAILABLE:
         try:
-            browser_config = BrowserConfig(headless=True, verbose=False)
-            extraction_strategy = LLMExtractionStrategy(
-                llm_config=LLMConfig(
-                    provider="mistral/mistral-small-latest", 
-                    api_token=os.getenv("MISTRAL_API_KEY")
-                ),
-                schema=PageSummary.model_json_schema()
-            )
+            # Crawl summaries depend on the query, so they are cached per query and URL
+            summaries = {url: page_cache.get(_crawl_cache_key(query, url)) for url in urls}
+            to_crawl = [url for url in urls if summaries[url] is None]
+            crawl_ms = 0
+            if to_crawl:
+                crawl_start = time.perf_counter()
+                summaries.update(await _crawl_pages(to_crawl))
+                # Pages are crawled as one batch, so only the batch timing is known
+                crawl_seconds = time.perf_counter() - crawl_start
+                stage_latency.observe(crawl_seconds, stage="crawl")
+                crawl_ms = round(crawl_seconds * 1000)
 
-            async with AsyncWebCrawler(config=browser_config) as crawler:
-                results = await crawler.arun_many(
-                    urls=urls, 
-                    config=CrawlerRunConfig(
-                        cache_mode=CacheMode.BYPASS,
-                        extraction_strategy=extraction_strategy
-                    )
-                )
-
-            for url, result in zip(urls, results):
-                if result.success:
-                    page_summary = json.loads(result.extracted_content)
+            for url in urls:
+                page = summaries[url]
+                success = page is not None and page["status"] == 200
+                if success:
+                    if url in to_crawl:
+                        page_cache.set(_crawl_cache_key(query, url), page)
                     output_data.append({
                         "url": url,
-                        "summary": page_summary.get("summary", ""),
+                        "summary": page["summary"],
                         "error": False
                     })
                 else:
@@ -230,20 +419,24 @@ async def extract(query: str = None, silent_mode: bool = False):
                         "summary": f"Crawl failed for {url}",
                         "error": True
                     })
+                _notify(progress_callback, "fetch_finished", url=url, success=success,
+                        duration_ms=crawl_ms if url in to_crawl else 0, batched=True,
+                        cached=url not in to_crawl)
                     
         except Exception as e:
             if not silent_mode:
                 print(f"Advanced extraction failed: {e}, using simple extraction")
             # Fall back to simple extraction
+            output_data = []
             for url in urls:
-                data = await extract_from_url(url, query)
+                data = await _timed_extract(url, query, progress_callback)
                 output_data.append(data)
     else:
         # Use simple extraction
         for url in urls:
             if not silent_mode:
                 print(f"Extracting from: {url}")
-            data = await extract_from_url(url, query)
+            data = await _timed_extract(url, query, progress_callback)
             output_data.append(data)
     
     # Save extracted data
@@ -255,6 +448,15 @@ async def extract(query: str = None, silent_mode: bool = False):
     return output_data
 
 
+async def _timed_extract(url: str, query: str, progress_callback=None):
+    """Extract a single URL and report its outcome and timing"""
+    fetch_start = time.perf_counter()
+    data = await extract_from_url(url, query)
+    _notify(progress_callback, "fetch_finished", url=url, success=not data.get("error", False),
+            duration_ms=round((time.perf_counter() - fetch_start) * 1000))
+    return data
+
+
 # For backward compatibility
 async def simple_extract(urls, query):
     """Backward compatibility function"""
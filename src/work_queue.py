@@ -0,0 +1,272 @@
+"""
+Durable Work Queue Module for Company Research Agent
+
+A SQLite-backed job queue shared by the API process and any number of
+research worker processes (see research_worker.py). Workers lease a job for
+a fixed time and extend the lease with heartbeats; a job whose lease expires
+(crashed or stalled worker) is handed to another worker. Failed jobs are
+retried with exponential backoff up to max_attempts. Results are written
+back to the queue, where the API picks them up.
+
+SQLite's locking makes this safe across processes on one machine, or across
+machines sharing the database over a filesystem with working locks.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from src.settings import settings
+
+WORK_QUEUE_PATH = settings.get("WORK_QUEUE_PATH", "data/work_queue.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_available ON jobs (status, available_at, created);
+"""
+
+
+class WorkQueue:
+    """Durable job queue with leases, heartbeats and retries"""
+
+    def __init__(self, path: str = WORK_QUEUE_PATH, max_attempts: int = 3,
+                 retry_base_seconds: float = 10.0, retry_max_seconds: float = 300.0):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            max_attempts: Default attempts before a job is marked failed
+            retry_base_seconds: Delay before the first retry (doubles per attempt)
+            retry_max_seconds: Upper bound on the retry delay
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per operation keeps the queue usable from any thread or process
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, payload: Dict, job_id: Optional[str] = None,
+                max_attempts: Optional[int] = None) -> str:
+        """
+        Add a job to the queue
+
+        Args:
+            payload: JSON-serializable job description
+            job_id: Id to use (defaults to a new random id)
+            max_attempts: Attempts before the job is marked failed
+
+        Returns:
+            The job id
+        """
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, payload, status, max_attempts, available_at, created) "
+                "VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(payload), max_attempts or self.max_attempts, now, now)
+            )
+        return job_id
+
+    def lease(self, worker_id: str, lease_seconds: float = 60.0) -> Optional[Dict]:
+        """
+        Claim the oldest available job
+
+        Jobs whose lease has expired are requeued (or failed, when out of
+        attempts) before a job is chosen.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+            lease_seconds: How long the claim lasts without a heartbeat
+
+        Returns:
+            The leased job, or None if nothing is available
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, lease_owner = NULL, "
+                "error = COALESCE(error, 'Worker lease expired') "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now)
+            )
+            # Reclaimed jobs keep their place at the front of the queue
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', lease_owner = NULL "
+                "WHERE status = 'running' AND lease_expires < ?",
+                (now,)
+            )
+            row = conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'queued' AND available_at <= ? "
+                "ORDER BY available_at, created LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, started = COALESCE(started, ?), stage = NULL WHERE job_id = ?",
+                (worker_id, now + lease_seconds, now, row["job_id"])
+            )
+            return self._row(conn, row["job_id"])
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = 60.0,
+                  stage: Optional[str] = None) -> bool:
+        """
+        Extend a lease (and optionally record the current stage)
+
+        Returns:
+            False if the worker no longer owns the job (expired, cancelled or
+            reassigned); the worker should stop working on it
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, stage = COALESCE(?, stage) "
+                "WHERE job_id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + lease_seconds, stage, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Dict) -> bool:
+        """Store a job's result; ignored (False) if the worker lost the lease"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'completed', result = ?, finished = ?, lease_owner = NULL "
+                "WHERE job_id = ? AND lease_owner = ? AND status = 'running'",
+                (json.dumps(result, default=str), time.time(), job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> Optional[str]:
+        """
+        Record a failed attempt; the job is retried after a backoff while attempts remain
+
+        Returns:
+            The job's new status ("queued" or "failed"), or None if the worker lost the lease
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs "
+                "WHERE job_id = ? AND lease_owner = ? AND status = 'running'",
+                (job_id, worker_id)
+            ).fetchone()
+            if row is None:
+                return None
+            if row["attempts"] < row["max_attempts"]:
+                delay = min(self.retry_base_seconds * 2 ** (row["attempts"] - 1), self.retry_max_seconds)
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', lease_owner = NULL, available_at = ?, error = ? "
+                    "WHERE job_id = ?",
+                    (now + delay, error, job_id)
+                )
+                return "queued"
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', lease_owner = NULL, finished = ?, error = ? WHERE job_id = ?",
+                (now, error, job_id)
+            )
+            return "failed"
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; a running worker notices on its next heartbeat"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ?, lease_owner = NULL "
+                "WHERE job_id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id)
+            )
+            return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Current state of a job, with payload and result decoded"""
+        with self._connect() as conn:
+            return self._row(conn, job_id)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position among available queued jobs, or None if not queued"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status, available_at, created FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None or row["status"] != "queued":
+                return None
+            ahead = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' "
+                "AND (available_at < ? OR (available_at = ? AND created < ?))",
+                (row["available_at"], row["available_at"], row["created"])
+            ).fetchone()[0]
+            return ahead + 1
+
+    def stats(self) -> Dict:
+        """Job counts by status and the number of workers holding leases"""
+        with self._connect() as conn:
+            counts = {row["status"]: row["n"] for row in conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+            )}
+            workers = conn.execute(
+                "SELECT COUNT(DISTINCT lease_owner) FROM jobs WHERE status = 'running' AND lease_expires >= ?",
+                (time.time(),)
+            ).fetchone()[0]
+        return {"path": self.path, "jobs": counts, "active_workers": workers}
+
+    def purge(self, older_than_seconds: float = 7 * 24 * 3600) -> int:
+        """Delete finished jobs older than the given age; returns the number removed"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed', 'cancelled') AND finished < ?",
+                (time.time() - older_than_seconds,)
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def _row(conn: sqlite3.Connection, job_id: str) -> Optional[Dict]:
+        row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
@@ -0,0 +1,121 @@
+"""
+Tests for admission control: bounded queues, 429 rejections with Retry-After,
+stream leases and the process-wide research limit
+"""
+import asyncio
+
+import pytest
+
+from src.admission import AdmissionLimiter, AdmissionRejected, ConcurrencyLimiter, retry_after_seconds
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def scenario():
+        limiter = AdmissionLimiter("chat", max_concurrent=1, max_queued=0, default_hold=4)
+        await limiter.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        return limiter, rejected.value
+
+    limiter, rejected = asyncio.run(scenario())
+    assert rejected.reason == "queue_full"
+    assert rejected.limiter == "chat"
+    assert rejected.retry_after == 4
+    assert limiter.stats()["rejected"]["queue_full"] == 1
+
+
+def test_waiter_is_rejected_after_max_wait():
+    async def scenario():
+        limiter = AdmissionLimiter("chat", max_concurrent=1, max_queued=1, max_wait=0.05)
+        await limiter.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        return limiter, rejected.value
+
+    limiter, rejected = asyncio.run(scenario())
+    assert rejected.reason == "timeout"
+    assert limiter.waiting == 0
+
+
+def test_released_slot_reaches_a_live_waiter_when_another_gives_up():
+    async def scenario():
+        limiter = AdmissionLimiter("chat", max_concurrent=1, max_queued=2, max_wait=0.3)
+        await limiter.acquire()
+        cond = limiter._condition()
+
+        async def leaving():
+            # Stands in for a waiter whose max_wait expires as the slot is released
+            async with cond:
+                await cond.wait()
+
+        ghost = asyncio.ensure_future(leaving())
+        await asyncio.sleep(0.01)
+        staying = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0.01)
+        await limiter.release(0.1)
+        ghost.cancel()
+        await asyncio.gather(ghost, return_exceptions=True)
+        return limiter, await asyncio.gather(staying, return_exceptions=True)
+
+    limiter, (staying,) = asyncio.run(scenario())
+    assert staying is None
+    assert limiter.active == 1
+    assert limiter.waiting == 0
+
+
+def test_slot_context_releases_on_error():
+    async def scenario():
+        limiter = AdmissionLimiter("generate", max_concurrent=1)
+        with pytest.raises(RuntimeError):
+            async with limiter.slot():
+                raise RuntimeError("boom")
+        return limiter
+
+    assert asyncio.run(scenario()).active == 0
+
+
+def test_lease_release_is_idempotent():
+    async def scenario():
+        limiter = AdmissionLimiter("generate_stream", max_concurrent=1)
+        lease = await limiter.lease()
+        await lease.release()
+        await lease.release()
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.active == 0
+    assert limiter.admitted == 1
+
+
+def test_retry_after_is_clamped():
+    assert retry_after_seconds(0.1, 0, 8) == 1
+    assert retry_after_seconds(100, 50, 1) == 300
+    assert retry_after_seconds(10, 3, 2) == 20
+
+
+def test_concurrency_limiter_waits_instead_of_rejecting():
+    async def scenario():
+        limiter = ConcurrencyLimiter("research_pipelines", 2)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.running)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        return limiter, peak
+
+    limiter, peak = asyncio.run(scenario())
+    assert peak == 2
+    assert limiter.stats() == {"running": 0, "max_concurrent": 2, "waiting": 0, "saturated": False}
+
+
+def test_rejection_becomes_429_with_retry_after_header():
+    pytest.importorskip("fastapi")
+    import main
+
+    response = asyncio.run(main.admission_rejected(None, AdmissionRejected("chat", 7, "queue_full")))
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "7"
@@ -0,0 +1,79 @@
+"""
+Tests for streamed generation: only complete, non-empty streams are cached
+"""
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("requests")
+
+import src.article_writer as article_writer
+from src.llm_cache import LLMResponseCache
+
+
+class FakeResponse:
+    status = 200
+
+    def __init__(self, lines):
+        self.content = self._iterate(lines)
+
+    @staticmethod
+    async def _iterate(lines):
+        for line in lines:
+            yield line.encode("utf-8")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def post(self, url, headers=None, json=None):
+        return FakeResponse(self.lines)
+
+
+def _chunk(text):
+    return "data: " + json.dumps({"choices": [{"delta": {"content": text}}]})
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    cache = LLMResponseCache(disk_dir=None)
+    monkeypatch.setattr(article_writer, "response_cache", cache)
+    monkeypatch.setenv("MISTRAL_API_KEY", "test")
+
+    def run(lines):
+        monkeypatch.setattr(article_writer, "_get_stream_session", lambda: FakeSession(lines))
+
+        async def collect():
+            return [json.loads(chunk) async for chunk in
+                    article_writer.generate_chat_response_astream("context", "query")]
+        return asyncio.run(collect())
+
+    return cache, run
+
+
+def test_complete_stream_is_cached(stream):
+    cache, run = stream
+    chunks = run([_chunk("Hello"), _chunk(" world"), "data: [DONE]"])
+    assert chunks[-1] == {"done": True}
+    assert cache.stats()["memory_entries"] == 1
+    replay = run([])
+    assert replay[0] == {"content": "Hello world", "cached": True}
+
+
+@pytest.mark.parametrize("lines", [
+    [_chunk("Hello"), _chunk(" wor")],  # Connection closed without an end marker
+    ["data: [DONE]"],                   # Nothing generated
+])
+def test_truncated_or_empty_stream_is_not_cached(stream, lines):
+    cache, run = stream
+    run(lines)
+    assert cache.stats()["memory_entries"] == 0
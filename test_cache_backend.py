@@ -0,0 +1,128 @@
+"""
+Tests for the shared cache backends and for keeping their calls off the event loop
+"""
+import asyncio
+import threading
+
+import pytest
+
+from src.cache_backend import CacheBackend, CacheMapping, MemoryBackend, RedisBackend, SQLiteBackend, offload
+
+
+def test_backend_interface_is_abstract():
+    class Incomplete(CacheBackend):
+        def get(self, namespace, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.parametrize("make", [MemoryBackend, lambda: SQLiteBackend(":memory:")])
+def test_mapping_round_trip(make):
+    cache = CacheMapping(make(), "research")
+    cache["Acme"] = {"summary": "text", "data": [1, 2]}
+    assert cache["Acme"] == {"summary": "text", "data": [1, 2]}
+    assert "Acme" in cache and "Other" not in cache
+    assert list(cache) == ["Acme"]
+    del cache["Acme"]
+    assert cache.get("Acme") is None
+    with pytest.raises(KeyError):
+        del cache["Acme"]
+
+
+def test_sqlite_entries_expire_and_clear(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.db"))
+    backend.set("plan", "old", "1", ttl=-1)
+    backend.set("plan", "new", "2")
+    backend.set("research", "kept", "3")
+    assert backend.get("plan", "old") is None
+    assert backend.keys("plan") == ["new"]
+    backend.clear("plan")
+    assert backend.keys("plan") == [] and backend.keys("research") == ["kept"]
+
+
+def test_sqlite_reuses_one_connection_per_thread(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.db"))
+    with backend._connect() as first, backend._connect() as second:
+        assert first is second
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(backend.get("ns", "missing")))
+    thread.start()
+    thread.join()
+    assert seen == [None]
+
+
+def test_offload_runs_blocking_backends_in_a_thread(tmp_path):
+    loop_thread = threading.get_ident()
+    calls = []
+
+    class Recording(MemoryBackend):
+        blocking = True
+
+        def get(self, namespace, key):
+            calls.append(threading.get_ident())
+            return super().get(namespace, key)
+
+    async def scenario():
+        cache = CacheMapping(Recording(), "research")
+        await offload(cache, "__setitem__", "Acme", {"summary": "s"})
+        value = await offload(cache, "get", "Acme")
+        keys = await offload(cache, "keys")
+        plain = await offload({"Acme": 1}, "get", "Acme")
+        return value, keys, plain
+
+    value, keys, plain = asyncio.run(scenario())
+    assert value == {"summary": "s"} and keys == ["Acme"] and plain == 1
+    assert calls and loop_thread not in calls
+
+
+class CountingRedis:
+    """Minimal stand-in for a redis client that counts generation reads"""
+
+    def __init__(self):
+        self.data = {}
+        self.generation_reads = 0
+
+    def get(self, key):
+        if key.endswith(":generation"):
+            self.generation_reads += 1
+        return self.data.get(key)
+
+    def set(self, key, value, px=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key) or 0) + 1)
+        return int(self.data[key])
+
+
+def _redis(client, generation_ttl=60.0):
+    backend = RedisBackend.__new__(RedisBackend)
+    backend.url, backend.prefix, backend.orphan_ttl = "redis://test", "test", 60.0
+    backend.generation_ttl = generation_ttl
+    backend._generations = {}
+    backend._client = client
+    return backend
+
+
+def test_redis_generation_is_read_once_per_interval():
+    client = CountingRedis()
+    backend = _redis(client)
+    for i in range(5):
+        backend.set("research", f"k{i}", "v")
+        backend.get("research", f"k{i}")
+    assert client.generation_reads == 1
+
+    backend.clear("research")
+    assert backend.get("research", "k0") is None
+    assert client.generation_reads == 1
+
+
+def test_redis_sees_other_workers_clear_after_interval():
+    client = CountingRedis()
+    backend, other = _redis(client, generation_ttl=0.0), _redis(client)
+    backend.set("research", "Acme", "v")
+    other.clear("research")
+    assert backend.get("research", "Acme") is None
@@ -0,0 +1,58 @@
+"""
+Tests for company name normalization, aliases and fuzzy resolution
+"""
+import json
+
+import pytest
+
+from src.company_index import CompanyIndex, normalize_company_name
+
+
+@pytest.fixture
+def index(tmp_path):
+    aliases = tmp_path / "aliases.json"
+    aliases.write_text(json.dumps({
+        "Meta": ["Meta Platforms", "Facebook", "META"],
+        "Uber": ["Uber Technologies", "UBER"],
+        "Salesforce": ["CRM"],
+        "Apple": ["Apple Computer", "AAPL"],
+        "Microsoft": ["MSFT"],
+    }))
+    return CompanyIndex(str(aliases))
+
+
+def test_normalization_strips_legal_suffixes():
+    assert normalize_company_name("Microsoft Corp.") == "microsoft"
+    assert normalize_company_name("The Coca-Cola Company") == "coca cola"
+
+
+def test_aliases_and_tickers_resolve(index):
+    assert index.resolve("MSFT") == "Microsoft"
+    assert index.resolve("microsoft corporation") == "Microsoft"
+    assert index.resolve("Facebook") == "Meta"
+
+
+@pytest.mark.parametrize("name", ["Metal", "Tuber", "Ubers", "Salesforge", "Applex"])
+def test_lookalike_names_are_not_fuzzy_matched(index, name):
+    assert index.resolve(name) == name
+
+
+def test_lookalike_of_researched_company_is_not_matched(index):
+    index.add("Ford")
+    assert index.resolve("Fjord") == "Fjord"
+
+
+def test_typo_after_matching_first_word_is_resolved(index):
+    assert index.resolve("Meta Platfroms") == "Meta"
+    index.add("Goldman Sachs")
+    assert index.resolve("goldman sachss") == "Goldman Sachs"
+
+
+def test_seed_remove_and_clear(index):
+    assert index.seed(["Eightfold AI", "Stripe"]) == 2
+    assert index.resolve("eightfold ai inc") == "Eightfold AI"
+    index.remove("Stripe")
+    assert index.stats()["researched"] == 1
+    index.clear_researched()
+    assert index.resolve("eightfold ai") == "eightfold ai"
+    assert index.resolve("MSFT") == "Microsoft"
@@ -0,0 +1,78 @@
+"""
+Tests for bounded conversation history and the size of the routing prompt
+"""
+import asyncio
+
+import src.company_research_agent as agent_module
+from src.company_research_agent import RECENT_COMPANIES, CompanyResearchAgent
+from src.conversation_memory import ConversationMemory
+
+
+def _turn(i, text="message"):
+    return {"role": "user" if i % 2 == 0 else "assistant", "content": f"{text} {i}. More detail follows."}
+
+
+def test_old_turns_fold_into_summary():
+    memory = ConversationMemory(max_turns=4, summary_chars=10_000)
+    for i in range(10):
+        memory.append(_turn(i))
+    assert len(memory) == 4
+    assert [t["content"] for t in memory][0] == "message 6. More detail follows."
+    assert memory.summarized_turns == 6
+    assert memory.summary.splitlines()[0] == "user: message 0."
+
+
+def test_size_stays_bounded_however_long_the_conversation():
+    memory = ConversationMemory(max_turns=20, max_bytes=2000, max_turn_chars=300, summary_chars=400)
+    for i in range(500):
+        memory.append(_turn(i, "x" * 1000))
+        assert memory.size_bytes() <= 2000
+    assert len(memory.summary) <= 400
+    assert all(len(t["content"]) <= 300 for t in memory)
+    assert memory.total_turns == 500
+
+
+def test_prompt_context_is_bounded():
+    memory = ConversationMemory(summary_chars=300)
+    sizes = []
+    for i in range(200):
+        memory.append(_turn(i, "y" * 2000))
+        sizes.append(len(memory.prompt_context(recent=4)))
+    assert max(sizes[50:]) <= 300 + 4 * 600
+
+
+def test_list_style_access():
+    memory = ConversationMemory()
+    for i in range(3):
+        memory.append(_turn(i))
+    assert memory[-1]["content"].startswith("message 2")
+    assert len(memory[-2:]) == 2
+    memory.clear()
+    assert len(memory) == 0 and memory.summary == ""
+
+
+def test_routing_prompt_names_only_this_sessions_companies(monkeypatch):
+    prompts = []
+
+    async def fake_llm(context, query, **kwargs):
+        prompts.append(context)
+        return "Happy to help."
+
+    monkeypatch.setattr(agent_module, "agenerate_chat_response", fake_llm)
+    shared_cache = {f"Other Co {i}": {} for i in range(100)}
+    agent = CompanyResearchAgent(research_cache=shared_cache, plan_cache={})
+    for i in range(RECENT_COMPANIES + 2):
+        agent._remember_company(f"Mine {i}")
+    agent._remember_company("Mine 3")
+
+    asyncio.run(agent._handle_llm_process("hmm, what would you suggest"))
+
+    line = next(l for l in prompts[0].splitlines() if "Research loaded" in l)
+    assert "Other Co" not in prompts[0]
+    named = line.split(":", 1)[1].strip().split(", ")
+    assert len(named) == RECENT_COMPANIES
+    assert named[-1] == "Mine 3"
+
+    shared_cache["Mine 3"] = {}
+    asyncio.run(agent.clear_cache("Mine 3"))
+    assert "Mine 3" not in agent.recent_companies and "Mine 3" not in shared_cache
@@ -0,0 +1,133 @@
+"""
+Tests for cancelling request work when the client disconnects
+"""
+import asyncio
+
+import pytest
+
+from src.disconnect import ClientDisconnected, cancel_on_disconnect
+from src.metrics import requests_cancelled
+from src.single_flight import SingleFlight
+
+
+class FakeRequest:
+    """Request whose client disconnects after a number of connection checks"""
+
+    def __init__(self, connected_checks=None):
+        self.connected_checks = connected_checks
+        self.checks = 0
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return self.connected_checks is not None and self.checks > self.connected_checks
+
+
+def _cancelled_count(endpoint):
+    return requests_cancelled.snapshot().get((("endpoint", endpoint),), 0)
+
+
+def test_result_is_returned_while_connected():
+    async def work():
+        await asyncio.sleep(0.03)
+        return "plan"
+
+    request = FakeRequest()
+    assert asyncio.run(cancel_on_disconnect(request, work(), "chat", poll_interval=0.01)) == "plan"
+    assert request.checks >= 1
+
+
+def test_disconnect_cancels_the_work_down_the_task_tree():
+    cancelled = []
+
+    async def llm_call():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("llm_call")
+            raise
+
+    async def work():
+        # Work that awaits its own child task, like a pipeline awaiting an LLM call
+        child = asyncio.ensure_future(llm_call())
+        try:
+            return await child
+        except asyncio.CancelledError:
+            cancelled.append("work")
+            raise
+
+    before = _cancelled_count("test_disconnect")
+
+    async def scenario():
+        with pytest.raises(ClientDisconnected):
+            await cancel_on_disconnect(FakeRequest(connected_checks=1), work(), "test_disconnect",
+                                       poll_interval=0.01)
+
+    asyncio.run(scenario())
+    assert cancelled == ["llm_call", "work"]
+    assert _cancelled_count("test_disconnect") == before + 1
+
+
+def test_shared_research_keeps_running_for_other_waiters():
+    flights = SingleFlight()
+    runs = []
+
+    async def research():
+        runs.append("started")
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def scenario():
+        leaving = asyncio.ensure_future(cancel_on_disconnect(
+            FakeRequest(connected_checks=0), flights.do("acme", research), "research", poll_interval=0.01
+        ))
+        staying = asyncio.ensure_future(flights.do("acme", research))
+        with pytest.raises(ClientDisconnected):
+            await leaving
+        return await staying
+
+    assert asyncio.run(scenario()) == "result"
+    assert runs == ["started"]
+
+
+def test_last_waiter_leaving_cancels_shared_research():
+    flights = SingleFlight()
+    cancelled = []
+
+    async def research():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("research")
+            raise
+
+    async def scenario():
+        with pytest.raises(ClientDisconnected):
+            await cancel_on_disconnect(FakeRequest(connected_checks=0), flights.do("acme", research),
+                                       "research", poll_interval=0.01)
+        await asyncio.sleep(0)
+        return flights.in_flight()
+
+    assert asyncio.run(scenario()) == []
+    assert cancelled == ["research"]
+
+
+def test_server_cancellation_takes_the_work_down():
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("work")
+            raise
+
+    async def scenario():
+        handler = asyncio.ensure_future(cancel_on_disconnect(FakeRequest(), work(), "chat", poll_interval=0.01))
+        await asyncio.sleep(0.02)
+        handler.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await handler
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert cancelled == ["work"]
@@ -0,0 +1,76 @@
+"""
+Tests for the local intent classifier: research requests vs follow-ups about the loaded company
+"""
+import pytest
+
+from src.intent_classifier import classify_intent
+
+
+@pytest.mark.parametrize("message", [
+    "tell me more about their products",
+    "tell me about the challenges",
+    "tell me about Tesla's CEO",
+])
+def test_follow_ups_about_loaded_company_are_answered(message):
+    result = classify_intent(message, current_company="Tesla", has_research=True)
+    assert result.intent == "answer"
+    assert result.company is None
+
+
+def test_reference_to_the_assistant_falls_through_to_llm():
+    result = classify_intent("tell me about your plan", current_company="Tesla", has_research=True)
+    assert result.intent == "unknown"
+    assert not result.is_confident()
+
+
+@pytest.mark.parametrize("message", [
+    "tell me more about their products",
+    "tell me about the challenges",
+    "tell me about Tesla's CEO",
+    "tell me about your plan",
+])
+def test_follow_ups_never_start_research(message):
+    for current, has_research in (("Tesla", True), (None, False)):
+        result = classify_intent(message, current_company=current, has_research=has_research)
+        assert result.intent != "research"
+
+
+@pytest.mark.parametrize("message, company", [
+    ("research Microsoft", "Microsoft"),
+    ("tell me about eightfold.ai", "Eightfold.ai"),
+    ("can you look into Stripe please", "Stripe"),
+    ("create an account plan for Apple", "Apple"),
+])
+def test_research_requests(message, company):
+    result = classify_intent(message, current_company="Tesla", has_research=True)
+    assert result.intent == "research"
+    assert result.company == company
+    assert result.is_confident()
+
+
+def test_asking_again_about_loaded_company_reuses_it():
+    result = classify_intent("tell me about tesla", current_company="Tesla", has_research=True)
+    assert result.intent == "research"
+    assert result.company == "Tesla"
+
+
+def test_decision_log_keeps_no_message_text():
+    from src.intent_classifier import IntentDecisionLog
+
+    log = IntentDecisionLog()
+    log.record("my secret deal with Acme", "local", "research", 0.9, 0.001, "Acme")
+    entry = log.stats()["recent"][0]
+    assert "secret" not in str(entry)
+    assert entry["input_chars"] == len("my secret deal with Acme")
+
+
+@pytest.mark.parametrize("message", ["thanks!", "Thank you so much.", "ok, thanks", "Great, thank you!", "cheers"])
+def test_thank_you_messages(message):
+    assert classify_intent(message).intent == "thanks"
+
+
+@pytest.mark.parametrize("message", ["ok", "okay", "great", "cool", "awesome", "perfect!"])
+def test_bare_acknowledgements_fall_through_to_llm(message):
+    # "ok" may confirm a pending question (e.g. "shall I generate the plan?")
+    result = classify_intent(message, current_company="Tesla", has_research=True)
+    assert result.intent == "unknown"
@@ -0,0 +1,48 @@
+"""
+Tests for the LLM response cache
+"""
+from src.llm_cache import LLMResponseCache
+
+
+def test_key_depends_on_model_and_params():
+    base = LLMResponseCache.make_key("mistral/mistral-small-latest", "system", "prompt")
+    assert base == LLMResponseCache.make_key("mistral/mistral-small-latest", "system", "prompt", {})
+    assert base != LLMResponseCache.make_key("groq/llama-3.1-8b-instant", "system", "prompt")
+    assert base != LLMResponseCache.make_key("mistral/mistral-small-latest", "system", "prompt",
+                                             {"temperature": 0.2})
+
+
+def test_get_any_returns_first_hit_and_counts_one_miss():
+    cache = LLMResponseCache(disk_dir=None)
+    cache.set("b", "from b")
+    assert cache.get_any(["a", "b"]) == "from b"
+    assert cache.get_any(["a", "c"]) is None
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1 and stats["misses"] == 1
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    first = LLMResponseCache(disk_dir=str(tmp_path))
+    first.set("key", "answer")
+    second = LLMResponseCache(disk_dir=str(tmp_path))
+    assert second.get("key") == "answer"
+    assert second.stats()["disk_hits"] == 1
+    assert second.get("key") == "answer"
+    assert second.stats()["memory_hits"] == 1
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = LLMResponseCache(max_entries=2, disk_dir=None)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+
+
+def test_disk_tier_evicts_over_its_byte_limit(tmp_path):
+    cache = LLMResponseCache(max_entries=1, disk_dir=str(tmp_path), max_disk_bytes=100)
+    for i in range(5):
+        cache.set(f"k{i}", "x" * 30)
+    assert cache.stats()["disk_bytes"] <= 100
@@ -0,0 +1,74 @@
+"""
+Tests for LLM provider routing: circuit breaker and abandoned calls
+"""
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from src.llm_router import CircuitBreaker, LLMRouter, ProviderConfig
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_after_cooldown():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=0.05)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()          # The single half-open probe
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.0)
+    breaker.record(False)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_high_error_rate_opens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=10, error_rate_threshold=0.5, min_samples=4)
+    for success in (True, False, True, False):
+        breaker.record(success)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def _router(monkeypatch):
+    monkeypatch.setenv("TEST_LLM_KEY", "key")
+    provider = ProviderConfig("test", "http://llm.invalid", "TEST_LLM_KEY", {"generate": "model"},
+                              expected_latency={"generate": 1.0})
+    return LLMRouter([provider])
+
+
+def test_abandoned_probe_is_released_without_counting_a_failure(monkeypatch):
+    router = _router(monkeypatch)
+    route = router.route("generate")[0]
+    route.health.breaker.cooldown = 0.0
+    for _ in range(3):
+        router.record(route, False, 0.1)
+    assert route.health.breaker.state == CircuitBreaker.OPEN
+
+    assert router.admit(route)      # Half-open probe
+    failures = route.health.failures
+    router.abandon(route)
+    assert route.health.failures == failures
+    assert router.admit(route)      # The probe slot is free again
+
+
+def test_faster_route_is_tried_first(monkeypatch):
+    monkeypatch.setenv("FAST_KEY", "key")
+    monkeypatch.setenv("SLOW_KEY", "key")
+    router = LLMRouter([
+        ProviderConfig("slow", "http://slow.invalid", "SLOW_KEY", {"generate": "m"}, {"generate": 1.0}),
+        ProviderConfig("fast", "http://fast.invalid", "FAST_KEY", {"generate": "m"}, {"generate": 1.0}),
+    ])
+    fast, slow = sorted(router.route("generate"), key=lambda r: r.provider.name)
+    router.record(slow, True, 3.0)
+    router.record(fast, True, 0.5)
+    assert [r.provider.name for r in router.route("generate")] == ["fast", "slow"]
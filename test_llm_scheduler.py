@@ -0,0 +1,101 @@
+"""
+Tests for the LLM request scheduler: priorities, per-flow fairness and cancellation
+"""
+import asyncio
+
+from src.llm_scheduler import LLMScheduler, Priority, TokenBucket, estimate_tokens
+
+
+def _admission_order(scheduler, tickets):
+    order = []
+    pending = list(tickets)
+    while pending:
+        for ticket in pending:
+            with scheduler._cond:
+                admitted, _ = scheduler._try_admit(ticket)
+            if admitted:
+                order.append(ticket)
+                pending.remove(ticket)
+                break
+        else:
+            raise AssertionError("no ticket could be admitted")
+    return order
+
+
+def test_interactive_calls_go_before_background():
+    scheduler = LLMScheduler({"p": (600, 1_000_000)})
+    background = scheduler._enqueue("p", Priority.BACKGROUND, "bulk", 10)
+    interactive = scheduler._enqueue("p", Priority.INTERACTIVE, "user", 10)
+    assert _admission_order(scheduler, [background, interactive]) == [interactive, background]
+
+
+def test_flows_take_turns_within_a_priority():
+    scheduler = LLMScheduler({"p": (600, 1_000_000)})
+    big = [scheduler._enqueue("p", Priority.BACKGROUND, "Acme", 10) for _ in range(3)]
+    small = scheduler._enqueue("p", Priority.BACKGROUND, "Globex", 10)
+    order = _admission_order(scheduler, big + [small])
+    assert [t.flow for t in order] == ["Acme", "Globex", "Acme", "Acme"]
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = LLMScheduler({"p": (1, 1_000_000)})
+    scheduler.acquire("p", tokens=10)  # Uses the only request this minute
+
+    async def scenario():
+        waiter = asyncio.ensure_future(scheduler.acquire_async("p", tokens=10))
+        await asyncio.sleep(0.01)
+        assert scheduler.metrics()["p"]["queue_depth"]["interactive"] == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert scheduler.metrics()["p"]["queue_depth"]["interactive"] == 0
+
+
+def test_reported_usage_corrects_the_token_bucket():
+    scheduler = LLMScheduler({"p": (600, 10_000)})
+    slot = scheduler.acquire("p", tokens=4000)
+    assert scheduler.metrics()["p"]["available_tokens"] == 6000
+    slot.record_usage(1000)
+    assert scheduler.metrics()["p"]["available_tokens"] == 9000
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(60)  # One token per second
+    bucket.take(60)
+    assert 9 < bucket.wait_time(10) <= 10
+    # Requests larger than the bucket only wait for a full bucket
+    assert bucket.wait_time(1000) <= 60
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("x" * 400, completion_tokens=100) == 200
+
+
+def test_async_waiter_sleeps_until_woken():
+    scheduler = LLMScheduler({"p": (600, 1_000_000)})
+    head = scheduler._enqueue("p", Priority.INTERACTIVE, "user", 10)
+    checks = []
+    try_admit = scheduler._try_admit
+
+    def counting_try_admit(ticket):
+        if ticket is not head:
+            checks.append(ticket)
+        return try_admit(ticket)
+
+    scheduler._try_admit = counting_try_admit
+
+    async def scenario():
+        waiter = asyncio.ensure_future(scheduler.acquire_async("p", tokens=10))
+        await asyncio.sleep(0.3)
+        assert not waiter.done()
+        idle_checks = len(checks)
+        with scheduler._cond:
+            assert scheduler._try_admit(head)[0]
+        slot = await asyncio.wait_for(waiter, 1.0)
+        return idle_checks, slot
+
+    idle_checks, slot = asyncio.run(scenario())
+    assert idle_checks == 1  # Checked once, then slept instead of polling
+    assert slot.provider == "p"
+    assert not scheduler._async_waiters
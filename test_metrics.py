@@ -0,0 +1,81 @@
+"""
+Tests for the metrics registry and its Prometheus text output
+"""
+import pytest
+
+from src.metrics import MetricsRegistry
+
+
+def _lines(registry):
+    return registry.render().splitlines()
+
+
+def test_counter_and_gauge_series_per_label_set():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests")
+    requests.inc(endpoint="chat")
+    requests.inc(2, endpoint="chat")
+    requests.inc(endpoint="research")
+    in_flight = registry.gauge("in_flight", "Work in flight")
+    with in_flight.track(kind="llm"):
+        assert 'in_flight{kind="llm"} 1' in _lines(registry)
+    in_flight.set(2.5, kind="fetch")
+
+    lines = _lines(registry)
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{endpoint="chat"} 3' in lines
+    assert 'requests_total{endpoint="research"} 1' in lines
+    assert 'in_flight{kind="llm"} 0' in lines
+    assert 'in_flight{kind="fetch"} 2.5' in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value, stage="search")
+
+    lines = _lines(registry)
+    assert 'latency_seconds_bucket{stage="search",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="search",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{stage="search",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{stage="search"} 3.65' in lines
+    assert 'latency_seconds_count{stage="search"} 4' in lines
+
+
+def test_histogram_time_records_failed_blocks():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency")
+    with pytest.raises(RuntimeError):
+        with latency.time(stage="fetch"):
+            raise RuntimeError("boom")
+    assert 'latency_seconds_count{stage="fetch"} 1' in _lines(registry)
+
+
+def test_metrics_without_samples_are_omitted_and_names_are_shared():
+    registry = MetricsRegistry()
+    first = registry.counter("calls_total", "Calls")
+    assert registry.counter("calls_total", "Calls") is first
+    assert registry.render() == "\n"
+
+
+def test_collectors_run_on_render_and_failures_are_skipped():
+    registry = MetricsRegistry()
+    depth = [3]
+    registry.register_collector(lambda: [
+        ("queue_depth", "gauge", "Queued jobs", {"queue": "research"}, depth[0]),
+        ("queue_depth", "gauge", "Queued jobs", {"queue": "batch"}, 1),
+    ])
+    registry.register_collector(lambda: 1 / 0)
+
+    assert 'queue_depth{queue="research"} 3' in _lines(registry)
+    depth[0] = 0
+    lines = _lines(registry)
+    assert lines.count("# TYPE queue_depth gauge") == 1
+    assert 'queue_depth{queue="research"} 0' in lines and 'queue_depth{queue="batch"} 1' in lines
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Errors").inc(message='bad "quote"\nnext')
+    assert 'errors_total{message="bad \\"quote\\"\\nnext"} 1' in _lines(registry)
@@ -0,0 +1,115 @@
+"""
+Tests for plan file serving: path validation, encoding negotiation and conditional requests
+"""
+import asyncio
+import gzip
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import src.plan_files as plan_files_module
+from src.plan_files import PlanFileCache, PlanNotFound, negotiate_encoding, resolve_plan_path
+
+
+@pytest.fixture
+def plans(tmp_path):
+    plans_dir = tmp_path / "plans"
+    plans_dir.mkdir()
+    (plans_dir / "account_plan_Acme_20250101_100000.md").write_text("# Acme\n" + "Growth plan. " * 100)
+    (tmp_path / "secret.md").write_text("not a plan")
+    return PlanFileCache(str(plans_dir))
+
+
+@pytest.mark.parametrize("name", [
+    "../secret.md", "..%2Fsecret.md", "sub/plan.md", ".hidden.md", "plan.txt", "/etc/passwd.md"
+])
+def test_names_outside_the_plans_directory_are_rejected(plans, name):
+    with pytest.raises((ValueError, PlanNotFound)):
+        plans.load(name)
+
+
+def test_traversal_does_not_read_files_outside_the_directory(plans, tmp_path):
+    with pytest.raises(ValueError):
+        resolve_plan_path("../secret.md", plans.plans_dir)
+    # A symlink inside the directory that points outside it is refused too
+    os.symlink(tmp_path / "secret.md", os.path.join(plans.plans_dir, "link.md"))
+    with pytest.raises(ValueError):
+        plans.load("link.md")
+
+
+@pytest.mark.parametrize("header, brotli, expected", [
+    (None, True, None),
+    ("gzip, deflate", False, "gzip"),
+    ("gzip, br", True, "br"),
+    ("gzip, br", False, "gzip"),
+    ("br;q=0, gzip", True, "gzip"),
+    ("gzip;q=0", False, None),
+    ("*", False, "gzip"),
+    ("*, gzip;q=0", False, None),
+    ("identity", True, None),
+])
+def test_negotiate_encoding(monkeypatch, header, brotli, expected):
+    monkeypatch.setattr(plan_files_module, "BROTLI_AVAILABLE", brotli)
+    assert negotiate_encoding(header) == expected
+
+
+def test_bodies_and_etags_per_representation(plans):
+    plan = plans.load("account_plan_Acme_20250101_100000.md")
+    assert json.loads(plan.body("json"))["filename"] == "account_plan_Acme_20250101_100000.md"
+    assert gzip.decompress(plan.body("md", "gzip")) == plan.content
+    assert plan.body("md", "gzip") is plan.body("md", "gzip")
+    etags = {plan.etag("md"), plan.etag("json"), plan.etag("md", "gzip"), plan.etag("json", "gzip")}
+    assert len(etags) == 4
+
+
+def test_conditional_requests(plans):
+    plan = plans.load("account_plan_Acme_20250101_100000.md")
+    etag = plan.etag("md")
+    assert plan.not_modified(etag, etag, None)
+    assert plan.not_modified(etag, f'"other", W/{etag}', None)
+    assert plan.not_modified(etag, "*", None)
+    assert not plan.not_modified(etag, '"other"', None)
+    assert plan.not_modified(etag, None, plan.last_modified)
+    assert not plan.not_modified(etag, None, "Thu, 01 Jan 1970 00:00:00 GMT")
+    # If-None-Match takes precedence over If-Modified-Since
+    assert not plan.not_modified(etag, '"other"', plan.last_modified)
+
+
+def test_cache_revalidates_changed_files(plans):
+    name = "account_plan_Acme_20250101_100000.md"
+    first = plans.load(name)
+    assert plans.load(name) is first
+    path = os.path.join(plans.plans_dir, name)
+    with open(path, "a") as f:
+        f.write("More.")
+    second = plans.load(name)
+    assert second is not first and second.etag("md") != first.etag("md")
+    assert plans.stats()["hits"] == 1 and plans.stats()["misses"] == 2
+
+
+def test_endpoint_answers_304_and_compresses(plans, monkeypatch):
+    pytest.importorskip("fastapi")
+    import main
+
+    monkeypatch.setattr(main, "plan_files", plans)
+    monkeypatch.setattr(plan_files_module, "BROTLI_AVAILABLE", False)
+    name = "account_plan_Acme_20250101_100000.md"
+
+    def get(raw=False, **headers):
+        request = SimpleNamespace(headers=headers)
+        return asyncio.run(main.get_account_plan(name, request, raw=raw))
+
+    full = get(**{"accept-encoding": "gzip"})
+    assert full.status_code == 200 and full.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(full.body))["filename"] == name
+
+    repeat = get(**{"accept-encoding": "gzip", "if-none-match": full.headers["etag"]})
+    assert repeat.status_code == 304 and repeat.headers["etag"] == full.headers["etag"]
+    # The identity representation has its own ETag, so the gzip one does not validate it
+    assert get(**{"if-none-match": full.headers["etag"]}).status_code == 200
+
+    with pytest.raises(main.HTTPException) as raised:
+        asyncio.run(main.get_account_plan("../secret.md", SimpleNamespace(headers={})))
+    assert raised.value.status_code == 400
@@ -0,0 +1,82 @@
+"""
+Tests for the SQLite plan index
+"""
+import os
+from datetime import datetime
+
+import pytest
+
+from src.plan_index import PlanIndex, parse_plan_filename
+
+
+@pytest.fixture
+def plans(tmp_path):
+    plans_dir = tmp_path / "plans"
+    plans_dir.mkdir()
+
+    def write(filename, text="# Plan"):
+        (plans_dir / filename).write_text(text)
+        return filename
+
+    index = PlanIndex(str(tmp_path / "db" / "plans.db"), str(plans_dir))
+    return index, write
+
+
+def test_database_is_created_on_first_use(tmp_path):
+    path = tmp_path / "db" / "plans.db"
+    index = PlanIndex(str(path), str(tmp_path / "plans"))
+    assert not path.parent.exists()
+    assert index.query()["total"] == 0
+    assert path.exists()
+
+
+def test_parse_plan_filename():
+    assert parse_plan_filename("account_plan_Acme_Corp_20250102_030405.md") == ("Acme Corp", "20250102_030405")
+    assert parse_plan_filename("notes.md") == ("Unknown", "")
+
+
+def test_add_and_filter_by_company_and_date(plans):
+    index, write = plans
+    index.add(write("account_plan_Acme_20250101_100000.md"))
+    index.add(write("account_plan_Acme_20250301_100000.md"))
+    index.add(write("account_plan_Globex_20250201_100000.md"))
+    assert not index.add("account_plan_Missing_20250101_100000.md")
+
+    result = index.query()
+    assert result["total"] == 3
+    assert [plan["company"] for plan in result["plans"]] == ["Acme", "Globex", "Acme"]
+    assert index.query(company="ACME")["total"] == 2
+    assert index.query(start=datetime(2025, 2, 1))["total"] == 2
+    assert index.query(end=datetime(2025, 1, 31))["total"] == 1
+    latest = index.query(latest_per_company=True)["plans"]
+    assert [plan["filename"] for plan in latest] == [
+        "account_plan_Acme_20250301_100000.md", "account_plan_Globex_20250201_100000.md"
+    ]
+
+
+def test_pagination_and_since_cursor(plans):
+    index, write = plans
+    for day in range(1, 6):
+        index.add(write(f"account_plan_Acme_202501{day:02d}_100000.md"))
+    page = index.query(limit=2, offset=2)
+    assert page["total"] == 5 and len(page["plans"]) == 2
+    assert page["plans"][0]["timestamp"] == "20250103_100000"
+
+    cursor = page["cursor"]
+    index.add(write("account_plan_Globex_20250110_100000.md"))
+    new = index.query(since=cursor)
+    assert [plan["company"] for plan in new["plans"]] == ["Globex"]
+    assert new["cursor"] == cursor + 1
+
+
+def test_rebuild_reconciles_with_the_directory(plans, tmp_path):
+    index, write = plans
+    index.add(write("account_plan_Acme_20250101_100000.md"))
+    index.add(write("account_plan_Gone_20250101_100000.md"))
+    os.remove(tmp_path / "plans" / "account_plan_Gone_20250101_100000.md")
+    write("account_plan_New_20250102_100000.md")
+
+    assert index.rebuild() == {"indexed": 1, "removed": 1, "total": 2}
+    # Unchanged files are not re-indexed on the next rebuild
+    assert index.rebuild() == {"indexed": 0, "removed": 0, "total": 2}
+    assert sorted(plan["company"] for plan in index.query()["plans"]) == ["Acme", "New"]
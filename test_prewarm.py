@@ -0,0 +1,82 @@
+"""
+Tests for cache pre-warming: runs from the loop and the API never overlap
+"""
+import asyncio
+from datetime import datetime
+
+from src.prewarm import PrewarmScheduler
+
+
+class FakeAgent:
+    active = 0
+    peak = 0
+
+    def __init__(self, research_cache, plan_cache):
+        self.research_cache = research_cache
+        self.plan_cache = plan_cache
+
+    async def _research_flight(self, company_name):
+        FakeAgent.active += 1
+        FakeAgent.peak = max(FakeAgent.peak, FakeAgent.active)
+        await asyncio.sleep(0.01)
+        FakeAgent.active -= 1
+        return {"data": [], "summary": "s", "timestamp": datetime.now().isoformat(),
+                "plan": {"executive_summary": "text"}, "plan_filename": "plan.md"}
+
+    async def _cache_research(self, company_name, result):
+        self.research_cache[company_name] = {"data": [], "summary": "s", "timestamp": result["timestamp"]}
+        self.plan_cache[company_name] = result["plan"]
+
+
+def _scheduler(tmp_path, companies):
+    research_cache, plan_cache = {}, {}
+    return PrewarmScheduler(lambda: FakeAgent(research_cache, plan_cache), research_cache, plan_cache,
+                            watchlist_file=str(tmp_path / "watchlist.json"), extra_companies=companies,
+                            pause=0)
+
+
+def test_concurrent_runs_are_serialized(tmp_path):
+    FakeAgent.active = FakeAgent.peak = 0
+    scheduler = _scheduler(tmp_path, ["Acme", "Globex", "Initech"])
+
+    async def scenario():
+        first = asyncio.ensure_future(scheduler.run_once(ignore_window=True))
+        await asyncio.sleep(0)
+        assert scheduler.running
+        second = await scheduler.run_once(ignore_window=True)
+        return await first, second
+
+    first, second = asyncio.run(scenario())
+    assert FakeAgent.peak == 1
+    assert first["warmed"] == 3
+    assert second["warmed"] == 0 and second["fresh"] == 3
+    assert not scheduler.running
+
+
+def test_due_reports_why_a_company_needs_a_refresh(tmp_path):
+    scheduler = _scheduler(tmp_path, [])
+    scheduler.research_cache["Acme"] = {"timestamp": datetime.now().isoformat()}
+    scheduler.research_cache["Old"] = {"timestamp": "2000-01-01T00:00:00"}
+    scheduler.plan_cache["Old"] = {"executive_summary": "text"}
+
+    async def scenario():
+        return [await scheduler.due(name) for name in ("Missing", "Acme", "Old")]
+
+    assert asyncio.run(scenario()) == ["missing", "no_plan", "aged"]
+
+
+def test_start_run_refuses_while_a_run_holds_the_lock(tmp_path):
+    scheduler = _scheduler(tmp_path, ["Acme"])
+
+    async def scenario():
+        first = await scheduler.start_run(ignore_window=True)
+        # Rejected before the first run's task has had a chance to start
+        second = await scheduler.start_run(ignore_window=True)
+        status = await scheduler.status()
+        result = await first
+        return second, status, result
+
+    second, status, result = asyncio.run(scenario())
+    assert second is None
+    assert status["running"] and status["watchlist"] == ["Acme"]
+    assert result["warmed"] == 1 and not scheduler.running
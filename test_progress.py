@@ -0,0 +1,63 @@
+"""
+Tests for the progress broker: session scoping of streamed events
+"""
+import asyncio
+
+from src.progress import ProgressBroker, SessionProgress, public_event
+
+
+def _collect(broker, publish, **filters):
+    async def scenario():
+        seen = []
+
+        async def reader():
+            async for event in broker.subscribe(heartbeat=0.05, **filters):
+                if event is None:
+                    return
+                seen.append(event)
+
+        task = asyncio.ensure_future(reader())
+        await asyncio.sleep(0)
+        publish()
+        await task
+        return seen
+
+    return asyncio.run(scenario())
+
+
+def test_subscriber_sees_only_its_sessions_events():
+    broker = ProgressBroker()
+    mine, theirs = SessionProgress("mine", broker), SessionProgress("theirs", broker)
+
+    def publish():
+        mine.publish("search_started", company="Acme")
+        theirs.publish("search_started", company="Globex")
+        broker.publish("job_completed", job_id="j1", session_id="theirs")
+        broker.publish("plan_completed", company="Initech")  # Untagged, e.g. pre-warming
+
+    seen = _collect(broker, publish, session_id="mine")
+    assert [(e["type"], e["company"]) for e in seen] == [("search_started", "Acme")]
+
+
+def test_client_without_session_sees_no_events():
+    broker = ProgressBroker()
+    seen = _collect(broker, lambda: SessionProgress("s", broker).publish("search_started"), session_id="")
+    assert seen == []
+
+
+def test_replayed_history_is_filtered_too():
+    broker = ProgressBroker()
+    since = broker.publish("state_changed", state="idle")["id"]
+    SessionProgress("a", broker).publish("search_started", company="Acme")
+    SessionProgress("b", broker).publish("search_started", company="Globex")
+
+    async def scenario():
+        async for event in broker.subscribe(since=since, session_id="b", heartbeat=0.01):
+            return event
+    assert asyncio.run(scenario())["company"] == "Globex"
+
+
+def test_session_id_is_never_sent_to_clients():
+    event = SessionProgress("secret-id", ProgressBroker()).publish("state_changed", state="idle")
+    assert event["session_id"] == "secret-id"
+    assert "session_id" not in public_event(event)
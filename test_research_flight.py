@@ -0,0 +1,88 @@
+"""
+Tests for shared research runs: a dedicated agent runs the pipeline and
+every waiting agent follows its progress
+"""
+import asyncio
+
+import pytest
+
+from src.company_research_agent import CompanyResearchAgent, ResearchState, _flight_progress
+
+
+class RecordingProgress:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event_type, **fields):
+        self.events.append((event_type, fields))
+        return {"type": event_type, **fields}
+
+
+@pytest.fixture
+def slow_pipeline(monkeypatch):
+    runners = []
+
+    async def pipeline(self, company_name):
+        runners.append(self)
+        self.state = ResearchState.SUMMARIZING
+        await asyncio.sleep(0.05)
+        self.state = ResearchState.GENERATING_PLAN
+        self._emit("plan_completed", filename="plan.md")
+        return {"data": [], "summary": "summary", "timestamp": "2026-01-01T00:00:00",
+                "plan": {"executive_summary": "text"}, "plan_filename": "plan.md"}
+
+    monkeypatch.setattr(CompanyResearchAgent, "_run_research_pipeline", pipeline)
+    return runners
+
+
+def _agent(progress, research_cache, plan_cache):
+    return CompanyResearchAgent(progress=progress, research_cache=research_cache, plan_cache=plan_cache)
+
+
+def test_pipeline_runs_on_a_dedicated_agent_and_every_waiter_gets_events(slow_pipeline):
+    async def scenario():
+        research_cache, plan_cache = {}, {}
+        first, second = RecordingProgress(), RecordingProgress()
+        a = _agent(first, research_cache, plan_cache)
+        b = _agent(second, research_cache, plan_cache)
+        results = await asyncio.gather(a._research_flight("Acme"), b._research_flight("Acme"))
+        return a, b, first, second, results
+
+    a, b, first, second, results = asyncio.run(scenario())
+    assert len(slow_pipeline) == 1
+    assert slow_pipeline[0] not in (a, b)
+    assert results[0] is results[1]
+    for progress in (first, second):
+        assert ("plan_completed", {"filename": "plan.md", "company": "Acme"}) in progress.events
+    assert a.state is ResearchState.GENERATING_PLAN and b.state is ResearchState.GENERATING_PLAN
+    assert not _flight_progress
+
+
+def test_cancelled_caller_is_left_alone_while_others_still_wait(slow_pipeline):
+    async def scenario():
+        research_cache, plan_cache = {}, {}
+        first, second = RecordingProgress(), RecordingProgress()
+        a = _agent(first, research_cache, plan_cache)
+        b = _agent(second, research_cache, plan_cache)
+        task_a = asyncio.ensure_future(a._handle_company_research("research Acme"))
+        await asyncio.sleep(0.01)
+        task_b = asyncio.ensure_future(b._handle_company_research("research Acme"))
+        await asyncio.sleep(0.01)
+        task_a.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task_a
+        events_at_cancel = len(first.events)
+        message = await task_b
+        return a, b, first, second, events_at_cancel, message
+
+    a, b, first, second, events_at_cancel, message = asyncio.run(scenario())
+    assert len(slow_pipeline) == 1
+    # Nothing was written to the cancelled caller after it went away
+    assert a.state is ResearchState.IDLE
+    assert len(first.events) == events_at_cancel
+    assert a.account_plan == {}
+    # The caller that joined got the stage events and the result
+    assert ("plan_completed", {"filename": "plan.md", "company": "Acme"}) in second.events
+    assert b.state is ResearchState.COMPLETE
+    assert b.account_plan == {"executive_summary": "text"}
+    assert "plan.md" in message
@@ -0,0 +1,149 @@
+"""
+Tests for the background research job queue
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.progress import ProgressBroker
+from src.research_jobs import JobProgress, JobQueueFull, JobStatus, ResearchJob, ResearchJobQueue
+
+
+def _queue(runner, **limits):
+    return ResearchJobQueue(runner, ProgressBroker(), **limits)
+
+
+async def _settle(queue, *jobs):
+    while not all(job.done for job in jobs):
+        await asyncio.sleep(0.01)
+
+
+def test_queue_position_and_full_queue():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def runner(job):
+            await release.wait()
+            return {"company": job.company}
+
+        queue = _queue(runner, workers=1, max_pending=2)
+        first = queue.submit("Acme", "s1")
+        await asyncio.sleep(0)
+        second, third = queue.submit("Globex", "s1"), queue.submit("Initech", "s2")
+        positions = [queue.position(job) for job in (first, second, third)]
+        with pytest.raises(JobQueueFull):
+            queue.submit("Umbrella", "s1")
+        release.set()
+        await _settle(queue, first, second, third)
+        return queue, positions, first
+
+    queue, positions, first = asyncio.run(scenario())
+    assert positions == [None, 1, 2]
+    assert first.status is JobStatus.COMPLETED and first.result == {"company": "Acme"}
+    assert [job["company"] for job in queue.jobs("s1")] == ["Globex", "Acme"]
+
+
+def test_cancel_queued_and_running_jobs():
+    async def scenario():
+        cancelled = []
+
+        async def runner(job):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(job.company)
+                raise
+
+        queue = _queue(runner, workers=1)
+        running, queued = queue.submit("Acme"), queue.submit("Globex")
+        await asyncio.sleep(0.01)
+        assert running.status is JobStatus.RUNNING
+        assert queue.cancel(queued.job_id)
+        assert queued.status is JobStatus.CANCELLED and queue.position(queued) is None
+        assert queue.cancel(running.job_id)
+        await _settle(queue, running)
+        assert not queue.cancel(running.job_id)
+        await queue.stop()
+        return running, cancelled
+
+    running, cancelled = asyncio.run(scenario())
+    assert running.status is JobStatus.CANCELLED
+    # Only the running job's runner was started (and then cancelled)
+    assert cancelled == ["Acme"]
+
+
+def test_failed_runner_marks_job_failed():
+    async def runner(job):
+        raise RuntimeError("search API down")
+
+    async def scenario():
+        queue = _queue(runner)
+        job = queue.submit("Acme")
+        await _settle(queue, job)
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status is JobStatus.FAILED and job.error == "search API down"
+
+
+def test_history_keeps_only_recent_finished_jobs():
+    async def runner(job):
+        return {}
+
+    async def scenario():
+        queue = _queue(runner, history_size=2)
+        jobs = []
+        for name in ["A", "B", "C", "D"]:
+            jobs.append(queue.submit(name))
+            await _settle(queue, jobs[-1])
+        return queue, jobs
+
+    queue, jobs = asyncio.run(scenario())
+    # Trimmed on submit: the newest job plus history_size finished ones remain
+    assert [job["company"] for job in queue.jobs()] == ["D", "C", "B"]
+    assert queue.get(jobs[0].job_id) is None
+
+
+def test_retry_after_grows_with_the_backlog():
+    queue = _queue(None, workers=2, max_pending=4)
+    queue.run_seconds = 30.0
+    queue._pending.extend(["a", "b", "c", "d"])
+    short = queue.retry_after()
+    queue._pending.extend(["e", "f", "g", "h"])
+    assert queue.retry_after() > short >= 1
+
+
+def test_job_progress_records_stage_timings():
+    broker = ProgressBroker()
+    job = ResearchJob("Acme", "s1")
+    progress = JobProgress(job, broker)
+    for state in ["researching", "generating_plan", "complete"]:
+        progress.publish("state_changed", state=state)
+    progress.publish("research_failed", error="boom")
+
+    assert [stage["stage"] for stage in job.stages] == ["researching", "generating_plan"]
+    assert all(stage["duration_ms"] is not None for stage in job.stages)
+    assert job.error == "boom"
+    assert broker.last_id() == 4
+
+
+def test_job_endpoints_hide_other_sessions_jobs():
+    pytest.importorskip("fastapi")
+    import main
+    from fastapi import HTTPException
+
+    owner, other = main.sessions.new_session_id(), main.sessions.new_session_id()
+    job = main.research_jobs._jobs.setdefault("owned", SimpleNamespace(job_id="owned", session_id=owner))
+
+    def request(session_id):
+        return SimpleNamespace(headers={main.SESSION_HEADER: session_id} if session_id else {}, cookies={})
+
+    try:
+        assert main._get_job("owned", request(owner)) is job
+        for caller in (other, None, "forged-id"):
+            with pytest.raises(HTTPException) as raised:
+                main._get_job("owned", request(caller))
+            assert raised.value.status_code == 404
+    finally:
+        main.research_jobs._jobs.pop("owned", None)
@@ -0,0 +1,66 @@
+"""
+Tests for per-session agents: server-issued ids and cheap memory accounting
+"""
+import asyncio
+
+from src.company_research_agent import CompanyResearchAgent
+from src.session_manager import SessionManager, estimate_agent_bytes
+
+
+def _manager(**kwargs):
+    return SessionManager(
+        lambda session_id, research_cache, plan_cache: CompanyResearchAgent(
+            research_cache=research_cache, plan_cache=plan_cache),
+        **kwargs
+    )
+
+
+def test_only_issued_ids_are_valid():
+    manager = _manager(secret="s1")
+    issued = manager.new_session_id()
+    assert manager.is_valid_id(issued)
+    assert not manager.is_valid_id("my-chosen-id")
+    assert not manager.is_valid_id(issued.split(".")[0] + ".0000")
+    assert not manager.is_valid_id(None)
+    assert _manager(secret="s1").is_valid_id(issued)
+    assert not _manager(secret="s2").is_valid_id(issued)
+
+
+def test_peek_never_creates_a_session():
+    manager = _manager()
+    assert manager.peek(manager.new_session_id()) is None
+    assert manager.stats()["active_sessions"] == 0
+
+
+def test_session_size_tracks_research_history_and_plan():
+    manager = _manager()
+    session_id = manager.new_session_id()
+
+    async def scenario():
+        async with manager.use(session_id) as agent:
+            agent._set_research_data("Acme", [{"full_text": "x" * 5000}])
+            agent.context_summary = "y" * 1000
+            agent.account_plan = {"executive_summary": "z" * 2000}
+            agent.conversation_history.append({"role": "user", "content": "hello"})
+        return agent
+
+    agent = asyncio.run(scenario())
+    size = manager.get(session_id).size_bytes
+    assert size == estimate_agent_bytes(agent)
+    assert 8000 < size < 8200
+    assert manager.memory_bytes() == size
+
+
+def test_memory_cap_evicts_least_recently_used():
+    manager = _manager(max_memory_bytes=12_000)
+    ids = [manager.new_session_id() for _ in range(3)]
+
+    async def scenario():
+        for session_id in ids:
+            async with manager.use(session_id) as agent:
+                agent._set_research_data("Acme", "x" * 5000)
+
+    asyncio.run(scenario())
+    assert manager.peek(ids[0]) is None
+    assert manager.peek(ids[2]) is not None
+    assert manager.stats()["evicted"]["memory"] == 1
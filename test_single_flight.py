@@ -0,0 +1,83 @@
+"""
+Tests for single-flight deduplication and cancellation of shared research
+"""
+import asyncio
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    async def scenario():
+        flights = SingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+        return results, runs, flights.in_flight()
+
+    results, runs, in_flight = asyncio.run(scenario())
+    assert results == ["result"] * 5
+    assert len(runs) == 1
+    assert in_flight == []
+
+
+def test_cancelling_one_waiter_keeps_the_run_for_the_others():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        first = asyncio.ensure_future(flights.do("k", work))
+        second = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+
+    result, first_cancelled = asyncio.run(scenario())
+    assert result == "result"
+    assert first_cancelled
+
+
+def test_cancelling_the_last_waiter_cancels_the_run():
+    async def scenario():
+        flights = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return flights.in_flight()
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_errors_reach_every_waiter():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        return await asyncio.gather(flights.do("k", work), flights.do("k", work), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
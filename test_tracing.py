@@ -0,0 +1,92 @@
+"""
+Tests for request tracing and the sampling profiler
+"""
+import asyncio
+import time
+
+import pytest
+
+import src.tracing as tracing
+from src.tracing import ProfilerBusy, SamplingProfiler, diagnostics, span, start_trace, traced
+
+
+def test_span_without_trace_is_a_no_op():
+    with span("lookup", company="Acme") as attrs:
+        attrs["result"] = "hit"
+    assert tracing.current_trace() is None
+
+
+def test_spans_nest_and_record_errors():
+    with start_trace("research") as trace:
+        with span("outer"):
+            with span("inner", url="https://a.example") as attrs:
+                attrs["status"] = 200
+            with pytest.raises(ValueError):
+                with span("failing"):
+                    raise ValueError("bad page")
+    timeline = trace.timeline()
+
+    spans = {record["name"]: record for record in timeline["spans"]}
+    assert [record["name"] for record in timeline["spans"]] == ["outer", "inner", "failing"]
+    assert spans["outer"]["parent_id"] is None
+    assert spans["inner"]["parent_id"] == spans["outer"]["span_id"]
+    assert spans["inner"]["attrs"] == {"url": "https://a.example", "status": 200}
+    assert spans["failing"]["error"] == "ValueError: bad page"
+    assert all(record["duration_ms"] is not None for record in timeline["spans"])
+
+
+def test_trace_follows_tasks_and_decorated_functions():
+    @traced()
+    async def fetch(url):
+        await asyncio.sleep(0)
+        return url
+
+    @traced("summarize")
+    def summarize(text):
+        return text.upper()
+
+    async def scenario():
+        with start_trace("research") as trace:
+            with span("gather"):
+                await asyncio.gather(fetch("a"), fetch("b"))
+            summarize("text")
+        return trace.timeline()
+
+    timeline = asyncio.run(scenario())
+    names = [record["name"] for record in timeline["spans"]]
+    assert sorted(names) == ["fetch", "fetch", "gather", "summarize"]
+    gather_id = next(r["span_id"] for r in timeline["spans"] if r["name"] == "gather")
+    assert all(r["parent_id"] == gather_id for r in timeline["spans"] if r["name"] == "fetch")
+
+
+def test_diagnostics_adds_trace_only_when_asked(monkeypatch):
+    monkeypatch.setattr(tracing, "PROFILING_ENABLED", False)
+    with diagnostics("chat") as plain:
+        with span("work"):
+            pass
+    assert plain == {}
+
+    with diagnostics("chat", trace=True, profile=True) as extra:
+        with span("work"):
+            pass
+    # Profiling is ignored while disabled
+    assert list(extra) == ["trace"]
+    assert [record["name"] for record in extra["trace"]["spans"]] == ["work"]
+
+
+def test_profiler_samples_and_allows_one_profile_at_a_time():
+    profiler = SamplingProfiler(interval_ms=1)
+    profiler.start()
+    with pytest.raises(ProfilerBusy):
+        SamplingProfiler().start()
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    result = profiler.stop()
+
+    assert result["format"] == "folded" and result["samples"] > 0
+    assert "MainThread;" in result["folded"]
+    # The lock is released, so the next profile can start
+    follow_up = SamplingProfiler(interval_ms=1)
+    follow_up.start()
+    follow_up.stop()
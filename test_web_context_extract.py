@@ -0,0 +1,111 @@
+"""
+Tests for page fetch deduplication: the page cache and shared downloads
+"""
+import asyncio
+
+import pytest
+
+import src.web_context_extract as web
+from src.web_context_extract import PageCache
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    cache = PageCache(max_entries=10, ttl=60)
+    monkeypatch.setattr(web, "page_cache", cache)
+    monkeypatch.setattr(web, "search_web", _fake_search)
+
+    async def no_save(data, filename, base_path="./data"):
+        pass
+
+    monkeypatch.setattr(web, "save_to_file", no_save)
+    return cache
+
+
+async def _fake_search(query, max_results=5):
+    return ["https://a.example", "https://b.example"]
+
+
+def test_page_cache_expires_and_evicts(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(web.time, "monotonic", lambda: clock[0])
+    cache = PageCache(max_entries=2, ttl=10)
+    cache.set("a", {"text": "1"})
+    cache.set("b", {"text": "2"})
+    cache.get("a")
+    cache.set("c", {"text": "3"})
+    assert cache.get("b") is None and cache.get("a") == {"text": "1"}
+    clock[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats() == {"entries": 1, "hits": 2, "misses": 2}
+
+
+def test_concurrent_fetches_share_one_download(pages, monkeypatch):
+    downloads = []
+
+    async def fake_download(url):
+        downloads.append(url)
+        await asyncio.sleep(0.01)
+        page = {"status": 200, "text": f"text of {url}"}
+        web.page_cache.set(url, page)
+        return page
+
+    monkeypatch.setattr(web, "_download_page", fake_download)
+
+    async def scenario():
+        first = await asyncio.gather(*(web.fetch_page("https://a.example") for _ in range(5)))
+        again = await web.fetch_page("https://a.example")
+        return first, again
+
+    first, again = asyncio.run(scenario())
+    assert downloads == ["https://a.example"]
+    assert all(page["text"] == "text of https://a.example" for page in first + [again])
+    assert pages.stats()["hits"] == 1
+
+
+def test_crawl_summaries_are_cached_per_query(pages, monkeypatch):
+    crawled = []
+
+    async def fake_crawl(urls):
+        crawled.append(list(urls))
+        return {url: {"status": 200, "summary": f"summary of {url}"} for url in urls}
+
+    monkeypatch.setattr(web, "CRAWL4AI_AVAILABLE", True)
+    monkeypatch.setattr(web, "_crawl_pages", fake_crawl)
+    events = []
+
+    def progress(event_type, **fields):
+        events.append((event_type, fields))
+
+    async def scenario():
+        first = await web.extract("Acme news", silent_mode=True)
+        second = await web.extract("Acme news", silent_mode=True, progress_callback=progress)
+        other = await web.extract("Globex news", silent_mode=True)
+        return first, second, other
+
+    first, second, other = asyncio.run(scenario())
+    assert first == second
+    assert first[0] == {"url": "https://a.example", "summary": "summary of https://a.example", "error": False}
+    # The repeated query is served from the cache; another query crawls again
+    assert crawled == [["https://a.example", "https://b.example"]] * 2
+    assert all(fields["cached"] for event_type, fields in events if event_type == "fetch_finished")
+
+
+def test_failed_crawls_are_not_cached(pages, monkeypatch):
+    crawled = []
+
+    async def flaky_crawl(urls):
+        crawled.append(list(urls))
+        return {url: {"status": 200 if "a." in url else None, "summary": "text"} for url in urls}
+
+    monkeypatch.setattr(web, "CRAWL4AI_AVAILABLE", True)
+    monkeypatch.setattr(web, "_crawl_pages", flaky_crawl)
+
+    async def scenario():
+        first = await web.extract("Acme news", silent_mode=True)
+        await web.extract("Acme news", silent_mode=True)
+        return first
+
+    first = asyncio.run(scenario())
+    assert [item["error"] for item in first] == [False, True]
+    assert crawled == [["https://a.example", "https://b.example"], ["https://b.example"]]
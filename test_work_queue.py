@@ -0,0 +1,157 @@
+"""
+Tests for the durable work queue and the research worker that drains it
+"""
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from src.work_queue import WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / "queue.db"), max_attempts=2, retry_base_seconds=0.0)
+
+
+def test_expired_lease_goes_to_another_worker(queue):
+    job_id = queue.enqueue({"company": "Acme"})
+    first = queue.lease("worker-a", lease_seconds=-1)
+    assert first["job_id"] == job_id and first["attempts"] == 1
+
+    second = queue.lease("worker-b", lease_seconds=60)
+    assert second["job_id"] == job_id and second["lease_owner"] == "worker-b"
+    assert second["attempts"] == 2
+    # The first worker no longer owns the job
+    assert not queue.heartbeat(job_id, "worker-a")
+    assert not queue.complete(job_id, "worker-a", {"plan": {}})
+    assert queue.heartbeat(job_id, "worker-b", stage="researching")
+    assert queue.get(job_id)["stage"] == "researching"
+
+
+def test_expired_lease_out_of_attempts_fails(queue):
+    job_id = queue.enqueue({"company": "Acme"}, max_attempts=1)
+    queue.lease("worker-a", lease_seconds=-1)
+    assert queue.lease("worker-b") is None
+    row = queue.get(job_id)
+    assert row["status"] == "failed" and row["error"] == "Worker lease expired"
+
+
+def test_failed_job_is_retried_after_backoff_then_fails(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), max_attempts=2, retry_base_seconds=30.0)
+    job_id = queue.enqueue({"company": "Acme"})
+    queue.lease("worker-a")
+    before = time.time()
+    assert queue.fail(job_id, "worker-a", "search timed out") == "queued"
+    row = queue.get(job_id)
+    assert row["available_at"] >= before + 30 and row["error"] == "search timed out"
+    # Not available again until the backoff has passed
+    assert queue.lease("worker-b") is None
+
+    queue.enqueue({"company": "Other"}, job_id="other")
+    assert queue.lease("worker-b")["job_id"] == "other"
+
+    with queue._connect() as conn:
+        conn.execute("UPDATE jobs SET available_at = 0 WHERE job_id = ?", (job_id,))
+    assert queue.lease("worker-c")["attempts"] == 2
+    assert queue.fail(job_id, "worker-c", "still failing") == "failed"
+    assert queue.fail(job_id, "worker-c", "late report") is None
+
+
+def test_cancel_queued_and_running_jobs(queue):
+    queued = queue.enqueue({"company": "Queued"})
+    running = queue.enqueue({"company": "Running"})
+    assert queue.position(running) == 2
+    assert queue.cancel(queued)
+    assert queue.position(running) == 1
+    assert queue.lease("worker-a")["job_id"] == running
+
+    assert queue.cancel(running)
+    # The worker learns of the cancellation on its next heartbeat
+    assert not queue.heartbeat(running, "worker-a")
+    assert not queue.complete(running, "worker-a", {})
+    assert queue.get(running)["status"] == "cancelled"
+    assert not queue.cancel(running)
+    assert queue.stats()["jobs"] == {"cancelled": 2}
+
+
+def test_purge_removes_old_finished_jobs(queue):
+    job_id = queue.enqueue({"company": "Acme"})
+    queue.enqueue({"company": "Pending"})
+    queue.lease("worker-a")
+    queue.complete(job_id, "worker-a", {"plan": {}})
+    assert queue.purge(older_than_seconds=-1) == 1
+    assert queue.get(job_id) is None
+
+
+# The worker needs the agent's optional dependencies
+research_worker = pytest.importorskip("research_worker")
+
+
+def _result(company):
+    return {"data": [], "summary": f"About {company}", "timestamp": "2026-01-01T00:00:00",
+            "plan": {"executive_summary": "text"}, "plan_filename": "plan.md"}
+
+
+def test_worker_completes_job_through_research_flight(queue, monkeypatch):
+    calls = []
+
+    async def fake_flight(self, company):
+        calls.append(company)
+        return _result(company)
+
+    monkeypatch.setattr(research_worker.CompanyResearchAgent, "_research_flight", fake_flight)
+    research_cache, plan_cache = {}, {}
+    job_id = queue.enqueue({"company": "research Acme"})
+    job = queue.lease("worker-a")
+    asyncio.run(research_worker.run_job(queue, job, "worker-a", 60, research_cache, plan_cache))
+
+    row = queue.get(job_id)
+    assert row["status"] == "completed" and row["result"]["company"] == "Acme"
+    assert calls == ["Acme"]
+    # Results land in the shared caches for the API and other workers
+    assert "Acme" in research_cache and "Acme" in plan_cache
+
+
+def test_worker_skips_research_already_in_cache(queue, monkeypatch):
+    async def fail_flight(self, company):
+        raise AssertionError("cached research should not run again")
+
+    monkeypatch.setattr(research_worker.CompanyResearchAgent, "_research_flight", fail_flight)
+    research_cache = {"Acme": {**_result("Acme"), "timestamp": datetime.now().isoformat()}}
+    plan_cache = {"Acme": {"executive_summary": "text"}}
+    job_id = queue.enqueue({"company": "Acme"})
+    asyncio.run(research_worker.run_job(queue, queue.lease("worker-a"), "worker-a", 60,
+                                        research_cache, plan_cache))
+    assert queue.get(job_id)["result"] == {"company": "Acme", "cached": True}
+
+
+def test_worker_failure_requeues_job(queue, monkeypatch):
+    async def broken_flight(self, company):
+        raise RuntimeError("search API down")
+
+    monkeypatch.setattr(research_worker.CompanyResearchAgent, "_research_flight", broken_flight)
+    job_id = queue.enqueue({"company": "Acme"})
+    asyncio.run(research_worker.run_job(queue, queue.lease("worker-a"), "worker-a", 60, {}, {}))
+    row = queue.get(job_id)
+    assert row["status"] == "queued" and row["error"] == "search API down"
+
+
+def test_worker_stops_when_job_is_cancelled(queue, monkeypatch):
+    cancelled = []
+
+    async def slow_flight(self, company):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(company)
+            raise
+
+    monkeypatch.setattr(research_worker.CompanyResearchAgent, "_research_flight", slow_flight)
+    job_id = queue.enqueue({"company": "Acme"})
+    job = queue.lease("worker-a")
+    queue.cancel(job_id)
+    asyncio.run(research_worker.run_job(queue, job, "worker-a", 0.3, {}, {}))
+    assert cancelled == ["Acme"]
+    assert queue.get(job_id)["status"] == "cancelled"